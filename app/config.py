@@ -8,17 +8,52 @@ class Settings(BaseSettings):
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     LOG_LEVEL: str = "info"
+    LOG_FORMAT: str = "json"                # "json" or "text"
+    LOG_QUEUE_SIZE: int = 10000             # records buffered for the writer thread; overflow is dropped
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01   # share of DEBUG payload dumps (OCR text, LLM output) kept
+    LOG_MAX_FIELD_CHARS: int = 256          # strings in logged payloads are truncated past this
+    LOG_MAX_ITEMS: int = 20                 # list items / dict keys kept per logged collection
+    STARTUP_CHECK_TIMEOUT: float = 10.0   # per dependency, used at startup and by /health/ready
+
+    # --------------------
+    # Admission control (ingest endpoints)
+    # --------------------
+    ADMISSION_PATHS: list[str] = ["/upload"]
+    MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    RATE_LIMIT_PER_MINUTE: float = 30.0      # per client; 0 disables rate limiting
+    RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_MAX_CLIENTS: int = 10000      # buckets kept in memory
+    ADMISSION_TRUST_FORWARDED_FOR: bool = False   # identify clients by X-Forwarded-For (behind a proxy)
+    MAX_IN_FLIGHT_UPLOADS: int = 8           # uploads running OCR + classification at once
+    MAX_BACKGROUND_QUEUE: int = 100          # documents queued for or running extraction
+    MAX_BACKGROUND_WORKERS: int = 4          # extractions running at once; the rest of the queue waits
+    ADMISSION_RETRY_AFTER: int = 5           # Retry-After before any latency has been observed
+    ADMISSION_MAX_RETRY_AFTER: int = 300
 
     # --------------------
     # Database
     # --------------------
     MONGO_URI: str = "mongodb://localhost:27017"
-    DB_NAME: str = "bill_processing_db"
+    MONGO_DB_NAME: str = "bill_processing_db"   # GridFS object store backend
 
     # --------------------
     # OCR
     # --------------------
     TESSERACT_CMD: str | None = None
+    OCR_MODE: str = "standard"              # "standard" (full-page image_to_string) or "adaptive"
+    OCR_DETECT_ORIENTATION: bool = False    # adaptive: run Tesseract OSD and rotate first
+    OCR_MIN_CONFIDENCE: float = 60.0        # adaptive: retry a region upscaled below this mean word confidence
+    OCR_UPSCALE_FACTOR: int = 2
+    OCR_REGION_PADDING: int = 10            # pixels kept around detected text regions
+    OCR_MIN_GUTTER_RATIO: float = 0.04      # adaptive: column gutters must be at least this share of the page width
+    OCR_ROW_ALIGNMENT_RATIO: float = 0.6    # adaptive: keep columns together when this share of their text rows align (tables)
+    FIELD_LOCATOR_ENABLED: bool = True      # locate totals/dates/invoice numbers from word boxes
+    FIELD_LOCATOR_MIN_CONFIDENCE: float = 0.8   # located values at/above this override the LLM
+
+    # --------------------
+    # Full-text search (SQLite FTS5 index over OCR text)
+    # --------------------
+    SEARCH_INDEX_PATH: str = "data/ocr_search.db"
 
     # --------------------
     # LLM (Ollama)
@@ -26,11 +61,46 @@ class Settings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     LLM_MODEL: str = "gemma3:4b"
 
+    # Per-stage time budgets (seconds), covering all retries and hedges
+    LLM_CLASSIFY_TIMEOUT: float = 60.0
+    LLM_EXTRACT_TIMEOUT: float = 180.0
+    LLM_NETSUITE_TIMEOUT: float = 120.0
+    LLM_DEFAULT_TIMEOUT: float = 120.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 8.0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_TIMEOUT: float = 30.0
+    # Hedged requests only help if Ollama serves requests in parallel (OLLAMA_NUM_PARALLEL > 1)
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_MAX_WORKERS: int = 8
+
     # --------------------
     # External integrations
     # --------------------
     EXTERNAL_API_URL: str | None = None      # used by /forward
-    DASHBOARD_API_URL: str | None = "https://occupational-dale-falling-wearing.trycloudflare.com" + "/api/ingest"     # used by automatic dashboard push
+    FORWARD_ALLOWED_URLS: list[str] = []     # other target_url values /forward accepts
+    DASHBOARD_API_URL: str | None = None     # used by automatic dashboard push; unset queues nothing
+
+    # Outbox delivery to the URLs above
+    DELIVERY_ENABLED: bool = False         # run the sender inside the API process (else app.scripts.deliver_outbox)
+    DELIVERY_BATCH_SIZES: dict[str, int] = {}  # target URL -> payloads per POST as {"items": [...]}; others get one bare payload
+    DELIVERY_MAX_CONCURRENCY: int = 4      # batches in flight at once
+    DELIVERY_HTTP2: bool = True
+    DELIVERY_POOL_SIZE: int = 10
+    DELIVERY_TIMEOUT: float = 15.0
+    DELIVERY_MAX_ATTEMPTS: int = 8         # then the message is dead-lettered
+    DELIVERY_RETRY_BASE_DELAY: float = 2.0
+    DELIVERY_RETRY_MAX_DELAY: float = 300.0
+    DELIVERY_POLL_INTERVAL: float = 5.0
+    DELIVERY_LEASE_SECONDS: float = 60.0   # claimed messages are retried after this if the sender dies
+
+    # Object store for uploaded images: "minio", "gridfs" or "local"
+    OBJECT_STORE_BACKEND: str = "minio"
+    OBJECT_STORE_POOL_SIZE: int = 10
+    OBJECT_STORE_TIMEOUT: float = 30.0
+    OBJECT_STORE_LOCAL_PATH: str = "data/objects"
 
     # MinIO
     MINIO_ENDPOINT: str = "localhost:9000"
@@ -38,6 +108,7 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str = "minioadmin"
     MINIO_BUCKET: str = "documents"
     MINIO_SECURE: bool = False
+    MINIO_REGION: str = "us-east-1"
 
     # MySQL
     DB_HOST: str = "localhost"
@@ -45,6 +116,7 @@ class Settings(BaseSettings):
     DB_NAME: str = "documents_db"
     DB_USER: str = "root"
     DB_PASSWORD: str | None = None
+    DB_CREATE_TABLES: bool = True   # run metadata.create_all at startup
 
 
 
@@ -1,3 +1,4 @@
+import threading
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
@@ -18,15 +19,42 @@ else:
         f"{settings.DB_NAME}"
     )
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-)
+_engine = None
+_engine_lock = threading.Lock()
 
-SessionLocal = sessionmaker(
+_session_factory = sessionmaker(
     autocommit=False,
     autoflush=False,
-    bind=engine,
 )
 
 Base = declarative_base()
+
+
+def get_engine():
+    """
+    Creates the SQLAlchemy engine on first use, so importing this module
+    does not load the MySQL driver or build a connection pool.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    DATABASE_URL,
+                    pool_pre_ping=True,
+                )
+                _session_factory.configure(bind=_engine)
+    return _engine
+
+
+def SessionLocal():
+    get_engine()
+    return _session_factory()
+
+
+def dispose_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
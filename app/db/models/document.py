@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy import Column, String, DateTime, Date, Numeric, JSON
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -17,4 +17,14 @@ class Document(Base):
     extracted_data = Column(JSON)
     netsuite_data = Column(JSON)
 
+    # Promoted from extracted_data / netsuite_data at insert time for indexed search
+    vendor_name = Column(String(255), index=True)
+    invoice_number = Column(String(100), index=True)
+    transaction_date = Column(Date, index=True)
+    total_amount = Column(Numeric(14, 2), index=True)
+    currency = Column(String(10), index=True)
+
+    # Model + prompt hash used by each LLM stage, e.g. {"extract": {"model": ..., "prompt": ...}}
+    processing_versions = Column(JSON)
+
     created_at = Column(DateTime, server_default=func.now())
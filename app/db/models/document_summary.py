@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Date, Integer, Numeric, DateTime
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class DocumentSummary(Base):
+    """
+    Incrementally maintained aggregates over `documents`, one row per
+    bill type / subtype / vendor / currency / day. Amounts in different
+    currencies are never summed together.
+    """
+    __tablename__ = "document_summaries"
+
+    bill_type = Column(String(50), primary_key=True)
+    bill_subtype = Column(String(50), primary_key=True)
+    vendor_name = Column(String(255), primary_key=True)
+    currency = Column(String(10), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+
+    document_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(18, 2), nullable=False, default=0)
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime, LargeBinary, JSON
+from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class DocumentText(Base):
+    """
+    Compressed OCR text for a document, kept out of `documents` so list
+    queries never pull the blob, plus the fields the locator found in the
+    word boxes (reused when the document is re-extracted).
+    """
+    __tablename__ = "document_texts"
+
+    document_id = Column(String(36), primary_key=True)
+    compression = Column(String(10), nullable=False, default="zlib")
+    ocr_text = Column(LargeBinary().with_variant(LONGBLOB, "mysql"), nullable=False)
+    located_fields = Column(JSON)
+
+    created_at = Column(DateTime, server_default=func.now())
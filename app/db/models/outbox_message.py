@@ -0,0 +1,34 @@
+import datetime
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Text, JSON, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class OutboxMessage(Base):
+    """
+    A payload waiting to be pushed to an external system (dashboard, NetSuite
+    bridge, /forward target). Rows are written in the same transaction as the
+    document, then delivered by DeliveryService.
+
+    status: "pending" -> "delivered", or "dead" once retries are exhausted or
+    the receiver rejects the payload permanently (the dead-letter store).
+    """
+    __tablename__ = "outbox_messages"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    document_id = Column(String(36), nullable=False, index=True)
+    target_url = Column(String(512), nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    status = Column(String(10), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    # UTC, like documents.created_at
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, server_default=func.now())
+    delivered_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -1,15 +1,212 @@
+import atexit
+import contextvars
+import datetime
+import json
 import logging
+import logging.handlers
+import queue
+import random
+from contextlib import contextmanager
+from app.config import settings
+
+# Correlation id of the document / request being handled; stamped on every record
+correlation_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("correlation_id", default=None)
+
+# Payload keys whose values never reach the logs
+REDACTED_KEYS = {
+    "password", "secret", "token", "api_key", "authorization",
+    "account_number", "bank_account", "iban", "card_number", "tax_id", "ssn",
+}
+REDACTED = "[REDACTED]"
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "correlation_id"}
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+@contextmanager
+def bind_correlation_id(value: str):
+    """Tags every record logged inside the block (in this context) with `value`."""
+    token = correlation_id.set(value)
+    try:
+        yield
+    finally:
+        correlation_id.reset(token)
+
+
+# ----------------------------------------------------------------------
+# Payload helpers
+# ----------------------------------------------------------------------
+def redact(value, max_chars: int | None = None, max_items: int | None = None, _depth: int = 0):
+    """
+    Copy of `value` that is safe to log: sensitive keys are masked, long
+    strings and collections truncated, deep nesting cut off.
+    """
+    max_chars = max_chars or settings.LOG_MAX_FIELD_CHARS
+    max_items = max_items or settings.LOG_MAX_ITEMS
+    if _depth > 6:
+        return "…"
+    if isinstance(value, dict):
+        out = {}
+        for i, (key, item) in enumerate(value.items()):
+            if i >= max_items:
+                out["…"] = f"+{len(value) - max_items} keys"
+                break
+            if str(key).lower() in REDACTED_KEYS:
+                out[key] = REDACTED
+            else:
+                out[key] = redact(item, max_chars, max_items, _depth + 1)
+        return out
+    if isinstance(value, (list, tuple)):
+        out = [redact(item, max_chars, max_items, _depth + 1) for item in value[:max_items]]
+        if len(value) > max_items:
+            out.append(f"… +{len(value) - max_items} items")
+        return out
+    if isinstance(value, str):
+        if len(value) > max_chars:
+            return f"{value[:max_chars]}… (+{len(value) - max_chars} chars)"
+        return value
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return redact(str(value), max_chars, max_items, _depth + 1)
+
+
+class LazyPayload:
+    """
+    Defers redaction and serialization until a handler actually formats the
+    record (in the listener thread), so filtered records cost nothing.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        value = self.value() if callable(self.value) else self.value
+        return json.dumps(redact(value), ensure_ascii=False, default=str)
+
+
+def log_payload(logger: logging.Logger, label: str, value):
+    """
+    Sampled DEBUG dump of a payload (dict, list, text, or a zero-argument
+    callable producing one). Only LOG_PAYLOAD_SAMPLE_RATE of the calls are
+    logged, and nothing is computed unless the record is kept.
+    """
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= settings.LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    logger.debug("%s: %s", label, LazyPayload(value), extra={"payload": label})
+
+
+# ----------------------------------------------------------------------
+# Handlers and formatters
+# ----------------------------------------------------------------------
+class CorrelationIdFilter(logging.Filter):
+    """Copies the current correlation id onto the record in the logging thread."""
+
+    def filter(self, record):
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - [%(correlation_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = None
+        return super().format(record)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread without formatting them and drops
+    them (counting the loss) rather than blocking when the queue is full.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        # The listener formats the record; keep args so formatting stays lazy.
+        # Objects passed as args must not be mutated after logging.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def setup_logging(level: str | None = None, fmt: str | None = None, stream=None, use_queue: bool = True):
+    """
+    Configures the root logger once for the whole process: records go
+    through a bounded queue to a background thread that formats (JSON or
+    text) and writes them. Uvicorn's loggers are routed through it too.
+    use_queue=False writes synchronously from the logging thread (for
+    scripts and comparisons).
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    formatter = JsonFormatter() if (fmt or settings.LOG_FORMAT) == "json" else TextFormatter()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(formatter)
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)) if use_queue else output
+    handler.addFilter(CorrelationIdFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel((level or settings.LOG_LEVEL).upper())
+
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    if use_queue:
+        _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        _listener = None
+
+
+def shutdown_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
 
 def setup_logger(name: str) -> logging.Logger:
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-
-    if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-
-    return logger
+    """Kept for existing callers; configuration now happens in setup_logging()."""
+    return logging.getLogger(name)
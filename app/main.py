@@ -1,36 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routes import document_routes
+from app.routes import document_routes, analytics_routes, search_routes, object_routes, health_routes
+from app.services.container import services
+from app.middleware import AdmissionMiddleware, CorrelationIdMiddleware
+from app.logger import setup_logging
 from app.config import settings
 import logging
 
-from app.db.database import engine
-from app.db.models.document import Document
-
 # ------------------------
 # Logging Configuration
 # ------------------------
-logging.basicConfig(
-    level=settings.LOG_LEVEL.upper(),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+setup_logging()
 
 logger = logging.getLogger("app.main")
 
 # ------------------------
-# App Initialization
+# Lifespan
 # ------------------------
-app = FastAPI(title="Bill Processing Service")
-
-app.include_router(document_routes.router)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connect MySQL (and create tables), object store, Ollama and Tesseract concurrently
+    await services.startup()
+    yield
+    await services.shutdown()
 
 
 # ------------------------
-# Startup Event
+# App Initialization
 # ------------------------
-@app.on_event("startup")
-def on_startup():
-    logger.info("Creating database tables (if not exist)")
-    Document.metadata.create_all(bind=engine)
+app = FastAPI(title="Bill Processing Service", lifespan=lifespan)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(CorrelationIdMiddleware)
+
+app.include_router(document_routes.router)
+app.include_router(analytics_routes.router)
+app.include_router(search_routes.router)
+if not services.object_store.serves_presigned_urls:
+    # MinIO images are reachable only through time-limited presigned URLs;
+    # the other backends are served by the API
+    app.include_router(object_routes.router)
+app.include_router(health_routes.router)
 
 
 # ------------------------
@@ -0,0 +1,128 @@
+import time
+import uuid
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.logger import bind_correlation_id, correlation_id
+from app.services.admission import AdmissionRejected
+from app.services.container import services
+
+
+def _client_id(scope) -> str:
+    if settings.ADMISSION_TRUST_FORWARDED_FOR:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _content_length(scope) -> int | None:
+    for name, value in scope.get("headers", []):
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def _rejection_response(rejected: AdmissionRejected) -> JSONResponse:
+    headers = {"Retry-After": str(rejected.retry_after)} if rejected.retry_after is not None else None
+    return JSONResponse(status_code=rejected.status_code, content={"detail": rejected.detail}, headers=headers)
+
+
+class CorrelationIdMiddleware:
+    """
+    Binds a correlation id for the request's logs: the incoming X-Request-ID,
+    or a new one. Handlers may replace it (e.g. /upload with the document id);
+    the final value is returned in the X-Correlation-ID response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                current = correlation_id.get()
+                if current:
+                    message["headers"] = [*message.get("headers", []), (b"x-correlation-id", current.encode("latin-1"))]
+            await send(message)
+
+        with bind_correlation_id(request_id or uuid.uuid4().hex):
+            await self.app(scope, receive, send_with_id)
+
+
+class AdmissionMiddleware:
+    """
+    Admission control for the ingest endpoints (ADMISSION_PATHS).
+
+    Runs before the request body is read: oversized uploads get 413,
+    clients over their rate limit 429, and requests arriving while the
+    pipeline is saturated 503, each with Retry-After where it applies.
+    Bodies without a Content-Length are counted while they stream in.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in settings.ADMISSION_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        admission = services.admission
+        max_bytes = settings.MAX_UPLOAD_BYTES
+        length = _content_length(scope)
+        try:
+            if length is not None and length > max_bytes:
+                raise admission.reject_oversized()
+            admission.admit(_client_id(scope))
+        except AdmissionRejected as rejected:
+            await _rejection_response(rejected)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    rejected = admission.reject_oversized()
+                    raise HTTPException(status_code=rejected.status_code, detail=rejected.detail)
+            return message
+
+        started = time.perf_counter()
+        background_started = None
+        status_code = None
+
+        async def tracked_send(message):
+            nonlocal background_started, status_code
+            if message["type"] == "http.response.start" and background_started is None:
+                background_started = time.perf_counter()
+                status_code = message["status"]
+                admission.response_started(background_started - started)
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        finally:
+            if background_started is None:
+                admission.finished(in_background=False)
+            else:
+                # Only successful uploads schedule the pipeline; don't let errors skew the estimate
+                elapsed = time.perf_counter() - background_started if status_code < 400 else None
+                admission.finished(in_background=True, elapsed=elapsed)
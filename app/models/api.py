@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, date
 
 # -----------------------------
 # Used for /document/{id}
@@ -44,6 +44,13 @@ class ForwardRequest(BaseModel):
     target_url: Optional[str] = None
 
 
+class ForwardResponse(BaseModel):
+    status: str
+    document_id: str
+    message_id: int
+    target_url: str
+
+
 class DocumentListItem(BaseModel):
     document_id: str
     created_at: datetime
@@ -51,4 +58,26 @@ class DocumentListItem(BaseModel):
     bill_subtype: str
     extracted_data: Dict[str, Any]
     netsuite_data: Dict[str, Any]
-    original_image_url: str # This is the link for your <img> tag
\ No newline at end of file
+    original_image_url: str # This is the link for your <img> tag
+
+# -----------------------------
+# Used for /analytics
+# -----------------------------
+class AnalyticsRow(BaseModel):
+    bill_type: Optional[str] = None
+    bill_subtype: Optional[str] = None
+    vendor: Optional[str] = None
+    currency: Optional[str] = None
+    day: Optional[date] = None
+    month: Optional[str] = None
+    document_count: int
+    total_amount: float
+
+
+# -----------------------------
+# Used for /search/text
+# -----------------------------
+class TextSearchHit(BaseModel):
+    document_id: str
+    score: float
+    snippet: str
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, HTTPException, Query, Depends
+from app.services.container import get_sql_service
+from app.services.sql_service import SUMMARY_GROUP_COLUMNS
+from app.models.api import AnalyticsRow
+from typing import List, Optional
+import logging
+import datetime
+
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/analytics", response_model=List[AnalyticsRow])
+def get_analytics(
+    group_by: List[str] = Query(default=["bill_type"]),
+    bill_type: Optional[str] = None,
+    bill_subtype: Optional[str] = None,
+    vendor: Optional[str] = None,
+    currency: Optional[str] = None,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    sql_service=Depends(get_sql_service),
+):
+    """
+    Document counts and summed totals from the pre-aggregated summary table.
+    e.g. /analytics?group_by=vendor&group_by=month
+
+    Amounts are never summed across currencies: unless the request filters
+    on one currency, rows are also grouped by currency.
+    """
+    invalid = [name for name in group_by if name not in SUMMARY_GROUP_COLUMNS]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported group_by: {', '.join(invalid)}. "
+                   f"Allowed: {', '.join(SUMMARY_GROUP_COLUMNS)}",
+        )
+
+    group_by = list(dict.fromkeys(group_by))
+    if not currency and "currency" not in group_by:
+        group_by.append("currency")
+
+    try:
+        return sql_service.get_summary(
+            group_by=group_by,
+            bill_type=bill_type,
+            bill_subtype=bill_subtype,
+            vendor=vendor,
+            currency=currency,
+            start_date=start_date,
+            end_date=end_date,
+        )
+    except Exception as e:
+        logger.error(f"Failed to fetch analytics: {e}")
+        raise HTTPException(status_code=500, detail="Could not retrieve analytics")
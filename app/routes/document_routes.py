@@ -1,11 +1,22 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from app.services.minio_service import minio_service
-from app.services.ocr_service import ocr_service
-from app.services.llm_service import llm_service
-from app.services.sql_service import sql_service
-from app.models.api import UploadResponse, ClassificationResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from app.services.container import (
+    services,
+    get_object_store,
+    get_ocr_service,
+    get_field_locator,
+    get_llm_service,
+    get_sql_service,
+    get_delivery_service,
+)
+from app.models.api import UploadResponse, ClassificationResponse, ForwardRequest, ForwardResponse
+from app.config import settings
+from app.logger import correlation_id, log_payload
+from app.services.resilience import CircuitOpenError, DeadlineExceededError
 from typing import List
 from app.models.api import DocumentListItem
+import asyncio
+import contextvars
+import functools
 import logging
 import datetime
 import uuid
@@ -17,6 +28,19 @@ logger = logging.getLogger(__name__)
 
 from fastapi import BackgroundTasks
 
+async def run_in_background_pool(func, **kwargs):
+    """
+    Background task wrapper: runs `func` on the bounded background pool
+    rather than Starlette's shared threadpool, in a copy of the request's
+    context. Awaited inside the ASGI call, so admission control keeps
+    counting the document until it is done.
+    """
+    context = contextvars.copy_context()
+    await asyncio.get_running_loop().run_in_executor(
+        services.background_pool, functools.partial(context.run, func, **kwargs)
+    )
+
+
 def process_full_document(
     document_id: str,
     ocr_text: str,
@@ -25,8 +49,16 @@ def process_full_document(
     filename: str,
     object_key: str,
     content_type: str,
-    created_at: datetime.datetime
+    created_at: datetime.datetime,
+    located_fields: dict | None = None,
 ):
+    llm_service = services.llm
+    sql_service = services.sql
+    search_index_service = services.search_index
+
+    # Runs in a copied context on a worker thread, so this does not leak
+    correlation_id.set(document_id)
+
     try:
         logger.info(f"Background processing started for {document_id}")
         
@@ -34,8 +66,10 @@ def process_full_document(
         logger.info("Extracting structured data")
         structured_data = llm_service.extract_structured_data(
             ocr_text=ocr_text,
-            document_type=bill_type
+            document_type=bill_type,
+            located_fields=located_fields,
         )
+        log_payload(logger, "structured data", structured_data)
         
         logger.info("Transforming for NetSuite")
         netsuite_payload = llm_service.transform_for_netsuite(
@@ -43,7 +77,7 @@ def process_full_document(
             document_type=bill_type
         )
         
-        # 4. Persist metadata in MySQL
+        # 4. Persist metadata in MySQL, queueing the dashboard push in the same transaction
         sql_service.insert_document(
             document_id=document_id,
             filename=filename,
@@ -54,7 +88,19 @@ def process_full_document(
             extracted_data=structured_data,
             netsuite_data=netsuite_payload,
             created_at=created_at,
+            ocr_text=ocr_text,
+            processing_versions=llm_service.stage_versions(bill_type),
+            located_fields=located_fields,
+            outbox_urls=[settings.DASHBOARD_API_URL] if settings.DASHBOARD_API_URL else None,
         )
+        services.delivery.notify()
+
+        # 5. Make the OCR text searchable (the row above stays the source of truth)
+        try:
+            search_index_service.index_document(document_id, ocr_text)
+        except Exception:
+            logger.exception(f"Failed to index OCR text for {document_id}")
+
         logger.info(f"Background processing complete for {document_id}")
         
     except Exception as e:
@@ -63,19 +109,26 @@ def process_full_document(
 @router.post("/upload", response_model=ClassificationResponse)
 async def upload_document(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    object_store=Depends(get_object_store),
+    ocr_service=Depends(get_ocr_service),
+    field_locator=Depends(get_field_locator),
+    llm_service=Depends(get_llm_service),
 ):
     try:
+        document_id = str(uuid.uuid4())
+        # Route and background task logs share the document id
+        correlation_id.set(document_id)
+
         contents = await file.read()
         logger.info(f"Received file: {file.filename}")
 
-        document_id = str(uuid.uuid4())
         created_at = datetime.datetime.utcnow()
 
         # -------------------------
-        # 1. Store image in MinIO
+        # 1. Store image in the object store
         # -------------------------
-        object_key = minio_service.upload_image(
+        object_key = await object_store.aupload_image(
             contents=contents,
             filename=file.filename,
             content_type=file.content_type,
@@ -83,15 +136,22 @@ async def upload_document(
         )
 
         # -------------------------
-        # 2. OCR
+        # 2. OCR (Tesseract and the LLM block, so keep them off the event loop)
         # -------------------------
-        ocr_text = ocr_service.extract_text(contents)
+        ocr_result = await asyncio.to_thread(ocr_service.extract, contents)
+        ocr_text = ocr_result.text
         logger.info("OCR extraction complete")
 
+        # Totals, dates and invoice numbers found next to their labels
+        located_fields = None
+        if settings.FIELD_LOCATOR_ENABLED:
+            located = await asyncio.to_thread(field_locator.locate, ocr_result)
+            located_fields = {name: field.to_dict() for name, field in located.items()}
+
         # -------------------------
         # 3. LLM Classification (Immediate)
         # -------------------------
-        classification = llm_service.classify_document(ocr_text)
+        classification = await asyncio.to_thread(llm_service.classify_document, ocr_text)
         bill_type = classification.get("bill_type", "Unknown")
         bill_subtype = classification.get("bill_subtype", "Unknown")
 
@@ -100,6 +160,7 @@ async def upload_document(
 
         # Schedule the rest
         background_tasks.add_task(
+            run_in_background_pool,
             process_full_document,
             document_id=document_id,
             ocr_text=ocr_text,
@@ -108,7 +169,8 @@ async def upload_document(
             filename=file.filename,
             object_key=object_key,
             content_type=file.content_type,
-            created_at=created_at
+            created_at=created_at,
+            located_fields=located_fields,
         )
 
         # -------------------------
@@ -131,13 +193,26 @@ async def upload_document(
             "document_id": document_id
         }
 
+    except CircuitOpenError as e:
+        logger.warning(f"Document upload rejected: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="LLM service unavailable, try again later",
+            headers={"Retry-After": str(max(1, int(e.retry_after)))},
+        )
+    except DeadlineExceededError:
+        logger.exception("Document upload timed out")
+        raise HTTPException(status_code=504, detail="Document classification timed out")
     except Exception:
         logger.exception("Document upload failed")
         raise HTTPException(status_code=500, detail="Document upload failed")
 
 
 @router.get("/all", response_model=List[UploadResponse])
-async def get_all_documents():
+async def get_all_documents(
+    sql_service=Depends(get_sql_service),
+    object_store=Depends(get_object_store),
+):
     try:
         # 1. Fetch all records from MySQL
         documents = sql_service.get_all_documents()
@@ -145,7 +220,7 @@ async def get_all_documents():
         response_data = []
         for doc in documents:
             # 2. Generate a temporary link (valid for 1 hour) for the frontend
-            image_url = minio_service.get_presigned_url(doc.object_key)
+            image_url = object_store.get_presigned_url(doc.object_key)
             
             response_data.append(UploadResponse(
                 document_id=doc.document_id,
@@ -156,9 +231,46 @@ async def get_all_documents():
                 netsuite_data=doc.netsuite_data,
                 uploaded_img=image_url if image_url else ""
             ))
-            logger.info(f"\n\nResponse Data: {response_data}")
-            
+
+        logger.info("Returning %d documents", len(response_data))
         return response_data
     except Exception as e:
         logger.error(f"Failed to fetch documents: {e}")
-        raise HTTPException(status_code=500, detail="Could not retrieve data")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Could not retrieve data")
+
+
+@router.post("/forward", response_model=ForwardResponse, status_code=202)
+async def forward_document(
+    request: ForwardRequest,
+    sql_service=Depends(get_sql_service),
+    delivery_service=Depends(get_delivery_service),
+):
+    """
+    Queues a stored document for delivery to `target_url` (default:
+    EXTERNAL_API_URL). Delivery happens asynchronously through the outbox,
+    with batching and retries; failures end up in the dead-letter store.
+    Only EXTERNAL_API_URL and FORWARD_ALLOWED_URLS are accepted as targets,
+    so callers cannot make the server post documents to arbitrary hosts.
+    """
+    target_url = request.target_url or settings.EXTERNAL_API_URL
+    if not target_url:
+        raise HTTPException(status_code=400, detail="No target_url given and EXTERNAL_API_URL is not set")
+    if target_url not in {settings.EXTERNAL_API_URL, *settings.FORWARD_ALLOWED_URLS}:
+        raise HTTPException(status_code=400, detail="target_url is not an allowed forwarding target")
+
+    try:
+        message_id = sql_service.enqueue_document(request.document_id, target_url)
+    except Exception:
+        logger.exception(f"Failed to queue document {request.document_id} for forwarding")
+        raise HTTPException(status_code=500, detail="Could not queue document for delivery")
+
+    if message_id is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    delivery_service.notify()
+    return {
+        "status": "queued",
+        "document_id": request.document_id,
+        "message_id": message_id,
+        "target_url": target_url,
+    }
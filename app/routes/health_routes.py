@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services.container import services
+import logging
+
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/health/live")
+async def liveness():
+    """
+    The process is up and serving requests. Does not touch dependencies.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """
+    Checks MySQL, the object store, Ollama, Tesseract and the search index
+    concurrently. Returns 503 if any of them is unavailable.
+    """
+    checks = await services.readiness()
+    ready = all(check["ready"] for check in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": checks},
+    )
+
+
+@router.get("/metrics/llm")
+async def llm_metrics():
+    """
+    Circuit breaker state, retry/hedge/failure counters, token counts and
+    per-stage latency percentiles of the Ollama client.
+    """
+    return services.llm.metrics()
+
+
+@router.get("/metrics/admission")
+async def admission_metrics():
+    """
+    In-flight uploads, background queue depth, their limits and rejection
+    counts. `background_queue_depth` is the signal to autoscale on.
+    """
+    return services.admission.snapshot()
+
+
+@router.get("/metrics/delivery")
+async def delivery_metrics():
+    """
+    Outbox sender counters plus the number of outbox messages per status
+    ("pending", "delivered", "dead").
+    """
+    metrics = services.delivery.metrics()
+    try:
+        metrics["outbox"] = services.sql.outbox_counts()
+    except Exception as e:
+        logger.warning(f"Could not count outbox messages: {e}")
+        metrics["outbox"] = None
+    return metrics
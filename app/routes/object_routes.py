@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException, Header, Response, Depends
+from app.services.container import get_object_store
+from app.services.object_store import ObjectNotFoundError
+from typing import Optional
+import asyncio
+import logging
+import mimetypes
+import re
+
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parses a single `bytes=start-end` range into an inclusive (start, end)
+    pair clamped to the object size. Returns None if it is not satisfiable.
+    """
+    match = _RANGE_RE.match(range_header.strip())
+    if size == 0 or not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # suffix range: last N bytes
+        length = int(end)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+@router.get("/objects/{key:path}")
+async def get_object(
+    key: str,
+    range: Optional[str] = Header(default=None),
+    object_store=Depends(get_object_store),
+):
+    """
+    Serves stored images for backends without presigned URLs (local,
+    GridFS). Not mounted for MinIO. Supports single `Range: bytes=...`
+    requests.
+    """
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+    try:
+        if range is None:
+            data = await object_store.aget(key)
+            return Response(content=data, media_type=media_type, headers={"Accept-Ranges": "bytes"})
+
+        size = await asyncio.to_thread(object_store.size, key)
+        byte_range = parse_range(range, size)
+        if byte_range is None:
+            raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        start, end = byte_range
+        data = await object_store.aget(key, offset=start, length=end - start + 1)
+        return Response(
+            content=data,
+            status_code=206,
+            media_type=media_type,
+            headers={"Accept-Ranges": "bytes", "Content-Range": f"bytes {start}-{end}/{size}"},
+        )
+    except ObjectNotFoundError:
+        raise HTTPException(status_code=404, detail="Object not found")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid object key")
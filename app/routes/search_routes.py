@@ -0,0 +1,80 @@
+from fastapi import APIRouter, HTTPException, Query, Depends
+from app.services.container import get_object_store, get_sql_service, get_search_index_service
+from app.models.api import UploadResponse, TextSearchHit
+from typing import List, Literal, Optional
+import logging
+import datetime
+
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/search", response_model=List[UploadResponse])
+def search_documents(
+    vendor: Optional[str] = None,
+    invoice_number: Optional[str] = None,
+    currency: Optional[str] = None,
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    min_total: Optional[float] = None,
+    max_total: Optional[float] = None,
+    match: Literal["exact", "prefix"] = "exact",
+    limit: int = Query(default=50, ge=1, le=500),
+    sql_service=Depends(get_sql_service),
+    object_store=Depends(get_object_store),
+):
+    """
+    Finds bills by vendor, invoice number, date, total or currency using the
+    indexed columns promoted from extracted_data / netsuite_data.
+    """
+    if not any([vendor, invoice_number, currency, date_from, date_to,
+                min_total is not None, max_total is not None]):
+        raise HTTPException(status_code=400, detail="At least one search filter is required")
+
+    try:
+        documents = sql_service.search_documents(
+            vendor=vendor,
+            invoice_number=invoice_number,
+            currency=currency,
+            date_from=date_from,
+            date_to=date_to,
+            min_total=min_total,
+            max_total=max_total,
+            prefix=match == "prefix",
+            limit=limit,
+        )
+
+        response_data = []
+        for doc in documents:
+            image_url = object_store.get_presigned_url(doc.object_key)
+            response_data.append(UploadResponse(
+                document_id=doc.document_id,
+                created_at=doc.created_at,
+                bill_type=doc.bill_type,
+                bill_subtype=doc.bill_subtype,
+                extracted_data=doc.extracted_data,
+                netsuite_data=doc.netsuite_data,
+                uploaded_img=image_url if image_url else ""
+            ))
+        return response_data
+    except Exception as e:
+        logger.error(f"Failed to search documents: {e}")
+        raise HTTPException(status_code=500, detail="Could not search documents")
+
+
+@router.get("/search/text", response_model=List[TextSearchHit])
+def search_text(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(default=20, ge=1, le=200),
+    search_index_service=Depends(get_search_index_service),
+):
+    """
+    Full-text search over OCR text. Every word must appear; `word*` matches a prefix.
+    Returns document ids ranked by relevance with a highlighted snippet.
+    """
+    try:
+        return search_index_service.search(q, limit=limit)
+    except Exception as e:
+        logger.error(f"Full-text search failed: {e}")
+        raise HTTPException(status_code=500, detail="Could not search OCR text")
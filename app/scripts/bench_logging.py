@@ -0,0 +1,149 @@
+"""
+Microbenchmark of GET /all with logging on, comparing logging setups.
+
+MySQL and the object store are replaced by in-memory fakes holding
+--documents rows, so the numbers isolate the route + logging cost. Each
+configuration serves --requests sequential requests in-process; log output
+goes to --log-file (default /dev/null, i.e. formatting cost without disk I/O).
+
+Usage:
+    python -m app.scripts.bench_logging [--documents 200] [--requests 300]
+        [--level INFO] [--log-file /dev/null]
+
+The "per-row dump" configuration reproduces the old behaviour of /all,
+which logged the cumulative response list once per row.
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import statistics
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app.logger import setup_logging, shutdown_logging
+from app.services.container import services
+
+CONFIGS = [
+    # name, format, use_queue, per-row dump
+    ("text, sync, per-row dump", "text", False, True),
+    ("text, sync", "text", False, False),
+    ("json, sync", "json", False, False),
+    ("json, queue", "json", True, False),
+]
+
+
+class FakeSQL:
+    def __init__(self, count: int):
+        now = datetime.datetime.utcnow()
+        self.documents = [
+            SimpleNamespace(
+                document_id=f"{i:08d}-0000-0000-0000-000000000000",
+                created_at=now - datetime.timedelta(minutes=i),
+                bill_type="invoice",
+                bill_subtype="utilities",
+                object_key=f"documents/{i}/bill.png",
+                extracted_data={
+                    "vendor_name": f"Vendor {i % 17}",
+                    "invoice_number": f"INV-{i:06d}",
+                    "invoice_date": "2024-05-01",
+                    "total_amount": 1234.56,
+                    "currency": "USD",
+                    "line_items": [{"description": f"Item {n}", "amount": 10.0 * n} for n in range(8)],
+                },
+                netsuite_data={"entity": f"Vendor {i % 17}", "tranId": f"INV-{i:06d}", "total": 1234.56},
+            )
+            for i in range(count)
+        ]
+
+    def get_all_documents(self):
+        return self.documents
+
+
+class FakeObjectStore:
+    def get_presigned_url(self, key: str) -> str:
+        return f"http://localhost:9000/documents/{key}?X-Amz-Signature=0"
+
+
+def per_row_dump_filter():
+    """Re-creates the removed per-row `Response Data` log line inside /all."""
+    route_logger = logging.getLogger("app.routes.document_routes")
+    rows = []
+
+    class Dump(logging.Filter):
+        def filter(self, record):
+            if record.getMessage().startswith("Returning"):
+                for doc in services.sql.documents:
+                    rows.append(doc)
+                    route_logger.handle(logging.LogRecord(
+                        route_logger.name, logging.INFO, __file__, 0,
+                        f"\n\nResponse Data: {rows}", None, None,
+                    ))
+                rows.clear()
+            return True
+
+    return Dump()
+
+
+async def run_config(app, requests: int) -> list[float]:
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get("/all")
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--level", default="INFO")
+    parser.add_argument("--log-file", default="/dev/null")
+    args = parser.parse_args()
+
+    from app.main import app
+
+    services._instances["sql"] = FakeSQL(args.documents)
+    services._instances["object_store"] = FakeObjectStore()
+
+    results = []
+    for name, fmt, use_queue, per_row_dump in CONFIGS:
+        with open(args.log_file, "a") as stream:
+            setup_logging(level=args.level, fmt=fmt, stream=stream, use_queue=use_queue)
+            route_logger = logging.getLogger("app.routes.document_routes")
+            dump = per_row_dump_filter() if per_row_dump else None
+            if dump:
+                route_logger.addFilter(dump)
+
+            requests = max(args.requests // 20, 5) if per_row_dump else args.requests
+            asyncio.run(run_config(app, 5))  # warm-up
+            latencies = asyncio.run(run_config(app, requests))
+
+            if dump:
+                route_logger.removeFilter(dump)
+            shutdown_logging()  # drain the queue before the next configuration
+
+        latencies.sort()
+        results.append((
+            name,
+            len(latencies),
+            statistics.mean(latencies) * 1000,
+            latencies[len(latencies) // 2] * 1000,
+            latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000,
+            len(latencies) / sum(latencies),
+        ))
+
+    print(f"\n/all with {args.documents} documents, level {args.level}, logs -> {args.log_file}")
+    print(f"{'configuration':<28}{'requests':>9}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}")
+    for name, count, mean, p50, p95, rps in results:
+        print(f"{name:<28}{count:>9}{mean:>10.2f}{p50:>10.2f}{p95:>10.2f}{rps:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
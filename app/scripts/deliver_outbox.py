@@ -0,0 +1,64 @@
+"""
+Run the outbox sender outside the API process, or manage dead letters.
+
+Usage:
+    python -m app.scripts.deliver_outbox             # deliver until interrupted
+    python -m app.scripts.deliver_outbox --once      # one pass, then exit
+    python -m app.scripts.deliver_outbox --requeue-dead [--target-url URL]
+    python -m app.scripts.deliver_outbox --stats
+
+Set DELIVERY_ENABLED=false on the API workers when running the sender here.
+"""
+import argparse
+import asyncio
+import json
+import logging
+
+from app.db.database import get_engine
+from app.db.models.outbox_message import OutboxMessage
+from app.services.container import services
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def run(once: bool):
+    delivery = services.delivery
+    try:
+        if once:
+            total = 0
+            while claimed := await delivery.deliver_due():
+                total += claimed
+            print(f"Processed {total} outbox messages: {json.dumps(delivery.metrics()['counters'])}")
+            return
+        delivery.start()
+        await asyncio.Event().wait()
+    finally:
+        await delivery.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="deliver everything currently due, then exit")
+    parser.add_argument("--requeue-dead", action="store_true", help="move dead-lettered messages back to pending")
+    parser.add_argument("--target-url", help="with --requeue-dead: only messages for this URL")
+    parser.add_argument("--stats", action="store_true", help="print message counts per status")
+    args = parser.parse_args()
+
+    OutboxMessage.__table__.create(bind=get_engine(), checkfirst=True)
+
+    if args.stats:
+        print(json.dumps(services.sql.outbox_counts(), indent=2))
+        return
+    if args.requeue_dead:
+        count = services.sql.requeue_dead_letters(target_url=args.target_url)
+        print(f"Requeued {count} dead messages")
+        return
+
+    try:
+        asyncio.run(run(args.once))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Offline accuracy vs. speed evaluation of the OCR + LLM pipeline.
+
+Runs OCR, field location, classification, extraction and the NetSuite
+transformation over a directory of labeled bills (image + `<stem>.json`
+ground truth, see app/services/evaluation.py) for every config of a sweep,
+and writes report.json, summary.csv and documents.csv.
+
+Usage:
+    python -m app.scripts.evaluate DATASET_DIR [--sweep sweep.json]
+        [--backend ollama|record|replay] [--cassette eval/cassette.jsonl]
+        [--simulate-latency] [--workers 1] [--limit N] [--out DIR]
+
+Backends:
+    ollama   live Ollama at OLLAMA_BASE_URL
+    record   live Ollama, saving every response to the cassette
+    replay   answer from the cassette; no Ollama needed, prompts must match
+
+Example sweep.json:
+    {"configs": [
+        {"name": "baseline"},
+        {"name": "gemma3-1b", "llm_model": "gemma3:1b"},
+        {"name": "downscale-1600", "max_image_side": 1600},
+        {"name": "adaptive-ocr", "ocr_mode": "adaptive"},
+        {"name": "short-prompts", "prompt_dir": "eval/prompts_short"},
+        {"name": "no-netsuite", "skip_netsuite": true},
+        {"name": "no-locator", "settings": {"FIELD_LOCATOR_ENABLED": false}}
+    ]}
+"""
+import argparse
+import datetime
+import logging
+
+from app.services.evaluation import EvaluationRunner, load_dataset, load_sweep, write_reports
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", help="directory of bill images with <stem>.json labels")
+    parser.add_argument("--sweep", help="JSON file with the configs to compare (default: current settings)")
+    parser.add_argument("--backend", choices=("ollama", "record", "replay"), default="ollama")
+    parser.add_argument("--cassette", default="eval/cassette.jsonl", help="recorded responses for record/replay")
+    parser.add_argument("--simulate-latency", action="store_true",
+                        help="replay: sleep for each response's recorded generation time")
+    parser.add_argument("--workers", type=int, default=1, help="documents processed in parallel per config")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--out", default=None, help="report directory (default: eval_reports/<timestamp>)")
+    args = parser.parse_args()
+
+    documents = load_dataset(args.dataset, limit=args.limit)
+    if not documents:
+        parser.error(f"No labeled images found in {args.dataset}")
+    configs = load_sweep(args.sweep)
+
+    runner = EvaluationRunner(
+        backend=args.backend,
+        cassette=args.cassette,
+        simulate_latency=args.simulate_latency,
+        workers=args.workers,
+    )
+    try:
+        reports = [runner.run_config(config, documents) for config in configs]
+    finally:
+        runner.close()
+
+    out_dir = write_reports(
+        args.out or f"eval_reports/{datetime.datetime.now():%Y%m%d-%H%M%S}",
+        reports,
+        metadata={"dataset": args.dataset, "backend": args.backend, "workers": args.workers},
+    )
+
+    print(f"\n{len(documents)} documents, backend {args.backend}, reports in {out_dir}")
+    print("tok/doc and docs/s count completed documents only")
+    print(f"{'config':<20}{'errors':>7}{'type acc':>10}{'field acc':>11}{'ocr p50':>9}{'llm p50':>9}{'tok/doc':>9}{'docs/s':>9}")
+    for report in reports:
+        summary = report["summary"]
+        latency = summary["latency_seconds"]
+        llm_p50 = sum(latency[stage]["p50"] or 0 for stage in ("classify", "extract", "netsuite"))
+
+        def fmt(value, spec):
+            return format(value, spec) if value is not None else "-"
+
+        print(
+            f"{report['config']['name']:<20}{summary['errors']:>7}"
+            f"{fmt(summary['classification_accuracy']['bill_type'], '>10.3f')}"
+            f"{fmt(summary['field_accuracy'], '>11.3f')}"
+            f"{fmt(latency['ocr']['p50'], '>9.2f')}{llm_p50:>9.2f}"
+            f"{fmt(summary['tokens_per_document'], '>9.0f')}{fmt(summary['docs_per_second'], '>9.3f')}"
+        )
+        if summary["errors_by_type"]:
+            print(f"{'':<20}failures: {', '.join(f'{n} {kind}' for kind, n in summary['errors_by_type'].items())}")
+
+
+if __name__ == "__main__":
+    main()
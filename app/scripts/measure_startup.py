@@ -0,0 +1,97 @@
+"""
+Measure import time of app.main and time-to-first-request of a fresh uvicorn
+process. Run it from a checkout of each revision to compare before/after:
+
+    python -m app.scripts.measure_startup --runs 5 --path /health/live
+    git worktree add /tmp/before <old-commit>
+    python -m app.scripts.measure_startup --cwd /tmp/before --path /
+
+Import time is measured in a fresh interpreter per run. Time-to-first-request
+runs from process spawn until `path` first returns any HTTP response.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure_import(cwd: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_first_request(cwd: str, port: int, path: str, timeout: float) -> float:
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1)
+                return time.perf_counter() - started
+            except urllib.error.HTTPError:
+                # Any HTTP status means the app is accepting requests
+                return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                time.sleep(0.02)
+        raise TimeoutError(f"No response from {path} within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "runs": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cwd", default=os.getcwd(), help="repository checkout to measure")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/", help="endpoint polled for the first request")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    report = {"cwd": args.cwd}
+    # A revision that cannot start (e.g. a dependency it needs at startup is
+    # down) is reported as such instead of aborting the comparison
+    try:
+        report["import_app_main"] = summarize([measure_import(args.cwd) for _ in range(args.runs)])
+    except subprocess.CalledProcessError as e:
+        report["import_app_main"] = {"error": e.stderr.strip().splitlines()[-1]}
+    try:
+        report["time_to_first_request"] = summarize([
+            measure_first_request(args.cwd, args.port, args.path, args.timeout)
+            for _ in range(args.runs)
+        ])
+    except (RuntimeError, TimeoutError) as e:
+        report["time_to_first_request"] = {"error": str(e)}
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Add the promoted search columns (vendor_name, invoice_number, transaction_date,
+total_amount, currency) and the processing_versions column to an existing
+`documents` table, the located_fields column to `document_texts`, and
+backfill the search columns.
+
+DDL uses MySQL online DDL (ALGORITHM=INPLACE, LOCK=NONE) so reads and writes
+continue while columns and indexes are built. The backfill walks the primary
+key in small batches, committing after each one, so no long-lived row locks
+are held.
+
+Usage:
+    python -m app.scripts.migrate_search_columns [--batch-size 500] [--sleep 0.05]
+"""
+import argparse
+import logging
+import time
+
+from sqlalchemy import inspect, text
+
+from app.db.database import get_engine, SessionLocal
+from app.db.models.document import Document
+from app.db.models.document_text import DocumentText
+from app.services.extracted_fields import get_search_fields
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    "vendor_name": "VARCHAR(255) NULL",
+    "invoice_number": "VARCHAR(100) NULL",
+    "transaction_date": "DATE NULL",
+    "total_amount": "DECIMAL(14, 2) NULL",
+    "currency": "VARCHAR(10) NULL",
+    "processing_versions": "JSON NULL",
+}
+UNINDEXED = {"processing_versions"}
+
+# Unindexed columns added to document_texts
+TEXT_COLUMNS = {
+    "located_fields": "JSON NULL",
+}
+
+
+def add_columns():
+    engine = get_engine()
+    inspector = inspect(engine)
+    existing_columns = {c["name"] for c in inspector.get_columns(Document.__tablename__)}
+    existing_indexes = {i["name"] for i in inspector.get_indexes(Document.__tablename__)}
+    existing_text_columns = (
+        {c["name"] for c in inspector.get_columns(DocumentText.__tablename__)}
+        if inspector.has_table(DocumentText.__tablename__) else set(TEXT_COLUMNS)
+    )
+
+    with engine.begin() as conn:
+        for name, ddl in COLUMNS.items():
+            if name not in existing_columns:
+                logger.info(f"Adding column documents.{name}")
+                conn.execute(text(
+                    f"ALTER TABLE documents ADD COLUMN {name} {ddl}, ALGORITHM=INPLACE, LOCK=NONE"
+                ))
+
+            index_name = f"ix_documents_{name}"
+            if name not in UNINDEXED and index_name not in existing_indexes:
+                logger.info(f"Creating index {index_name}")
+                conn.execute(text(
+                    f"CREATE INDEX {index_name} ON documents ({name}) ALGORITHM=INPLACE LOCK=NONE"
+                ))
+
+        for name, ddl in TEXT_COLUMNS.items():
+            if name not in existing_text_columns:
+                logger.info(f"Adding column document_texts.{name}")
+                conn.execute(text(
+                    f"ALTER TABLE document_texts ADD COLUMN {name} {ddl}, ALGORITHM=INPLACE, LOCK=NONE"
+                ))
+
+
+def backfill(batch_size: int, sleep: float) -> int:
+    last_id = ""
+    updated = 0
+
+    while True:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(Document.document_id, Document.extracted_data, Document.netsuite_data)
+                .filter(Document.document_id > last_id)
+                .order_by(Document.document_id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            db.bulk_update_mappings(
+                Document,
+                [
+                    {"document_id": row.document_id, **get_search_fields(row.extracted_data, row.netsuite_data)}
+                    for row in rows
+                ],
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception(f"Backfill failed after document_id {last_id!r}")
+            raise
+        finally:
+            db.close()
+
+        last_id = rows[-1].document_id
+        updated += len(rows)
+        logger.info(f"Backfilled {updated} documents (last id {last_id})")
+        time.sleep(sleep)
+
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--sleep", type=float, default=0.05, help="pause between batches, in seconds")
+    parser.add_argument("--skip-ddl", action="store_true", help="only run the backfill")
+    args = parser.parse_args()
+
+    if not args.skip_ddl:
+        add_columns()
+    updated = backfill(args.batch_size, args.sleep)
+    print(f"Backfilled search columns for {updated} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Backfill / rebuild the analytics summary table from existing documents.
+
+Usage:
+    python -m app.scripts.rebuild_summaries [--batch-size 1000]
+"""
+import argparse
+import logging
+
+from app.db.database import get_engine
+from app.db.models.document_summary import DocumentSummary
+from app.services.container import services
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    DocumentSummary.__table__.create(bind=get_engine(), checkfirst=True)
+    scanned = services.sql.rebuild_summaries(batch_size=args.batch_size)
+    print(f"Rebuilt analytics summaries from {scanned} documents")
+
+
+if __name__ == "__main__":
+    main()
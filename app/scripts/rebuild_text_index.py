@@ -0,0 +1,29 @@
+"""
+Rebuild the local OCR full-text index from the compressed text stored in MySQL.
+
+The new index is built next to the live one and swapped in when complete,
+so /search/text keeps answering from the old index during the rebuild.
+
+Usage:
+    python -m app.scripts.rebuild_text_index [--batch-size 500]
+"""
+import argparse
+import logging
+
+from app.services.container import services
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    texts = services.sql.iter_ocr_texts(batch_size=args.batch_size)
+    indexed = services.search_index.rebuild(texts, batch_size=args.batch_size)
+    print(f"Rebuilt OCR text index with {indexed} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Re-run the LLM stages of stored documents whose prompt (app/prompts/* or the
+template around it in llm_service) or LLM_MODEL changed since they were
+processed. Cached OCR text and located fields are reused.
+
+Usage:
+    python -m app.scripts.reprocess_documents [--concurrency 2] [--limit N]
+        [--dry-run] [--checkpoint .reprocess.json] [--stamp-unversioned]
+"""
+import argparse
+import json
+import logging
+
+from app.services.container import services
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=2, help="documents processed in parallel")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many stale documents")
+    parser.add_argument("--dry-run", action="store_true", help="only count stale documents")
+    parser.add_argument("--checkpoint", default=".reprocess_checkpoint.json",
+                        help="progress file used to resume an interrupted run ('' to disable)")
+    parser.add_argument("--stamp-unversioned", action="store_true",
+                        help="mark documents without recorded versions as current and exit")
+    args = parser.parse_args()
+
+    reprocess_service = services.reprocess
+
+    if args.stamp_unversioned:
+        print(f"Stamped {reprocess_service.stamp_unversioned()} unversioned documents")
+        return
+
+    stats = reprocess_service.run(
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        limit=args.limit,
+        dry_run=args.dry_run,
+        checkpoint_path=args.checkpoint or None,
+    )
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import logging
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from app.config import settings
+from app.services.resilience import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request must be turned away; carries the HTTP answer."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int | None = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`; each request takes one."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Decides whether the ingest pipeline can take another document.
+
+    Three limits, checked in this order before the upload body is read:
+      - in-flight pipeline slots: uploads between arrival and response,
+        i.e. running OCR and classification (503 when all taken)
+      - background queue depth: documents waiting for or running extraction
+        on the background pool (503 when full)
+      - a per-client token bucket (429 when empty)
+
+    Capacity comes first so that a 503 does not spend the client's token.
+
+    Starlette runs background tasks inside the same ASGI call, after the
+    response is sent, so AdmissionMiddleware can move a request from
+    "in flight" to "background" when its response starts and release it
+    when the call returns.
+
+    Rejections carry a Retry-After estimated from recent pipeline latency.
+    """
+
+    def __init__(self):
+        self.rate = settings.RATE_LIMIT_PER_MINUTE / 60
+        self.burst = settings.RATE_LIMIT_BURST
+        self.max_in_flight = settings.MAX_IN_FLIGHT_UPLOADS
+        self.max_background = settings.MAX_BACKGROUND_QUEUE
+
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.background_depth = 0
+        self.rejections: Counter = Counter()
+        self.upload_latency = LatencyTracker()
+        self.background_latency = LatencyTracker()
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+    def admit(self, client: str):
+        """Takes an in-flight slot for `client` or raises AdmissionRejected."""
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejections["no_slot"] += 1
+                raise AdmissionRejected(
+                    503, "Too many documents in progress", retry_after=self._estimate(self.upload_latency),
+                )
+
+            if self.background_depth >= self.max_background:
+                self.rejections["queue_full"] += 1
+                raise AdmissionRejected(
+                    503, "Processing queue is full", retry_after=self._estimate(self.background_latency),
+                )
+
+            if self.rate > 0:
+                wait = self._bucket(client).take()
+                if wait:
+                    self.rejections["rate_limited"] += 1
+                    raise AdmissionRejected(429, "Rate limit exceeded", retry_after=math.ceil(wait))
+
+            self.in_flight += 1
+
+    def response_started(self, elapsed: float):
+        """The upload answered: its slot is freed and its background work begins."""
+        with self._lock:
+            self.in_flight -= 1
+            self.background_depth += 1
+        self.upload_latency.record(elapsed)
+
+    def finished(self, in_background: bool, elapsed: float | None = None):
+        """
+        The request is fully done, including background tasks. Also called for
+        requests that failed before answering, so counts can never leak.
+        """
+        with self._lock:
+            if in_background:
+                self.background_depth -= 1
+            else:
+                self.in_flight -= 1
+        if elapsed is not None:
+            self.background_latency.record(elapsed)
+
+    def reject_oversized(self):
+        self.rejections["too_large"] += 1
+        return AdmissionRejected(413, f"Upload exceeds {settings.MAX_UPLOAD_BYTES} bytes")
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self._buckets[client] = bucket
+            # Forget the least recently seen clients; a fresh bucket starts full anyway
+            while len(self._buckets) > settings.RATE_LIMIT_MAX_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    @staticmethod
+    def _estimate(tracker: LatencyTracker) -> int:
+        """Seconds until a slot likely frees up: the median latency of the limited stage."""
+        median = tracker.percentile(0.5)
+        if median is None:
+            return settings.ADMISSION_RETRY_AFTER
+        return max(1, min(math.ceil(median), settings.ADMISSION_MAX_RETRY_AFTER))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "background_queue_depth": self.background_depth,
+                "max_background_queue": self.max_background,
+                "background_workers": settings.MAX_BACKGROUND_WORKERS,
+                "tracked_clients": len(self._buckets),
+                "rejections": dict(self.rejections),
+                "upload_p50_seconds": self.upload_latency.percentile(0.5),
+                "background_p50_seconds": self.background_latency.percentile(0.5),
+            }
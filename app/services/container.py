@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Builds the application's services on first access and caches them.
+
+    Nothing here does I/O at import time: clients are constructed lazily and
+    `startup()` (called from the FastAPI lifespan) connects them concurrently.
+    Service modules are imported inside the factories so that importing the
+    routes does not pull in Tesseract, the MySQL driver or the MinIO SDK.
+    """
+
+    def __init__(self):
+        self._instances: dict[str, object] = {}
+        self._lock = threading.RLock()
+        self.status: dict[str, dict] = {}
+        # Checks run on their own threads, never on the default executor that
+        # request handlers use, and at most one per dependency at a time: a
+        # hung probe cannot be cancelled, so it must not pile up threads.
+        self._check_pool: ThreadPoolExecutor | None = None
+        self._running_checks: dict[str, Future] = {}
+
+    def _get(self, name: str, factory):
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = factory()
+                    self._instances[name] = instance
+        return instance
+
+    # ------------------------------------------------------------------
+    # Services
+    # ------------------------------------------------------------------
+    @property
+    def object_store(self):
+        from app.services.object_store import create_object_store
+        return self._get("object_store", create_object_store)
+
+    @property
+    def ocr(self):
+        from app.services.ocr_service import OCRService
+        return self._get("ocr", OCRService)
+
+    @property
+    def field_locator(self):
+        from app.services.field_locator import FieldLocator
+        return self._get("field_locator", FieldLocator)
+
+    @property
+    def llm(self):
+        from app.services.llm_service import LLMService
+        return self._get("llm", LLMService)
+
+    @property
+    def sql(self):
+        from app.services.sql_service import SQLService
+        return self._get("sql", SQLService)
+
+    @property
+    def search_index(self):
+        from app.services.search_index_service import SearchIndexService
+        return self._get("search_index", SearchIndexService)
+
+    @property
+    def admission(self):
+        from app.services.admission import AdmissionController
+        return self._get("admission", AdmissionController)
+
+    @property
+    def background_pool(self) -> ThreadPoolExecutor:
+        """
+        Runs post-response pipeline work (extraction, NetSuite, persistence).
+        Kept apart from the default threadpool so MAX_BACKGROUND_WORKERS, not
+        the queue depth, bounds how many documents hit Ollama at once.
+        """
+        return self._get("background_pool", lambda: ThreadPoolExecutor(
+            max_workers=settings.MAX_BACKGROUND_WORKERS,
+            thread_name_prefix="background",
+        ))
+
+    @property
+    def delivery(self):
+        from app.services.delivery_service import DeliveryService
+        return self._get("delivery", lambda: DeliveryService(sql=self.sql))
+
+    @property
+    def reprocess(self):
+        from app.services.reprocess_service import ReprocessService
+        return self._get("reprocess", lambda: ReprocessService(
+            llm=self.llm,
+            sql=self.sql,
+            ocr=self.ocr,
+            field_locator=self.field_locator,
+            object_store=self.object_store,
+            search_index=self.search_index,
+        ))
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def _checks(self) -> dict:
+        def database():
+            self.sql.ping()
+            if settings.DB_CREATE_TABLES:
+                self.sql.create_tables()
+
+        return {
+            "database": database,
+            "object_store": lambda: self.object_store.ping(),
+            "llm": lambda: self.llm.ping(),
+            "ocr": lambda: self.ocr.ping(),
+            "search_index": lambda: self.search_index.ping(),
+        }
+
+    def _submit_check(self, name: str, check) -> Future:
+        with self._lock:
+            if self._check_pool is None:
+                self._check_pool = ThreadPoolExecutor(
+                    max_workers=len(self._checks()),
+                    thread_name_prefix="health-check",
+                )
+            running = self._running_checks.get(name)
+            if running is not None and not running.done():
+                raise RuntimeError("previous check is still running")
+            future = self._check_pool.submit(check)
+            self._running_checks[name] = future
+            return future
+
+    async def _run_check(self, name: str, check) -> dict:
+        started = time.perf_counter()
+        try:
+            future = self._submit_check(name, check)
+            await asyncio.wait_for(asyncio.wrap_future(future), timeout=settings.STARTUP_CHECK_TIMEOUT)
+            result = {"ready": True}
+        except asyncio.TimeoutError:
+            result = {"ready": False, "error": f"timed out after {settings.STARTUP_CHECK_TIMEOUT}s"}
+        except Exception as e:
+            result = {"ready": False, "error": str(e) or type(e).__name__}
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.status[name] = result
+        return result
+
+    async def startup(self):
+        """
+        Connects every dependency concurrently. Failures are recorded (and
+        surfaced by /health/ready) rather than preventing the app from starting.
+        """
+        checks = self._checks()
+        results = await asyncio.gather(*(self._run_check(name, check) for name, check in checks.items()))
+        for name, result in zip(checks, results):
+            if result["ready"]:
+                logger.info(f"{name} ready in {result['elapsed_ms']} ms")
+            else:
+                logger.warning(f"{name} not ready: {result['error']}")
+
+        # The sender keeps polling, so it picks up once MySQL becomes reachable
+        if settings.DELIVERY_ENABLED:
+            self.delivery.start()
+
+    async def readiness(self) -> dict:
+        """Re-runs the dependency checks, except table creation."""
+        checks = self._checks()
+        checks["database"] = lambda: self.sql.ping()
+        results = await asyncio.gather(*(self._run_check(name, check) for name, check in checks.items()))
+        return dict(zip(checks, results))
+
+    async def shutdown(self):
+        from app.db.database import dispose_engine
+
+        delivery = self._instances.get("delivery")
+        if delivery is not None:
+            await delivery.stop()
+        for name in ("llm", "search_index"):
+            instance = self._instances.get(name)
+            if instance is not None:
+                instance.close()
+        background_pool = self._instances.get("background_pool")
+        if background_pool is not None:
+            background_pool.shutdown(wait=False, cancel_futures=True)
+        if self._check_pool is not None:
+            self._check_pool.shutdown(wait=False, cancel_futures=True)
+            self._check_pool = None
+        dispose_engine()
+
+
+services = ServiceContainer()
+
+
+# ----------------------------------------------------------------------
+# FastAPI dependency providers
+# ----------------------------------------------------------------------
+def get_object_store():
+    return services.object_store
+
+
+def get_ocr_service():
+    return services.ocr
+
+
+def get_field_locator():
+    return services.field_locator
+
+
+def get_llm_service():
+    return services.llm
+
+
+def get_sql_service():
+    return services.sql
+
+
+def get_search_index_service():
+    return services.search_index
+
+
+def get_delivery_service():
+    return services.delivery
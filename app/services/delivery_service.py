@@ -0,0 +1,228 @@
+import asyncio
+import datetime
+import logging
+from collections import Counter
+import httpx
+from app.config import settings
+from app.services.resilience import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Client errors worth retrying; any other 4xx dead-letters the batch immediately
+RETRYABLE_CLIENT_STATUSES = {408, 425, 429}
+
+
+def batch_size(url: str) -> int:
+    """Payloads per POST for `url`; only targets listed in DELIVERY_BATCH_SIZES are batched."""
+    return max(settings.DELIVERY_BATCH_SIZES.get(url, 1), 1)
+
+
+def batch_body(url: str, payloads: list[dict]):
+    """
+    Request body for `payloads`. Targets that opted into batching always get
+    the {"items": [...]} envelope, even for a single payload, so they see one
+    shape; every other target gets exactly one bare payload per request.
+    """
+    if url in settings.DELIVERY_BATCH_SIZES:
+        return {"items": payloads}
+    if len(payloads) != 1:
+        raise ValueError(f"{url} does not accept batches")
+    return payloads[0]
+
+
+def _retry_after_seconds(response: httpx.Response) -> float:
+    value = response.headers.get("Retry-After", "")
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return 0.0
+
+
+class DeliveryService:
+    """
+    Async sender for the outbox table.
+
+    Claims due messages, groups them by target URL (into batches for the
+    targets in DELIVERY_BATCH_SIZES) and POSTs them over a pooled (HTTP/2
+    where the receiver supports it) client. Failures are rescheduled with
+    jittered exponential backoff; messages that exhaust
+    DELIVERY_MAX_ATTEMPTS, or that the receiver rejects with a
+    non-retryable 4xx, are marked "dead" and stay in the table for
+    inspection and requeueing. A rejected batch is re-sent one message at a
+    time first, so only the offending payload is dead-lettered.
+
+    Delivery is at-least-once: a message can be re-sent if the sender dies
+    between the POST and recording the result, so receivers should
+    de-duplicate on document_id.
+    """
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.client: httpx.AsyncClient | None = None
+        self.counters: Counter = Counter()
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=settings.DELIVERY_HTTP2,
+            timeout=settings.DELIVERY_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.DELIVERY_POOL_SIZE,
+                max_keepalive_connections=settings.DELIVERY_POOL_SIZE,
+            ),
+        )
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        """Starts the background sender on the running event loop."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        if self.client is None:
+            self.client = self._build_client()
+        self._task = asyncio.create_task(self._run(), name="outbox-delivery")
+        logger.info("Outbox delivery started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def notify(self):
+        """
+        Wakes the sender so new messages go out without waiting for the next
+        poll. Safe to call from worker threads (e.g. background tasks).
+        """
+        if self._loop is None or self._wakeup is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # Event loop already closed during shutdown
+            pass
+
+    def metrics(self) -> dict:
+        return {"running": self._task is not None, "counters": dict(self.counters)}
+
+    async def _run(self):
+        failures = 0
+        while True:
+            self._wakeup.clear()
+            try:
+                claimed = await self.deliver_due()
+                failures = 0
+            except Exception as e:
+                # Usually MySQL being unavailable; back off instead of logging every poll
+                failures += 1
+                logger.warning(f"Outbox delivery pass failed ({failures} in a row): {e}")
+                await asyncio.sleep(min(settings.DELIVERY_POLL_INTERVAL * 2 ** failures, settings.DELIVERY_RETRY_MAX_DELAY))
+                continue
+            if claimed:
+                continue  # keep draining a backlog before sleeping
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.DELIVERY_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Delivery
+    # ------------------------------------------------------------------
+    async def deliver_due(self) -> int:
+        """
+        One delivery pass: claims due messages and sends them in per-target
+        batches concurrently. Returns the number of messages claimed.
+        """
+        if self.client is None:
+            self.client = self._build_client()
+
+        concurrency = max(settings.DELIVERY_MAX_CONCURRENCY, 1)
+        messages = await asyncio.to_thread(
+            self.sql.claim_outbox_batch,
+            max(settings.DELIVERY_BATCH_SIZES.values(), default=1) * concurrency,
+            settings.DELIVERY_LEASE_SECONDS,
+        )
+        if not messages:
+            return 0
+
+        by_target: dict[str, list[dict]] = {}
+        for message in messages:
+            by_target.setdefault(message["target_url"], []).append(message)
+        batches = [
+            (url, group[start:start + batch_size(url)])
+            for url, group in by_target.items()
+            for start in range(0, len(group), batch_size(url))
+        ]
+
+        slots = asyncio.Semaphore(concurrency)
+
+        async def send(url: str, batch: list[dict]):
+            async with slots:
+                await self._send_batch(url, batch)
+
+        await asyncio.gather(*(send(url, batch) for url, batch in batches))
+        return len(messages)
+
+    async def _send_batch(self, url: str, batch: list[dict]):
+        ids = [message["id"] for message in batch]
+        self.counters["requests"] += 1
+        try:
+            response = await self.client.post(url, json=batch_body(url, [m["payload"] for m in batch]))
+        except httpx.HTTPError as e:
+            await self._failed(url, batch, f"{type(e).__name__}: {e}", retryable=True)
+            return
+
+        if response.is_success:
+            await asyncio.to_thread(self.sql.mark_outbox_delivered, ids)
+            self.counters["delivered"] += len(batch)
+            logger.info(f"Delivered {len(batch)} message(s) to {url} over {response.http_version}")
+            return
+
+        status = response.status_code
+        retryable = status >= 500 or status in RETRYABLE_CLIENT_STATUSES
+        if not retryable and len(batch) > 1:
+            # One bad payload must not take the rest of the batch with it
+            self.counters["split"] += 1
+            logger.warning(f"{url} rejected a batch of {len(batch)} with HTTP {status}; re-sending one at a time")
+            for message in batch:
+                await self._send_batch(url, [message])
+            return
+
+        await self._failed(
+            url,
+            batch,
+            f"HTTP {status}: {response.text[:500]}",
+            retryable=retryable,
+            retry_after=_retry_after_seconds(response),
+        )
+
+    async def _failed(self, url: str, batch: list[dict], error: str, retryable: bool, retry_after: float = 0.0):
+        dead = [m["id"] for m in batch if not retryable or m["attempts"] >= settings.DELIVERY_MAX_ATTEMPTS]
+        retry = [m for m in batch if m["id"] not in dead]
+
+        if dead:
+            await asyncio.to_thread(self.sql.mark_outbox_dead, dead, error)
+            self.counters["dead"] += len(dead)
+            logger.error(f"Dead-lettered {len(dead)} message(s) for {url}: {error}")
+
+        if retry:
+            attempts = max(m["attempts"] for m in retry)
+            delay = max(
+                backoff_delay(attempts - 1, settings.DELIVERY_RETRY_BASE_DELAY, settings.DELIVERY_RETRY_MAX_DELAY),
+                retry_after,
+            )
+            retry_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=delay)
+            await asyncio.to_thread(self.sql.mark_outbox_retry, [m["id"] for m in retry], error, retry_at)
+            self.counters["retried"] += len(retry)
+            logger.warning(f"Delivery of {len(retry)} message(s) to {url} failed, retrying in {delay:.1f}s: {error}")
@@ -0,0 +1,571 @@
+import csv
+import datetime
+import hashlib
+import io
+import json
+import logging
+import re
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+import httpx
+from PIL import Image
+from app.config import settings
+from app.services.field_locator import FieldLocator, parse_date
+from app.services.llm_service import LLMService
+from app.services.ocr_service import OCRService
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp"}
+STAGES = ("preprocess", "ocr", "locate", "classify", "extract", "netsuite")
+LLM_STAGES = ("classify", "extract", "netsuite")
+
+# LLMService attribute -> prompt file, for configs that swap in shorter prompts
+PROMPT_ATTRIBUTES = {
+    "classifier_prompt": "classifier/classifier_prompt.txt",
+    "expense_extraction_prompt": "extractors/expense_extraction_prompt.txt",
+    "invoice_extraction_prompt": "extractors/invoice_extraction_prompt.txt",
+    "expense_netsuite_prompt": "netsuite/expense_netsuite_prompt.txt",
+    "invoice_netsuite_prompt": "netsuite/invoice_netsuite_prompt.txt",
+}
+
+AMOUNT_TOLERANCE = Decimal("0.01")
+
+
+# ----------------------------------------------------------------------
+# Dataset and sweep
+# ----------------------------------------------------------------------
+class LabeledDocument:
+    """
+    A bill image with its ground truth, read from a sidecar `<image stem>.json`:
+
+        {
+          "bill_type": "Invoice Bill",
+          "bill_subtype": "Utilities",
+          "fields": {"invoice_number": "INV-001", "vendor.name": "ACME",
+                     "invoice_date": "2024-05-01", "total_amount": 268.44},
+          "netsuite_fields": {"tranId": "INV-001"}
+        }
+
+    Field names are dotted paths into the extracted (or NetSuite) JSON.
+    NetSuite fields are not scored for configs that skip the NetSuite call.
+    """
+
+    __slots__ = ("name", "image_path", "labels")
+
+    def __init__(self, name: str, image_path: Path, labels: dict):
+        self.name = name
+        self.image_path = image_path
+        self.labels = labels
+
+
+def load_dataset(directory: str | Path, limit: int | None = None) -> list[LabeledDocument]:
+    directory = Path(directory)
+    documents = []
+    for image_path in sorted(directory.iterdir()):
+        if image_path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        label_path = image_path.with_suffix(".json")
+        if not label_path.exists():
+            logger.warning(f"Skipping {image_path.name}: no {label_path.name}")
+            continue
+        documents.append(LabeledDocument(image_path.stem, image_path, json.loads(label_path.read_text())))
+        if limit and len(documents) >= limit:
+            break
+    return documents
+
+
+class EvalConfig:
+    """
+    One point of a sweep. Every knob defaults to the service's current behaviour:
+
+        name            label used in the reports
+        llm_model       Ollama model (default LLM_MODEL)
+        ocr_mode        "standard" or "adaptive" (default OCR_MODE)
+        max_image_side  downscale images so the longer side is at most this many pixels
+        skip_netsuite   skip the NetSuite transformation call
+        prompt_dir      directory laid out like app/prompts/ whose files replace the defaults
+        settings        other Settings overrides, e.g. {"FIELD_LOCATOR_ENABLED": false}
+    """
+
+    FIELDS = ("name", "llm_model", "ocr_mode", "max_image_side", "skip_netsuite", "prompt_dir", "settings")
+
+    def __init__(
+        self,
+        name: str,
+        llm_model: str | None = None,
+        ocr_mode: str | None = None,
+        max_image_side: int | None = None,
+        skip_netsuite: bool = False,
+        prompt_dir: str | None = None,
+        settings: dict | None = None,
+    ):
+        self.name = name
+        self.llm_model = llm_model
+        self.ocr_mode = ocr_mode
+        self.max_image_side = max_image_side
+        self.skip_netsuite = skip_netsuite
+        self.prompt_dir = prompt_dir
+        self.settings = settings or {}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EvalConfig":
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown config keys: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+def load_sweep(path: str | Path | None) -> list[EvalConfig]:
+    """Reads `{"configs": [{...}, ...]}`; without a file, evaluates the current settings."""
+    if path is None:
+        return [EvalConfig("baseline")]
+    data = json.loads(Path(path).read_text())
+    configs = [EvalConfig.from_dict(entry) for entry in data["configs"]]
+    names = [config.name for config in configs]
+    if len(set(names)) != len(names):
+        raise ValueError("Config names must be unique")
+    return configs
+
+
+@contextmanager
+def override_settings(overrides: dict):
+    for key in overrides:
+        if not hasattr(settings, key):
+            raise ValueError(f"Unknown setting: {key}")
+    previous = {key: getattr(settings, key) for key in overrides}
+    try:
+        for key, value in overrides.items():
+            setattr(settings, key, value)
+        yield
+    finally:
+        for key, value in previous.items():
+            setattr(settings, key, value)
+
+
+# ----------------------------------------------------------------------
+# Recorded-response backend
+# ----------------------------------------------------------------------
+def request_key(body: dict) -> str:
+    """Identifies a generation by everything that affects its output."""
+    material = {key: body.get(key) for key in ("model", "prompt", "format", "options", "system")}
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """
+    httpx transport that records Ollama /api/generate responses to a JSONL
+    cassette ("record") or answers from it without a running Ollama
+    ("replay"). Replay misses return 404, which fails that document.
+    """
+
+    def __init__(self, path: str | Path, mode: str, simulate_latency: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.entries: dict[str, dict] = {}
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._inner = httpx.HTTPTransport() if mode == "record" else None
+
+        if self.path.exists():
+            with self.path.open() as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+        elif mode == "replay":
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path != "/api/generate":
+            if self._inner is not None:
+                return self._inner.handle_request(request)
+            return httpx.Response(200, json={"models": []})
+
+        key = request_key(json.loads(request.content))
+        if self.mode == "replay":
+            entry = self.entries.get(key)
+            if entry is None:
+                with self._lock:
+                    self.misses += 1
+                return httpx.Response(404, json={"error": "no recorded response for this request"})
+            if self.simulate_latency:
+                time.sleep(entry["elapsed"])
+            return httpx.Response(entry["status"], json=entry["response"])
+
+        started = time.perf_counter()
+        response = self._inner.handle_request(request)
+        response.read()
+        elapsed = time.perf_counter() - started
+        if response.status_code == 200:
+            body = json.loads(response.content)
+            entry = {
+                "key": key,
+                "model": body.get("model"),
+                "status": 200,
+                "elapsed": round(elapsed, 4),
+                "response": body,
+            }
+            with self._lock:
+                self.entries[key] = entry
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a") as f:
+                    f.write(json.dumps(entry) + "\n")
+        # .content is already decoded, so don't pass on Content-Encoding/Length
+        return httpx.Response(response.status_code, content=response.content, headers={
+            "Content-Type": response.headers.get("Content-Type", "application/json"),
+        })
+
+    def close(self):
+        # Shared by the clients of every config in a sweep; see release()
+        pass
+
+    def release(self):
+        if self._inner is not None:
+            self._inner.close()
+
+
+# ----------------------------------------------------------------------
+# Scoring
+# ----------------------------------------------------------------------
+def get_path(data, path: str):
+    for part in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def _as_decimal(value) -> Decimal | None:
+    if value is None or isinstance(value, bool) or isinstance(value, (dict, list)):
+        return None
+    text = re.sub(r"[^\d.\-]", "", str(value).replace(",", ""))
+    try:
+        return Decimal(text) if text else None
+    except InvalidOperation:
+        return None
+
+
+def _as_date(value) -> str | None:
+    if not isinstance(value, str):
+        return None
+    parsed = parse_date(value.strip().split())
+    return parsed[0] if parsed else None
+
+
+def _as_text(value) -> str:
+    return re.sub(r"[\s.,:;#]+", " ", str(value)).strip().casefold()
+
+
+def values_match(expected, actual) -> bool:
+    """
+    Numbers match within a cent, dates by calendar day whatever the format,
+    everything else case-, whitespace- and punctuation-insensitively.
+    """
+    if actual is None:
+        return expected is None
+    if isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        actual_amount = _as_decimal(actual)
+        return actual_amount is not None and abs(actual_amount - Decimal(str(expected))) <= AMOUNT_TOLERANCE
+    expected_date = _as_date(expected)
+    if expected_date is not None:
+        return _as_date(actual) == expected_date
+    return _as_text(expected) == _as_text(actual)
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"mean": None, "p50": None, "p95": None}
+    ordered = sorted(values)
+    return {
+        "mean": round(statistics.mean(ordered), 4),
+        "p50": round(ordered[len(ordered) // 2], 4),
+        "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 4),
+    }
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+def downscale(image_bytes: bytes, max_side: int) -> bytes:
+    image = Image.open(io.BytesIO(image_bytes))
+    if max(image.size) <= max_side:
+        return image_bytes
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
+
+
+class EvaluationRunner:
+    """
+    Runs the /upload + background pipeline (OCR, field location,
+    classification, extraction, NetSuite transformation) over a labeled
+    dataset for each config of a sweep, timing every stage.
+
+    backend: "ollama" (live), "record" (live, saving responses to the
+    cassette) or "replay" (answers from the cassette, no Ollama needed).
+    """
+
+    def __init__(
+        self,
+        backend: str = "ollama",
+        cassette: str | Path | None = None,
+        simulate_latency: bool = False,
+        workers: int = 1,
+    ):
+        if backend not in ("ollama", "record", "replay"):
+            raise ValueError(f"Unknown backend: {backend}")
+        if backend != "ollama" and cassette is None:
+            raise ValueError(f"The {backend} backend needs a cassette path")
+        self.backend = backend
+        self.transport = CassetteTransport(cassette, backend, simulate_latency) if backend != "ollama" else None
+        self.workers = workers
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.release()
+
+    def _build_llm(self, config: EvalConfig) -> LLMService:
+        llm = LLMService()
+        if config.llm_model:
+            llm.model = config.llm_model
+        if self.transport is not None:
+            llm.client.close()
+            llm.client = httpx.Client(base_url=llm.base_url, timeout=llm.client.timeout, transport=self.transport)
+        if config.prompt_dir:
+            for attribute, relative_path in PROMPT_ATTRIBUTES.items():
+                path = Path(config.prompt_dir) / relative_path
+                if path.exists():
+                    setattr(llm, attribute, path.read_text())
+        return llm
+
+    def run_config(self, config: EvalConfig, documents: list[LabeledDocument]) -> dict:
+        with override_settings(config.settings):
+            ocr = OCRService(mode=config.ocr_mode)
+            locator = FieldLocator()
+            llm = self._build_llm(config)
+            try:
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    results = list(pool.map(lambda doc: self._process(doc, config, ocr, locator, llm), documents))
+                wall = time.perf_counter() - started
+                counters = dict(llm.counters)
+            finally:
+                llm.close()
+
+        summary = self._summarize(config, results, wall, counters)
+        logger.info(
+            f"{config.name}: field accuracy {summary['field_accuracy']}, "
+            f"{summary['docs_per_second']} docs/s, {summary['errors']} errors"
+        )
+        return {"config": config.to_dict(), "summary": summary, "documents": results}
+
+    def _process(self, doc: LabeledDocument, config: EvalConfig, ocr, locator, llm) -> dict:
+        latency = {}
+        labels = doc.labels
+        result = {
+            "document": doc.name,
+            "error": None,
+            "latency": latency,
+            "fields_labeled": len(labels.get("fields", {}))
+            + (0 if config.skip_netsuite else len(labels.get("netsuite_fields", {}))),
+        }
+
+        @contextmanager
+        def stage(name):
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                latency[name] = round(time.perf_counter() - started, 4)
+
+        try:
+            with stage("preprocess"):
+                contents = doc.image_path.read_bytes()
+                if config.max_image_side:
+                    contents = downscale(contents, config.max_image_side)
+
+            with stage("ocr"):
+                ocr_result = ocr.extract(contents)
+                ocr_text = ocr_result.text
+            result["ocr_words"] = len(ocr_result)
+
+            located_fields = None
+            if settings.FIELD_LOCATOR_ENABLED:
+                with stage("locate"):
+                    located_fields = {name: field.to_dict() for name, field in locator.locate(ocr_result).items()}
+
+            with stage("classify"):
+                classification = llm.classify_document(ocr_text)
+            bill_type = classification.get("bill_type", "Unknown")
+            bill_subtype = classification.get("bill_subtype", "Unknown")
+
+            with stage("extract"):
+                structured_data = llm.extract_structured_data(
+                    ocr_text=ocr_text,
+                    document_type=bill_type,
+                    located_fields=located_fields,
+                )
+
+            netsuite_payload = None
+            if not config.skip_netsuite:
+                with stage("netsuite"):
+                    netsuite_payload = llm.transform_for_netsuite(structured_data=structured_data, document_type=bill_type)
+        except Exception as e:
+            logger.warning(f"{config.name}: {doc.name} failed: {e}")
+            result["error"] = f"{type(e).__name__}: {e}"
+            return result
+
+        result["classification"] = {
+            key: {"expected": labels[key], "actual": predicted, "correct": _as_text(labels[key]) == _as_text(predicted)}
+            for key, predicted in (("bill_type", bill_type), ("bill_subtype", bill_subtype))
+            if key in labels
+        }
+        fields = {}
+        for path, expected in labels.get("fields", {}).items():
+            actual = get_path(structured_data, path)
+            fields[path] = {"expected": expected, "actual": actual, "correct": values_match(expected, actual)}
+        if netsuite_payload is not None:
+            for path, expected in labels.get("netsuite_fields", {}).items():
+                actual = get_path(netsuite_payload, path)
+                fields[f"netsuite.{path}"] = {"expected": expected, "actual": actual, "correct": values_match(expected, actual)}
+        result["fields"] = fields
+        return result
+
+    @staticmethod
+    def _summarize(config: EvalConfig, results: list[dict], wall: float, counters: dict) -> dict:
+        """
+        Throughput and token cost are per completed document: tokens spent on
+        documents that failed part-way are charged to the ones that made it,
+        and failures are reported on their own rather than counted as output.
+        """
+        completed = [r for r in results if r["error"] is None]
+        failed = [r for r in results if r["error"] is not None]
+
+        def accuracy(correct: int, total: int):
+            return round(correct / total, 4) if total else None
+
+        classification = {}
+        for key in ("bill_type", "bill_subtype"):
+            scored = [r["classification"][key]["correct"] for r in completed if key in r["classification"]]
+            classification[key] = accuracy(sum(scored), len(scored))
+
+        per_field: dict[str, list[bool]] = {}
+        for r in completed:
+            for path, score in r["fields"].items():
+                per_field.setdefault(path, []).append(score["correct"])
+        all_scores = [score for scores in per_field.values() for score in scores]
+
+        tokens = {
+            stage: {
+                "prompt": counters.get(f"{stage}.tokens.prompt", 0),
+                "completion": counters.get(f"{stage}.tokens.completion", 0),
+            }
+            for stage in LLM_STAGES
+        }
+        total_tokens = sum(t["prompt"] + t["completion"] for t in tokens.values())
+
+        return {
+            "documents": len(results),
+            "completed": len(completed),
+            "errors": len(failed),
+            "error_rate": accuracy(len(failed), len(results)),
+            "errors_by_type": dict(Counter(r["error"].split(":", 1)[0] for r in failed)),
+            "classification_accuracy": classification,
+            # Failed documents count as wrong on every labeled field
+            "field_accuracy": accuracy(
+                sum(all_scores),
+                len(all_scores) + sum(r["fields_labeled"] for r in failed),
+            ),
+            "field_accuracy_by_field": {
+                path: {"accuracy": accuracy(sum(scores), len(scores)), "scored": len(scores)}
+                for path, scores in sorted(per_field.items())
+            },
+            "latency_seconds": {
+                stage: _percentiles([r["latency"][stage] for r in completed if stage in r["latency"]])
+                for stage in STAGES
+            },
+            "tokens": tokens,
+            "tokens_per_document": round(total_tokens / len(completed), 1) if completed else None,
+            "llm_retries": sum(counters.get(f"{stage}.retries", 0) for stage in LLM_STAGES),
+            "wall_seconds": round(wall, 3),
+            "docs_per_second": round(len(completed) / wall, 4) if wall else None,
+        }
+
+
+# ----------------------------------------------------------------------
+# Reports
+# ----------------------------------------------------------------------
+def write_reports(out_dir: str | Path, reports: list[dict], metadata: dict) -> Path:
+    """
+    Writes report.json (everything, including per-document scores),
+    summary.csv (one row per config) and documents.csv (one row per
+    document and config). Returns the output directory.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    (out_dir / "report.json").write_text(json.dumps(
+        {"generated_at": datetime.datetime.utcnow().isoformat(), **metadata, "configs": reports},
+        indent=2,
+        default=str,
+    ))
+
+    field_paths = sorted({path for report in reports for path in report["summary"]["field_accuracy_by_field"]})
+    with (out_dir / "summary.csv").open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "config", "documents", "completed", "errors", "bill_type_accuracy", "bill_subtype_accuracy", "field_accuracy",
+            *[f"{stage}_p50_s" for stage in STAGES], *[f"{stage}_p95_s" for stage in STAGES],
+            "prompt_tokens", "completion_tokens", "tokens_per_document", "docs_per_second",
+            *[f"accuracy:{path}" for path in field_paths],
+        ])
+        for report in reports:
+            summary = report["summary"]
+            latency = summary["latency_seconds"]
+            writer.writerow([
+                report["config"]["name"],
+                summary["documents"],
+                summary["completed"],
+                summary["errors"],
+                summary["classification_accuracy"]["bill_type"],
+                summary["classification_accuracy"]["bill_subtype"],
+                summary["field_accuracy"],
+                *[latency[stage]["p50"] for stage in STAGES],
+                *[latency[stage]["p95"] for stage in STAGES],
+                sum(t["prompt"] for t in summary["tokens"].values()),
+                sum(t["completion"] for t in summary["tokens"].values()),
+                summary["tokens_per_document"],
+                summary["docs_per_second"],
+                *[summary["field_accuracy_by_field"].get(path, {}).get("accuracy") for path in field_paths],
+            ])
+
+    with (out_dir / "documents.csv").open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["config", "document", "error", "fields_correct", "fields_scored", *[f"{stage}_s" for stage in STAGES]])
+        for report in reports:
+            for doc in report["documents"]:
+                scores = [score["correct"] for score in doc.get("fields", {}).values()]
+                writer.writerow([
+                    report["config"]["name"],
+                    doc["document"],
+                    doc["error"] or "",
+                    sum(scores),
+                    len(scores),
+                    *[doc["latency"].get(stage) for stage in STAGES],
+                ])
+
+    return out_dir
@@ -0,0 +1,86 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+# Upper bound that fits the NUMERIC(14, 2) / NUMERIC(18, 2) columns
+MAX_AMOUNT = Decimal(10) ** 12
+
+
+def _as_dict(value) -> dict:
+    return value if isinstance(value, dict) else {}
+
+
+def get_vendor_name(extracted_data: dict | None) -> str | None:
+    """
+    Returns the vendor (invoice) or merchant (expense) name from extracted data.
+    """
+    data = _as_dict(extracted_data)
+    name = _as_dict(data.get("vendor")).get("name") or _as_dict(data.get("merchant")).get("name")
+    if not isinstance(name, str) or not name.strip():
+        return None
+    return name.strip()[:255]
+
+
+def get_total_amount(extracted_data: dict | None) -> Decimal | None:
+    """
+    Returns total_amount as a Decimal, tolerating strings like "1,234.50".
+    """
+    value = _as_dict(extracted_data).get("total_amount")
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        amount = Decimal(str(value).replace(",", "").strip())
+    except InvalidOperation:
+        return None
+    if not amount.is_finite() or abs(amount) >= MAX_AMOUNT:
+        return None
+    return amount.quantize(Decimal("0.01"))
+
+
+def get_invoice_number(extracted_data: dict | None, netsuite_data: dict | None = None) -> str | None:
+    """
+    Returns the invoice number, falling back to the NetSuite tranId.
+    """
+    value = _as_dict(extracted_data).get("invoice_number") or _as_dict(netsuite_data).get("tranId")
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    value = str(value).strip()
+    return value[:100] or None
+
+
+def get_transaction_date(extracted_data: dict | None, netsuite_data: dict | None = None) -> date | None:
+    """
+    Returns the invoice/transaction date if it is a valid ISO date.
+    """
+    data = _as_dict(extracted_data)
+    for value in (
+        data.get("invoice_date"),
+        data.get("transaction_date"),
+        _as_dict(netsuite_data).get("tranDate"),
+    ):
+        if not isinstance(value, str):
+            continue
+        try:
+            return date.fromisoformat(value.strip()[:10])
+        except ValueError:
+            continue
+    return None
+
+
+def get_currency(extracted_data: dict | None) -> str | None:
+    value = _as_dict(extracted_data).get("currency")
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return value.strip().upper()[:10]
+
+
+def get_search_fields(extracted_data: dict | None, netsuite_data: dict | None) -> dict:
+    """
+    Values for the promoted, indexed search columns on `Document`.
+    """
+    return {
+        "vendor_name": get_vendor_name(extracted_data),
+        "invoice_number": get_invoice_number(extracted_data, netsuite_data),
+        "transaction_date": get_transaction_date(extracted_data, netsuite_data),
+        "total_amount": get_total_amount(extracted_data),
+        "currency": get_currency(extracted_data),
+    }
@@ -0,0 +1,235 @@
+import logging
+import re
+from datetime import date, datetime
+from app.logger import log_payload
+from app.services.ocr_result import OCRResult
+
+logger = logging.getLogger(__name__)
+
+# Label phrases per field, with how specific (trustworthy) each label is.
+# Longer phrases are tried first so "invoice date" wins over "date".
+# Single generic words stay below FIELD_LOCATOR_MIN_CONFIDENCE (0.8), so
+# on their own they are passed to the LLM as hints but never override it.
+FIELD_LABELS = {
+    "total_amount": {
+        ("grand", "total"): 1.0,
+        ("total", "amount"): 1.0,
+        ("amount", "due"): 0.95,
+        ("balance", "due"): 0.95,
+        ("total", "due"): 0.95,
+        ("total", "ttc"): 1.0,
+        ("total",): 0.75,
+    },
+    "date": {
+        ("invoice", "date"): 1.0,
+        ("date", "of", "issue"): 1.0,
+        ("transaction", "date"): 1.0,
+        ("date",): 0.75,
+    },
+    "invoice_number": {
+        ("invoice", "number"): 1.0,
+        ("invoice", "no"): 1.0,
+        ("invoice", "#"): 1.0,
+        ("invoice", "num"): 1.0,
+        ("inv", "no"): 0.95,
+        ("invoice",): 0.75,
+    },
+}
+
+# Words right before or after a label that make it a different field,
+# e.g. "Due Date", "Total Tax", "Sub Total"
+NEGATIVE_CONTEXT = {
+    "total_amount": {"sub", "tax", "vat", "gst", "net", "discount", "shipping", "items", "qty", "quantity"},
+    "date": {"due", "ship", "shipping", "delivery", "order", "payment", "expiry", "expiration", "print", "service"},
+    "invoice_number": {"order", "po", "purchase", "customer", "account"},
+}
+
+# Fields where the lowest of equally confident candidates wins (the grand
+# total is usually printed last); for the others the first one wins.
+LATER_WINS = {"total_amount"}
+
+SAME_LINE_WEIGHT = 1.0
+BELOW_WEIGHT = 0.85
+# A value below its label must start within this many label heights
+BELOW_MAX_GAP_LINES = 1.5
+
+_AMOUNT_RE = re.compile(r"^\(?-?[$€£¥₹]?(\d{1,3}(?:[,.]\d{3})+|\d+)([.,]\d{2})?[$€£¥₹]?\)?$")
+_CURRENCY_TOKENS = {"$", "€", "£", "¥", "₹", "usd", "eur", "gbp", "inr"}
+# Amounts without a decimal part ("2") are often quantities, not totals
+WHOLE_NUMBER_WEIGHT = 0.8
+_DATE_FORMATS = (
+    "%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%m-%d-%Y",
+    "%d.%m.%Y", "%d/%m/%y", "%m/%d/%y", "%d %b %Y", "%d %B %Y", "%b %d %Y", "%B %d %Y",
+)
+# Day-first numeric dates whose day could also be a month ("03/04/2024") may
+# be US month-first; keep them below the override threshold
+AMBIGUOUS_DATE_WEIGHT = 0.6
+_INVOICE_NUMBER_RE = re.compile(r"^#?[A-Za-z0-9][A-Za-z0-9\-/]{1,30}$")
+
+
+def _normalize(word: str) -> str:
+    return word.lower().strip(":.;,")
+
+
+class LocatedField:
+    __slots__ = ("name", "value", "confidence", "label", "box")
+
+    def __init__(self, name: str, value, confidence: float, label: str, box: tuple[int, int, int, int]):
+        self.name = name
+        self.value = value
+        self.confidence = confidence
+        self.label = label
+        self.box = box
+
+    def to_dict(self) -> dict:
+        return {
+            "value": self.value,
+            "confidence": round(self.confidence, 3),
+            "label": self.label,
+            "box": list(self.box),
+        }
+
+
+# ----------------------------------------------------------------------
+# Value parsers: return (value, n_words_consumed, weight) or None
+# ----------------------------------------------------------------------
+def _parse_amount_token(token: str) -> tuple[float, float] | None:
+    match = _AMOUNT_RE.match(token)
+    if not match:
+        return None
+    whole, cents = re.sub(r"[,.]", "", match.group(1)), match.group(2)
+    value = float(f"{whole}.{cents[1:]}" if cents else whole)
+    if token.startswith(("-", "(")):
+        value = -value
+    return value, 1.0 if cents else WHOLE_NUMBER_WEIGHT
+
+
+def parse_amount(words: list[str]):
+    # "$ 268.44" / "EUR 18,00" may be split into a currency word and a number
+    if len(words) >= 2 and _normalize(words[0]) in _CURRENCY_TOKENS:
+        parsed = _parse_amount_token(words[1])
+        if parsed is not None:
+            return parsed[0], 2, parsed[1]
+    parsed = _parse_amount_token(words[0]) if words else None
+    return (parsed[0], 1, parsed[1]) if parsed is not None else None
+
+
+def parse_date(words: list[str]):
+    for n in (3, 1):
+        if len(words) < n:
+            continue
+        candidate = " ".join(w.strip(",.") for w in words[:n])
+        for fmt in _DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(candidate, fmt).date()
+            except ValueError:
+                continue
+            if 1990 <= parsed.year <= date.today().year + 1:
+                ambiguous = fmt.startswith("%d") and "%m" in fmt and parsed.day <= 12 and parsed.day != parsed.month
+                return parsed.isoformat(), n, AMBIGUOUS_DATE_WEIGHT if ambiguous else 1.0
+    return None
+
+
+def parse_invoice_number(words: list[str]):
+    if not words:
+        return None
+    candidate = words[0].strip(":")
+    if not _INVOICE_NUMBER_RE.match(candidate) or not any(ch.isdigit() for ch in candidate):
+        return None
+    if parse_date([candidate]):
+        return None
+    return candidate.lstrip("#"), 1, 1.0
+
+
+PARSERS = {
+    "total_amount": parse_amount,
+    "date": parse_date,
+    "invoice_number": parse_invoice_number,
+}
+
+
+class FieldLocator:
+    """
+    Finds totals, dates and invoice numbers next to their printed labels using
+    word boxes: the value is taken from the words right of the label on the
+    same line, or else from the line directly below that overlaps the label
+    horizontally. Confidence combines label specificity, position and the
+    OCR confidence of the value words.
+    """
+
+    def locate(self, result: OCRResult) -> dict[str, LocatedField]:
+        if not len(result):
+            return {}
+
+        lines = result.line_indices()
+        normalized = [_normalize(word) for word in result.words]
+        found: dict[str, LocatedField] = {}
+
+        for field, labels in FIELD_LABELS.items():
+            parser = PARSERS[field]
+            excluded = NEGATIVE_CONTEXT.get(field, set())
+            candidates = []
+            for line_no, indices in enumerate(lines):
+                tokens = [normalized[i] for i in indices]
+                for label, weight in sorted(labels.items(), key=lambda item: -len(item[0])):
+                    position = self._find_label(tokens, label)
+                    if position is None:
+                        continue
+                    end = position + len(label)
+                    if excluded.intersection(tokens[max(position - 1, 0):position] + tokens[end:end + 1]):
+                        break  # e.g. "Due Date": not this field
+                    label_words = indices[position:end]
+                    candidate = self._value_after(result, parser, indices[end:], SAME_LINE_WEIGHT)
+                    if candidate is None and line_no + 1 < len(lines):
+                        candidate = self._value_below(result, parser, label_words, lines[line_no + 1])
+                    if candidate is not None:
+                        value, confidence, box = candidate
+                        candidates.append(LocatedField(
+                            field, value, confidence * weight, " ".join(label), box,
+                        ))
+                    break  # most specific label on this line only
+
+            if candidates:
+                order = 1 if field in LATER_WINS else -1
+                found[field] = max(enumerate(candidates), key=lambda item: (item[1].confidence, order * item[0]))[1]
+
+        log_payload(logger, "located fields", lambda: {name: field.to_dict() for name, field in found.items()})
+        return found
+
+    @staticmethod
+    def _find_label(tokens: list[str], label: tuple[str, ...]) -> int | None:
+        size = len(label)
+        for start in range(len(tokens) - size + 1):
+            if tuple(tokens[start:start + size]) == label:
+                return start
+        return None
+
+    @staticmethod
+    def _value_after(result: OCRResult, parser, indices, position_weight: float):
+        # Skip separators like ":" or "#" printed as their own word
+        indices = [i for i in indices if result.words[i] not in {":", "#", "-"}]
+        for start in range(len(indices)):
+            parsed = parser([result.words[i] for i in indices[start:start + 3]])
+            if parsed is None:
+                continue
+            value, used, parse_weight = parsed
+            value_words = indices[start:start + used]
+            ocr_confidence = float(result.conf[value_words].mean()) / 100 * parse_weight
+            # Values further from the label are less likely to belong to it
+            distance_weight = 1.0 if start == 0 else 0.9
+            return value, ocr_confidence * position_weight * distance_weight, result.line_box(value_words)
+        return None
+
+    def _value_below(self, result: OCRResult, parser, label_words, next_line):
+        left, top, right, bottom = result.line_box(label_words)
+        overlapping = [
+            i for i in next_line
+            if result.boxes[i, 0] < right and result.boxes[i, 0] + result.boxes[i, 2] > left
+        ]
+        if not overlapping:
+            return None
+        gap = int(result.boxes[overlapping, 1].min()) - bottom
+        if gap > BELOW_MAX_GAP_LINES * max(bottom - top, 1):
+            return None
+        return self._value_after(result, parser, overlapping, BELOW_WEIGHT)
+
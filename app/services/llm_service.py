@@ -1,14 +1,62 @@
 import httpx
+import hashlib
 import logging
 import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from app.config import settings
+from app.logger import log_payload
+from app.services.resilience import (
+    CircuitBreaker,
+    DeadlineExceededError,
+    LatencyTracker,
+    backoff_delay,
+)
 
 logger = logging.getLogger(__name__)
 
 # Base path: app/prompts/
 PROMPT_BASE_PATH = Path(__file__).resolve().parent.parent / "prompts"
 
+# Fields found by the positional field locator -> keys in each extraction schema
+LOCATED_FIELD_KEYS = {
+    "expense": {"total_amount": "total_amount", "date": "transaction_date"},
+    "invoice": {"total_amount": "total_amount", "date": "invoice_date", "invoice_number": "invoice_number"},
+}
+
+
+# Templates the prompt files are embedded in. They are part of each stage's
+# version hash, so editing one marks the stage stale for reprocessing.
+CLASSIFY_TEMPLATE = """
+{instructions}
+
+OCR TEXT:
+{ocr_text}
+"""
+
+EXTRACT_TEMPLATE = """
+{instructions}
+{key_values}
+OCR TEXT:
+{ocr_text}
+"""
+
+KEY_VALUES_TEMPLATE = "\nOCR FORM KEY-VALUE PAIRS:\n{pairs}\n"
+
+NETSUITE_TEMPLATE = """
+{instructions}
+
+INPUT JSON:
+{input_json}
+"""
+
+
+def document_kind(document_type: str | None) -> str:
+    return "expense" if document_type in ("expense", "Expense Bill") else "invoice"
+
 
 def load_prompt(relative_path: str) -> str:
     """
@@ -20,6 +68,17 @@ def load_prompt(relative_path: str) -> str:
     return prompt_path.read_text()
 
 
+def _is_retryable_status(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+def prompt_hash(prompt: str) -> str:
+    """
+    Short, stable content hash used to version a prompt.
+    """
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
 class LLMService:
     def __init__(self):
         self.base_url = settings.OLLAMA_BASE_URL
@@ -34,6 +93,21 @@ class LLMService:
             ),
         )
 
+        # ---- Resilience: breaker, per-stage latency, counters ----
+        self.breaker = CircuitBreaker(
+            "ollama",
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_BREAKER_RESET_TIMEOUT,
+        )
+        self.stage_timeouts = {
+            "classify": settings.LLM_CLASSIFY_TIMEOUT,
+            "extract": settings.LLM_EXTRACT_TIMEOUT,
+            "netsuite": settings.LLM_NETSUITE_TIMEOUT,
+        }
+        self.latency: dict[str, LatencyTracker] = {}
+        self.counters: Counter = Counter()
+        self._metrics_lock = threading.Lock()
+        self._hedge_pool: ThreadPoolExecutor | None = None
 
         # ---- Load prompts once at startup ----
         self.classifier_prompt = load_prompt(
@@ -56,6 +130,87 @@ class LLMService:
             "netsuite/invoice_netsuite_prompt.txt"
         )
 
+    def ping(self):
+        """Checks that Ollama is reachable."""
+        response = self.client.get("/api/tags", timeout=5.0)
+        response.raise_for_status()
+
+    def close(self):
+        self.client.close()
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False, cancel_futures=True)
+
+    def metrics(self) -> dict:
+        """Breaker state, retry/hedge counters and latency percentiles per stage."""
+        with self._metrics_lock:
+            counters = dict(self.counters)
+            trackers = dict(self.latency)
+        return {
+            "breaker": self.breaker.snapshot(),
+            "counters": counters,
+            "latency_seconds": {
+                stage: {
+                    "samples": len(tracker),
+                    "p50": tracker.percentile(0.50),
+                    "p95": tracker.percentile(0.95),
+                }
+                for stage, tracker in trackers.items()
+            },
+        }
+
+    def _count(self, key: str, amount: int = 1):
+        with self._metrics_lock:
+            self.counters[key] += amount
+
+    def _tracker(self, stage: str) -> LatencyTracker:
+        with self._metrics_lock:
+            if stage not in self.latency:
+                self.latency[stage] = LatencyTracker()
+            return self.latency[stage]
+
+    # ------------------------------------------------------------------
+    # Prompt selection / versioning
+    # ------------------------------------------------------------------
+    def _extraction_prompt_for(self, document_type: str) -> str:
+        if document_type == "expense" or document_type == "Expense Bill":
+            return self.expense_extraction_prompt
+        elif document_type == "invoice" or document_type == "Invoice Bill":
+            return self.invoice_extraction_prompt
+        raise ValueError(f"Unsupported document type: {document_type}")
+
+    def _netsuite_prompt_for(self, document_type: str) -> str:
+        if document_type == "expense" or document_type == "Expense Bill":
+            return self.expense_netsuite_prompt
+        elif document_type == "invoice" or document_type == "Invoice Bill":
+            return self.invoice_netsuite_prompt
+        raise ValueError(f"Unsupported document type: {document_type}")
+
+    def _version(self, *parts: str) -> dict:
+        return {"model": self.model, "prompt": prompt_hash("\0".join(parts))}
+
+    def stage_versions(self, document_type: str | None) -> dict:
+        """
+        Model and prompt hash that each pipeline stage would use for a
+        document of this type. The hash covers the prompt file and the
+        template around it (for extraction also the located-field block).
+        Stored per document so stale stages can be re-run after a prompt,
+        template or model change.
+        """
+        versions = {
+            "classify": self._version(CLASSIFY_TEMPLATE, self.classifier_prompt),
+        }
+        try:
+            versions["extract"] = self._version(
+                EXTRACT_TEMPLATE,
+                KEY_VALUES_TEMPLATE,
+                json.dumps(LOCATED_FIELD_KEYS[document_kind(document_type)], sort_keys=True),
+                self._extraction_prompt_for(document_type),
+            )
+            versions["netsuite"] = self._version(NETSUITE_TEMPLATE, self._netsuite_prompt_for(document_type))
+        except ValueError:
+            pass
+        return versions
+
     def structure_document(self, ocr_text: str) -> dict:
         logger.info("Classifying document")
 
@@ -64,27 +219,24 @@ class LLMService:
         bill_type = classification.get("bill_type")
         bill_subtype = classification.get("bill_subtype")
 
-        logger.info(f"bill type: {bill_type}")
-        logger.info(f"bill subtype: {bill_subtype}")
-
         if not bill_type or not bill_subtype:
             raise ValueError("Bill type or subtype missing from classification")
 
-        logger.info(f"Bill type: {bill_type}, subtype: {bill_subtype}")
+        logger.info("Bill type: %s, subtype: %s", bill_type, bill_subtype)
 
         logger.info("Extracting structured data")
         structured_data = self.extract_structured_data(
             ocr_text=ocr_text,
             document_type=bill_type
         )
-        logger.info(f"structured data: {structured_data}")
+        log_payload(logger, "structured data", structured_data)
 
         logger.info("Transforming for NetSuite")
         netsuite_payload = self.transform_for_netsuite(
             structured_data=structured_data,
             document_type=bill_type
         )
-        logger.info(f"netsuite payload: {netsuite_payload}")
+        log_payload(logger, "netsuite payload", netsuite_payload)
 
         return {
             "bill_type": bill_type,
@@ -92,7 +244,20 @@ class LLMService:
             "structured_data": structured_data,
             "netsuite_payload": netsuite_payload,
         }
-    def _generate(self, prompt: str, json_mode: bool = False) -> str:
+
+    # ------------------------------------------------------------------
+    # Generation with retries, deadlines, circuit breaker and hedging
+    # ------------------------------------------------------------------
+    def _generate(self, prompt: str, json_mode: bool = False, stage: str = "generate") -> str:
+        """
+        Calls Ollama within the stage's time budget. Transport errors, 5xx and
+        429 responses are retried with jittered exponential backoff while the
+        budget lasts; the circuit breaker fails fast while Ollama is unhealthy
+        and sees one outcome per call, however many attempts it took. Running
+        out of budget (or timing out on the last attempt) raises
+        DeadlineExceededError. Generations are side-effect free, so retrying
+        and hedging are safe.
+        """
         payload = {
             "model": self.model,
             "prompt": prompt,
@@ -102,16 +267,107 @@ class LLMService:
         if json_mode:
             payload["format"] = "json"
 
-        try:
-            response = self.client.post("/api/generate", json=payload)
-            response.raise_for_status()
-            return response.json().get("response", "")
-        except httpx.RequestError as e:
-            logger.error(f"Ollama API request failed: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"LLM generation failed: {e}")
-            raise
+        deadline = time.monotonic() + self.stage_timeouts.get(stage, settings.LLM_DEFAULT_TIMEOUT)
+        self.breaker.allow()
+        attempt = 0
+        while True:
+            try:
+                body = self._post_with_hedge(payload, stage, deadline - time.monotonic())
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if isinstance(e, httpx.HTTPStatusError) and not _is_retryable_status(e.response.status_code):
+                    # Ollama answered, so it is healthy; the request itself is bad
+                    self.breaker.record_success()
+                    logger.error(f"LLM generation failed: {e}")
+                    self._count(f"{stage}.failure")
+                    raise
+
+                delay = backoff_delay(attempt, settings.LLM_RETRY_BASE_DELAY, settings.LLM_RETRY_MAX_DELAY)
+                out_of_budget = time.monotonic() + delay >= deadline
+                if attempt >= settings.LLM_MAX_RETRIES or out_of_budget:
+                    self.breaker.record_failure()
+                    logger.error(f"Ollama API request failed after {attempt + 1} attempt(s): {e}")
+                    if out_of_budget or isinstance(e, httpx.TimeoutException):
+                        self._count(f"{stage}.deadline_exceeded")
+                        raise DeadlineExceededError(
+                            f"LLM stage '{stage}' exceeded its time budget after {attempt + 1} attempt(s)"
+                        ) from e
+                    self._count(f"{stage}.failure")
+                    raise
+                attempt += 1
+                self._count(f"{stage}.retries")
+                logger.warning(f"Ollama request failed ({e}); retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
+            except Exception as e:
+                self.breaker.record_failure()
+                logger.error(f"LLM generation failed: {e}")
+                self._count(f"{stage}.failure")
+                raise
+            else:
+                self.breaker.record_success()
+                self._count(f"{stage}.success")
+                for kind, key in (("prompt", "prompt_eval_count"), ("completion", "eval_count")):
+                    self._count(f"tokens.{kind}", body.get(key, 0))
+                    self._count(f"{stage}.tokens.{kind}", body.get(key, 0))
+                return body.get("response", "")
+
+    def _post(self, payload: dict, stage: str, timeout: float) -> dict:
+        started = time.monotonic()
+        response = self.client.post(
+            "/api/generate",
+            json=payload,
+            timeout=httpx.Timeout(timeout, connect=min(10.0, timeout)),
+        )
+        response.raise_for_status()
+        self._tracker(stage).record(time.monotonic() - started)
+        return response.json()
+
+    def _post_with_hedge(self, payload: dict, stage: str, timeout: float) -> dict:
+        """
+        If hedging is enabled and the request outlives this stage's observed
+        p95 latency, a second identical request is fired and whichever
+        finishes first wins.
+        """
+        tracker = self._tracker(stage)
+        hedge_after = tracker.percentile(0.95)
+        if (
+            not settings.LLM_HEDGE_ENABLED
+            or len(tracker) < settings.LLM_HEDGE_MIN_SAMPLES
+            or hedge_after is None
+            or hedge_after >= timeout
+        ):
+            return self._post(payload, stage, timeout)
+
+        if self._hedge_pool is None:
+            with self._metrics_lock:
+                if self._hedge_pool is None:
+                    self._hedge_pool = ThreadPoolExecutor(
+                        max_workers=settings.LLM_HEDGE_MAX_WORKERS,
+                        thread_name_prefix="llm-hedge",
+                    )
+
+        started = time.monotonic()
+        primary = self._hedge_pool.submit(self._post, payload, stage, timeout)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        self._count(f"{stage}.hedges")
+        hedge = self._hedge_pool.submit(self._post, payload, stage, timeout - (time.monotonic() - started))
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=timeout - (time.monotonic() - started), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count(f"{stage}.hedges_won")
+                    return future.result()
+                error = future.exception()
+        if error is not None:
+            raise error
+        raise httpx.ReadTimeout(f"LLM stage '{stage}' timed out")
 
     # ------------------------------------------------------------------
     # Classification
@@ -120,15 +376,10 @@ class LLMService:
         """
         Classifies document as invoice or expense.
         """
-        prompt = f"""
-{self.classifier_prompt}
-
-OCR TEXT:
-{ocr_text}
-"""
+        prompt = CLASSIFY_TEMPLATE.format(instructions=self.classifier_prompt, ocr_text=ocr_text)
 
         try:
-            response_text = self._generate(prompt, json_mode=True)
+            response_text = self._generate(prompt, json_mode=True, stage="classify")
             return json.loads(response_text)
         except json.JSONDecodeError:
             logger.warning("Failed to parse classification JSON")
@@ -140,29 +391,45 @@ OCR TEXT:
     def extract_structured_data(
         self,
         ocr_text: str,
-        document_type: str
+        document_type: str,
+        located_fields: dict | None = None,
     ) -> dict:
-        if document_type == "expense" or document_type == "Expense Bill":
-            base_prompt = self.expense_extraction_prompt
-        elif document_type == "invoice" or document_type == "Invoice Bill":
-            base_prompt = self.invoice_extraction_prompt
-        else:
-            raise ValueError(f"Unsupported document type: {document_type}")
+        """
+        `located_fields` are values the OCR field locator found next to their
+        labels ({"total_amount": {"value": ..., "confidence": ...}, ...}). They
+        are passed to the model as key-value pairs, and high-confidence ones
+        override whatever the model returns for that field.
+        """
+        base_prompt = self._extraction_prompt_for(document_type)
 
-        prompt = f"""
-{base_prompt}
+        field_keys = LOCATED_FIELD_KEYS[document_kind(document_type)]
+        located = {
+            field_keys[name]: field
+            for name, field in (located_fields or {}).items()
+            if name in field_keys
+        }
 
-OCR TEXT:
-{ocr_text}
-"""
+        key_values = ""
+        if located:
+            key_values = KEY_VALUES_TEMPLATE.format(
+                pairs=json.dumps({key: field["value"] for key, field in located.items()}, indent=2)
+            )
+
+        prompt = EXTRACT_TEMPLATE.format(instructions=base_prompt, key_values=key_values, ocr_text=ocr_text)
 
         try:
-            response_text = self._generate(prompt, json_mode=True)
-            return json.loads(response_text)
+            response_text = self._generate(prompt, json_mode=True, stage="extract")
+            structured_data = json.loads(response_text)
         except json.JSONDecodeError:
             logger.warning("Failed to parse extraction JSON")
             return {"raw_response": response_text}
 
+        if isinstance(structured_data, dict):
+            for key, field in located.items():
+                if field["confidence"] >= settings.FIELD_LOCATOR_MIN_CONFIDENCE:
+                    structured_data[key] = field["value"]
+        return structured_data
+
     # ------------------------------------------------------------------
     # NetSuite / API Transformation
     # ------------------------------------------------------------------
@@ -171,26 +438,14 @@ OCR TEXT:
         structured_data: dict,
         document_type: str
     ) -> dict:
-        if document_type == "expense" or document_type == "Expense Bill":
-            base_prompt = self.expense_netsuite_prompt
-        elif document_type == "invoice" or document_type == "Invoice Bill":
-            base_prompt = self.invoice_netsuite_prompt
-        else:
-            raise ValueError(f"Unsupported document type: {document_type}")
+        base_prompt = self._netsuite_prompt_for(document_type)
 
-        prompt = f"""
-{base_prompt}
-
-INPUT JSON:
-{json.dumps(structured_data, indent=2)}
-"""
+        prompt = NETSUITE_TEMPLATE.format(instructions=base_prompt, input_json=json.dumps(structured_data, indent=2))
 
         try:
-            response_text = self._generate(prompt, json_mode=True)
+            response_text = self._generate(prompt, json_mode=True, stage="netsuite")
             return json.loads(response_text)
         except json.JSONDecodeError:
             logger.warning("Failed to parse NetSuite JSON")
             return {"raw_response": response_text}
 
-
-llm_service = LLMService()
@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import quote
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ObjectNotFoundError(KeyError):
+    """Raised by every backend when a key does not exist."""
+
+
+class ObjectStore(ABC):
+    """
+    Storage for uploaded bill images. Backends connect lazily on first use
+    (or on an explicit connect()), so importing/constructing one never does I/O.
+
+    Backends that cannot hand out presigned URLs have their objects served
+    by the API itself through the /objects/{key} route.
+    """
+
+    serves_presigned_urls = False
+
+    @abstractmethod
+    def connect(self):
+        """Establishes the connection / prepares the bucket. Safe to call repeatedly."""
+
+    @abstractmethod
+    def ping(self):
+        """Round-trip to the backend (used by readiness checks); raises if it is unavailable."""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes, content_type: str | None = None) -> str:
+        """Stores `data` under `key` and returns the key."""
+
+    @abstractmethod
+    def get(self, key: str, offset: int = 0, length: int | None = None) -> bytes:
+        """Reads an object, or only `length` bytes starting at `offset`."""
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """Returns the object size in bytes."""
+
+    def presigned_url(self, key: str) -> str | None:
+        """URL the frontend can load the object from."""
+        return f"/objects/{quote(key)}"
+
+    async def aput(self, key: str, data: bytes, content_type: str | None = None) -> str:
+        return await asyncio.to_thread(self.put, key, data, content_type)
+
+    async def aget(self, key: str, offset: int = 0, length: int | None = None) -> bytes:
+        return await asyncio.to_thread(self.get, key, offset, length)
+
+    def upload_image(self, contents: bytes, filename: str, content_type: str, document_id: str) -> str:
+        object_key = f"{document_id}/{filename}"
+        self.put(object_key, contents, content_type)
+        logger.info(f"Uploaded image to object store: {object_key}")
+        return object_key
+
+    async def aupload_image(self, contents: bytes, filename: str, content_type: str, document_id: str) -> str:
+        return await asyncio.to_thread(self.upload_image, contents, filename, content_type, document_id)
+
+    def download_image(self, object_key: str) -> bytes:
+        return self.get(object_key)
+
+    def get_presigned_url(self, object_key: str) -> str | None:
+        """
+        Generates a temporary URL so the frontend can view the image
+        """
+        try:
+            return self.presigned_url(object_key)
+        except Exception as e:
+            logger.error(f"Error generating presigned URL: {e}")
+            return None
+
+
+class MinioObjectStore(ObjectStore):
+    serves_presigned_urls = True
+
+    def __init__(self):
+        self.bucket = settings.MINIO_BUCKET
+        self._client = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            if self._client is not None:
+                return
+            import urllib3
+            from minio import Minio
+
+            http_client = urllib3.PoolManager(
+                maxsize=settings.OBJECT_STORE_POOL_SIZE,
+                timeout=urllib3.Timeout(connect=5.0, read=settings.OBJECT_STORE_TIMEOUT),
+                retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+            )
+            client = Minio(
+                endpoint=settings.MINIO_ENDPOINT,
+                access_key=settings.MINIO_ACCESS_KEY,
+                secret_key=settings.MINIO_SECRET_KEY,
+                secure=settings.MINIO_SECURE,
+                region=settings.MINIO_REGION,  # avoids a region lookup round-trip when presigning
+                http_client=http_client,
+            )
+            if not client.bucket_exists(self.bucket):
+                client.make_bucket(self.bucket)
+                logger.info(f"Created MinIO bucket: {self.bucket}")
+            self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self.connect()
+        return self._client
+
+    def ping(self):
+        if not self.client.bucket_exists(self.bucket):
+            raise RuntimeError(f"MinIO bucket {self.bucket!r} does not exist")
+
+    def put(self, key: str, data: bytes, content_type: str | None = None) -> str:
+        import io
+        self.client.put_object(
+            bucket_name=self.bucket,
+            object_name=key,
+            data=io.BytesIO(data),
+            length=len(data),
+            content_type=content_type or "application/octet-stream",
+        )
+        return key
+
+    def get(self, key: str, offset: int = 0, length: int | None = None) -> bytes:
+        from minio.error import S3Error
+        try:
+            response = self.client.get_object(self.bucket, key, offset=offset, length=length or 0)
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise ObjectNotFoundError(key) from e
+            raise
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def size(self, key: str) -> int:
+        from minio.error import S3Error
+        try:
+            return self.client.stat_object(self.bucket, key).size
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise ObjectNotFoundError(key) from e
+            raise
+
+    def presigned_url(self, key: str) -> str | None:
+        return self.client.presigned_get_object(
+            bucket_name=self.bucket,
+            object_name=key,
+            expires=timedelta(hours=1)
+        )
+
+
+class GridFSObjectStore(ObjectStore):
+    def __init__(self):
+        self._client = None
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            if self._bucket is not None:
+                return
+            import gridfs
+            from pymongo import MongoClient
+
+            client = MongoClient(
+                settings.MONGO_URI,
+                maxPoolSize=settings.OBJECT_STORE_POOL_SIZE,
+                serverSelectionTimeoutMS=int(settings.OBJECT_STORE_TIMEOUT * 1000),
+            )
+            client.admin.command("ping")
+            self._bucket = gridfs.GridFSBucket(client[settings.MONGO_DB_NAME])
+            self._client = client
+            logger.info("Connected to MongoDB GridFS")
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            self.connect()
+        return self._bucket
+
+    def ping(self):
+        if self._client is None:
+            self.connect()
+        self._client.admin.command("ping")
+
+    def put(self, key: str, data: bytes, content_type: str | None = None) -> str:
+        self.bucket.upload_from_stream(key, data, metadata={"contentType": content_type})
+        return key
+
+    def _open(self, key: str):
+        from gridfs.errors import NoFile
+        try:
+            return self.bucket.open_download_stream_by_name(key)
+        except NoFile as e:
+            raise ObjectNotFoundError(key) from e
+
+    def get(self, key: str, offset: int = 0, length: int | None = None) -> bytes:
+        grid_out = self._open(key)
+        try:
+            if offset:
+                grid_out.seek(offset)
+            return grid_out.read(length if length is not None else -1)
+        finally:
+            grid_out.close()
+
+    def size(self, key: str) -> int:
+        grid_out = self._open(key)
+        try:
+            return grid_out.length
+        finally:
+            grid_out.close()
+
+
+class LocalObjectStore(ObjectStore):
+    """
+    Filesystem backend for development and tests.
+    """
+
+    def __init__(self, root: str | None = None):
+        self.root = Path(root or settings.OBJECT_STORE_LOCAL_PATH).resolve()
+
+    def connect(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def ping(self):
+        self.connect()
+        if not os.access(self.root, os.R_OK | os.W_OK):
+            raise PermissionError(f"Object store directory is not writable: {self.root}")
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def put(self, key: str, data: bytes, content_type: str | None = None) -> str:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return key
+
+    def get(self, key: str, offset: int = 0, length: int | None = None) -> bytes:
+        try:
+            with open(self._path(key), "rb") as f:
+                f.seek(offset)
+                return f.read(length if length is not None else -1)
+        except FileNotFoundError as e:
+            raise ObjectNotFoundError(key) from e
+
+    def size(self, key: str) -> int:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError as e:
+            raise ObjectNotFoundError(key) from e
+
+
+OBJECT_STORE_BACKENDS = {
+    "minio": MinioObjectStore,
+    "gridfs": GridFSObjectStore,
+    "local": LocalObjectStore,
+}
+
+
+def create_object_store(backend: str | None = None) -> ObjectStore:
+    backend = (backend or settings.OBJECT_STORE_BACKEND).lower()
+    try:
+        return OBJECT_STORE_BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown OBJECT_STORE_BACKEND {backend!r}; expected one of {', '.join(OBJECT_STORE_BACKENDS)}"
+        )
+
@@ -0,0 +1,135 @@
+import numpy as np
+
+
+class OCRResult:
+    """
+    Word-level OCR output in a compact, array-backed layout.
+
+    Words are stored once in reading order; per-word geometry and metadata
+    live in parallel NumPy arrays:
+      boxes  int32 (n, 4)  left, top, width, height in page pixels
+      conf   float32 (n,)  Tesseract word confidence (0-100)
+      line   int32 (n,)    page-wide line index
+      block  int32 (n,)    page-wide block index
+    """
+
+    __slots__ = ("words", "boxes", "conf", "line", "block")
+
+    def __init__(self, words: list[str], boxes: np.ndarray, conf: np.ndarray, line: np.ndarray, block: np.ndarray):
+        self.words = words
+        self.boxes = boxes
+        self.conf = conf
+        self.line = line
+        self.block = block
+
+    @classmethod
+    def empty(cls) -> "OCRResult":
+        return cls(
+            [],
+            np.zeros((0, 4), dtype=np.int32),
+            np.zeros(0, dtype=np.float32),
+            np.zeros(0, dtype=np.int32),
+            np.zeros(0, dtype=np.int32),
+        )
+
+    @classmethod
+    def from_tesseract_data(
+        cls,
+        data: dict,
+        offset: tuple[int, int] = (0, 0),
+        scale: float = 1.0,
+    ) -> "OCRResult":
+        """
+        Builds a result from `image_to_data(..., output_type=Output.DICT)`.
+        `offset` and `scale` map region coordinates back to the full page
+        (e.g. for a cropped or upscaled region).
+        """
+        keep = [i for i, word in enumerate(data["text"]) if word.strip()]
+        if not keep:
+            return cls.empty()
+
+        def column(name, dtype):
+            return np.fromiter((float(data[name][i]) for i in keep), dtype=np.float64, count=len(keep)).astype(dtype)
+
+        boxes = np.stack([
+            column("left", np.float64),
+            column("top", np.float64),
+            column("width", np.float64),
+            column("height", np.float64),
+        ], axis=1) / scale
+        boxes[:, 0] += offset[0]
+        boxes[:, 1] += offset[1]
+
+        # Tesseract numbers lines within paragraphs within blocks; flatten to page-wide ids
+        keys = [(data["block_num"][i], data["par_num"][i], data["line_num"][i]) for i in keep]
+        line_ids = {key: n for n, key in enumerate(dict.fromkeys(keys))}
+        block_ids = {block: n for n, block in enumerate(dict.fromkeys(key[0] for key in keys))}
+
+        return cls(
+            [data["text"][i].strip() for i in keep],
+            np.rint(boxes).astype(np.int32),
+            column("conf", np.float32),
+            np.array([line_ids[key] for key in keys], dtype=np.int32),
+            np.array([block_ids[key[0]] for key in keys], dtype=np.int32),
+        )
+
+    @classmethod
+    def concat(cls, results: list["OCRResult"]) -> "OCRResult":
+        """Joins region results in order, keeping line/block ids unique."""
+        results = [r for r in results if len(r)]
+        if not results:
+            return cls.empty()
+
+        lines, blocks = [], []
+        line_base = block_base = 0
+        for result in results:
+            lines.append(result.line + line_base)
+            blocks.append(result.block + block_base)
+            line_base += int(result.line.max()) + 1
+            block_base += int(result.block.max()) + 1
+
+        return cls(
+            [word for result in results for word in result.words],
+            np.concatenate([r.boxes for r in results]),
+            np.concatenate([r.conf for r in results]),
+            np.concatenate(lines),
+            np.concatenate(blocks),
+        )
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def mean_confidence(self) -> float:
+        valid = self.conf[self.conf >= 0]
+        return float(valid.mean()) if valid.size else 0.0
+
+    def line_indices(self) -> list[np.ndarray]:
+        """Word indices for each line, in reading order."""
+        if not len(self):
+            return []
+        boundaries = np.flatnonzero(np.diff(self.line)) + 1
+        return np.split(np.arange(len(self)), boundaries)
+
+    def line_box(self, indices: np.ndarray) -> tuple[int, int, int, int]:
+        """Union (left, top, right, bottom) of the given words."""
+        boxes = self.boxes[indices]
+        return (
+            int(boxes[:, 0].min()),
+            int(boxes[:, 1].min()),
+            int((boxes[:, 0] + boxes[:, 2]).max()),
+            int((boxes[:, 1] + boxes[:, 3]).max()),
+        )
+
+    @property
+    def text(self) -> str:
+        """Plain text: one line per OCR line, a blank line between blocks."""
+        out = []
+        previous_block = None
+        for indices in self.line_indices():
+            block = int(self.block[indices[0]])
+            if previous_block is not None and block != previous_block:
+                out.append("")
+            out.append(" ".join(self.words[i] for i in indices))
+            previous_block = block
+        return "\n".join(out)
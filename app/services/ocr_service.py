@@ -1,24 +1,241 @@
 import pytesseract
+from pytesseract import Output, TesseractError
 from PIL import Image
+import numpy as np
 import io
 import logging
 from app.config import settings
+from app.logger import log_payload
+from app.services.ocr_result import OCRResult
 
 logger = logging.getLogger(__name__)
 
-if settings.TESSERACT_CMD:
-    pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
+# Page segmentation modes used by the adaptive path
+PSM_AUTO = 3          # fully automatic layout analysis
+PSM_SINGLE_COLUMN = 4  # one column of variable-size text (receipts, split columns)
+PSM_SPARSE = 11       # scattered text, no reading order
+
+LSTM_OEM = 1
+
+
+def otsu_threshold(pixels: np.ndarray) -> int:
+    """
+    Otsu's threshold for an 8-bit grayscale image, computed from its histogram.
+    Pixels <= the returned level belong to the dark (ink) class.
+    """
+    hist = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    cum_mean = np.cumsum(hist * levels)
+    mean_bg = cum_mean / np.maximum(weight_bg, 1)
+    mean_fg = (cum_mean[-1] - cum_mean) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def _runs(mask: np.ndarray) -> list[tuple[int, int]]:
+    """Start/end (exclusive) indices of consecutive True runs in a 1-D mask."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def flatten_alpha(image: Image.Image) -> Image.Image:
+    """
+    Composites transparent images onto white. Converting RGBA/LA straight to
+    grayscale drops the alpha channel, which turns transparent pixels black.
+    """
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return image
+
+
+def rows_align(left: np.ndarray, right: np.ndarray) -> bool:
+    """
+    True if the text rows on both sides of a gutter line up, as in a table
+    (labels on the left, amounts on the right). Splitting there would cut
+    every row in two. Each argument is a per-row "has ink" mask for one side.
+    """
+    left_rows, right_rows = _runs(left), _runs(right)
+    if not left_rows or not right_rows:
+        return False
+
+    aligned = 0
+    for top, bottom in right_rows:
+        for other_top, other_bottom in left_rows:
+            overlap = min(bottom, other_bottom) - max(top, other_top)
+            union = max(bottom, other_bottom) - min(top, other_top)
+            if overlap > 0 and overlap / union >= 0.5:
+                aligned += 1
+                break
+    return aligned >= settings.OCR_ROW_ALIGNMENT_RATIO * min(len(left_rows), len(right_rows))
+
+
+def find_text_regions(ink: np.ndarray) -> list[tuple[int, int, int, int]]:
+    """
+    Locates text regions as (left, top, right, bottom) boxes using projection
+    profiles of a binary ink mask: blank margins are cropped away and the
+    page is split into columns at wide vertical gutters. A gutter must be at
+    least OCR_MIN_GUTTER_RATIO of the page width, and is ignored when the
+    text rows on either side of it line up (a table, not columns).
+    """
+    height, width = ink.shape
+    row_ink = ink.sum(axis=1)
+    col_ink = ink.sum(axis=0)
+
+    # Ignore specks: a row/column needs a few ink pixels to count as content
+    rows = np.flatnonzero(row_ink > max(2, width * 0.002))
+    cols = np.flatnonzero(col_ink > max(2, height * 0.002))
+    if rows.size == 0 or cols.size == 0:
+        return []
+
+    pad = settings.OCR_REGION_PADDING
+    top, bottom = max(int(rows[0]) - pad, 0), min(int(rows[-1]) + 1 + pad, height)
+    left, right = max(int(cols[0]) - pad, 0), min(int(cols[-1]) + 1 + pad, width)
+
+    # Column gutters: long runs of empty columns inside the content box
+    content = ink[top:bottom, left:right]
+    content_cols = content.sum(axis=0) > 0
+    min_gutter = max(20, int(width * settings.OCR_MIN_GUTTER_RATIO))
+    gutters = [
+        (start, end) for start, end in _runs(~content_cols)
+        if end - start >= min_gutter and start > 0 and end < content_cols.size
+    ]
+
+    # Drop gutters whose neighbouring strips have aligned rows
+    edges = [0] + [edge for gutter in gutters for edge in gutter] + [content_cols.size]
+    splits = []
+    region_start = 0
+    for i, (gutter_start, gutter_end) in enumerate(gutters):
+        next_gutter_start = edges[2 * i + 3]
+        left_rows = content[:, region_start:gutter_start].any(axis=1)
+        right_rows = content[:, gutter_end:next_gutter_start].any(axis=1)
+        if rows_align(left_rows, right_rows):
+            continue
+        splits.append((gutter_start, gutter_end))
+        region_start = gutter_end
+    if not splits:
+        return [(left, top, right, bottom)]
+
+    regions = []
+    start = 0
+    for gutter_start, gutter_end in splits:
+        regions.append((left + start, top, left + gutter_start, bottom))
+        start = gutter_end
+    regions.append((left + start, top, right, bottom))
+    return regions
+
+
+def choose_psm(region_width: int, region_height: int, ink_density: float, multi_column: bool) -> int:
+    if ink_density < 0.01:
+        return PSM_SPARSE
+    if multi_column or region_height > region_width * 2:
+        return PSM_SINGLE_COLUMN
+    return PSM_AUTO
+
 
 class OCRService:
+    def __init__(self, mode: str | None = None):
+        if settings.TESSERACT_CMD:
+            pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
+        self.mode = mode or settings.OCR_MODE
+
+    def ping(self):
+        """Checks that the Tesseract binary is available."""
+        return str(pytesseract.get_tesseract_version())
+
     def extract_text(self, image_bytes: bytes) -> str:
         """Extracts text from image bytes using Tesseract OCR."""
+        return self.extract(image_bytes).text
+
+    def extract(self, image_bytes: bytes) -> OCRResult:
+        """Extracts words with boxes and confidences from image bytes."""
         try:
-            image = Image.open(io.BytesIO(image_bytes))
-            text = pytesseract.image_to_string(image)
-            logger.info(f"\n\nocr extracted text:\n{text}")
-            return text
+            image = flatten_alpha(Image.open(io.BytesIO(image_bytes)))
+            if self.mode == "adaptive":
+                result = self._extract_adaptive(image)
+            else:
+                result = self._ocr_region(image)
+            logger.info("OCR extracted %d words (mean confidence %.1f)", len(result), result.mean_confidence)
+            log_payload(logger, "ocr text", lambda: result.text)
+            return result
         except Exception as e:
             logger.error(f"OCR processing failed: {e}")
             raise
 
-ocr_service = OCRService()
+    # ------------------------------------------------------------------
+    # Adaptive mode
+    # ------------------------------------------------------------------
+    def _correct_orientation(self, gray: Image.Image) -> Image.Image:
+        try:
+            osd = pytesseract.image_to_osd(gray, output_type=Output.DICT)
+        except TesseractError as e:
+            # Too little text for OSD; keep the image as-is
+            logger.debug(f"Orientation detection skipped: {e}")
+            return gray
+        rotate = int(osd.get("rotate", 0))
+        if rotate:
+            logger.info(f"Rotating page by {rotate} degrees")
+            return gray.rotate(-rotate, expand=True, fillcolor=255)
+        return gray
+
+    def _ocr_region(
+        self,
+        region: Image.Image,
+        psm: int | None = None,
+        offset: tuple[int, int] = (0, 0),
+        scale: float = 1.0,
+    ) -> OCRResult:
+        # psm=None keeps Tesseract's default engine and segmentation settings
+        data = pytesseract.image_to_data(
+            region,
+            config=f"--oem {LSTM_OEM} --psm {psm}" if psm is not None else "",
+            output_type=Output.DICT,
+        )
+        return OCRResult.from_tesseract_data(data, offset=offset, scale=scale)
+
+    def _extract_adaptive(self, image: Image.Image) -> OCRResult:
+        """
+        Cheap layout analysis first, then Tesseract only on the text regions
+        with a page segmentation mode picked per region. Regions whose word
+        confidence is low are retried once at a higher resolution.
+        """
+        gray = image.convert("L")
+        if settings.OCR_DETECT_ORIENTATION:
+            gray = self._correct_orientation(gray)
+
+        pixels = np.asarray(gray)
+        ink = pixels <= otsu_threshold(pixels)
+        regions = find_text_regions(ink)
+        if not regions:
+            logger.info("No text regions found")
+            return OCRResult.empty()
+
+        results = []
+        for left, top, right, bottom in regions:
+            crop = gray.crop((left, top, right, bottom))
+            density = float(ink[top:bottom, left:right].mean())
+            psm = choose_psm(right - left, bottom - top, density, multi_column=len(regions) > 1)
+
+            result = self._ocr_region(crop, psm, offset=(left, top))
+            if result.mean_confidence < settings.OCR_MIN_CONFIDENCE:
+                factor = settings.OCR_UPSCALE_FACTOR
+                upscaled = crop.resize((crop.width * factor, crop.height * factor), Image.LANCZOS)
+                retry = self._ocr_region(upscaled, psm, offset=(left, top), scale=factor)
+                logger.info(
+                    f"Low OCR confidence {result.mean_confidence:.1f}, "
+                    f"retried at {factor}x: {retry.mean_confidence:.1f}"
+                )
+                if retry.mean_confidence > result.mean_confidence:
+                    result = retry
+
+            results.append(result)
+
+        return OCRResult.concat(results)
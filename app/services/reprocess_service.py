@@ -0,0 +1,198 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from app.config import settings
+from app.services.field_locator import FieldLocator
+from app.services.llm_service import LLMService
+from app.services.object_store import ObjectStore
+from app.services.ocr_service import OCRService
+from app.services.search_index_service import SearchIndexService
+from app.services.sql_service import SQLService
+
+logger = logging.getLogger(__name__)
+
+
+def changed_stages(stored: dict | None, current: dict) -> set[str]:
+    """
+    Stages whose model or prompt differ from what the document was processed with.
+    Documents without recorded versions are stale for every stage.
+    """
+    stored = stored or {}
+    return {stage for stage, version in current.items() if stored.get(stage) != version}
+
+
+class ReprocessService:
+    """
+    Re-runs only the LLM stages whose inputs changed since a document was
+    processed. Stages cascade: a new bill type forces extraction, and new
+    extracted data forces the NetSuite transform.
+
+    Extraction gets the located fields stored with the OCR text, so their
+    overrides survive reprocessing. Documents stored before located fields
+    were persisted have none and are re-extracted from the text alone.
+    """
+
+    def __init__(
+        self,
+        llm: LLMService,
+        sql: SQLService,
+        ocr: OCRService,
+        field_locator: FieldLocator,
+        object_store: ObjectStore,
+        search_index: SearchIndexService,
+    ):
+        self.llm = llm
+        self.sql = sql
+        self.ocr = ocr
+        self.field_locator = field_locator
+        self.object_store = object_store
+        self.search_index = search_index
+
+    def _load_ocr(self, row) -> tuple[str, dict | None]:
+        """OCR text and located fields, from the cache or by re-running OCR."""
+        text = self.sql.get_ocr_text(row.document_id)
+        if text is not None:
+            return text, self.sql.get_located_fields(row.document_id)
+
+        logger.info(f"No cached OCR text for {row.document_id}, running OCR")
+        result = self.ocr.extract(self.object_store.download_image(row.object_key))
+        located_fields = {name: field.to_dict() for name, field in self.field_locator.locate(result).items()}
+        self.sql.save_ocr_text(row.document_id, result.text, located_fields)
+        self.search_index.index_document(row.document_id, result.text)
+        return result.text, located_fields
+
+    def reprocess_document(self, row) -> list[str]:
+        """
+        Brings one document up to date. Returns the stages that were re-run.
+        """
+        stored = row.processing_versions or {}
+        current = self.llm.stage_versions(row.bill_type)
+        changed = changed_stages(stored, current)
+        if not changed:
+            return []
+
+        bill_type, bill_subtype = row.bill_type, row.bill_subtype
+        extracted_data, netsuite_data = row.extracted_data, row.netsuite_data
+        ran = []
+
+        ocr_text = located_fields = None
+        if "classify" in changed or "extract" in changed:
+            ocr_text, located_fields = self._load_ocr(row)
+
+        rerun_extract = "extract" in changed
+        if "classify" in changed:
+            classification = self.llm.classify_document(ocr_text)
+            ran.append("classify")
+            new_type = classification.get("bill_type", "Unknown")
+            bill_subtype = classification.get("bill_subtype", "Unknown")
+            if new_type != bill_type:
+                bill_type = new_type
+                current = self.llm.stage_versions(bill_type)
+                rerun_extract = True
+            else:
+                rerun_extract = rerun_extract or stored.get("extract") != current.get("extract")
+
+        if rerun_extract:
+            if ocr_text is None:
+                ocr_text, located_fields = self._load_ocr(row)
+            extracted_data = self.llm.extract_structured_data(
+                ocr_text=ocr_text,
+                document_type=bill_type,
+                located_fields=located_fields if settings.FIELD_LOCATOR_ENABLED else None,
+            )
+            ran.append("extract")
+
+        if rerun_extract or stored.get("netsuite") != current.get("netsuite"):
+            netsuite_data = self.llm.transform_for_netsuite(
+                structured_data=extracted_data,
+                document_type=bill_type
+            )
+            ran.append("netsuite")
+
+        self.sql.update_document_processing(
+            document_id=row.document_id,
+            bill_type=bill_type,
+            bill_subtype=bill_subtype,
+            extracted_data=extracted_data,
+            netsuite_data=netsuite_data,
+            processing_versions=current,
+            # The dashboard only learns about new results through the outbox
+            outbox_urls=[settings.DASHBOARD_API_URL] if ran and settings.DASHBOARD_API_URL else None,
+        )
+        logger.info(f"Reprocessed {row.document_id}: {', '.join(ran) or 'versions only'}")
+        return ran
+
+    def run(
+        self,
+        concurrency: int = 2,
+        batch_size: int = 100,
+        limit: int | None = None,
+        dry_run: bool = False,
+        checkpoint_path: str | None = None,
+    ) -> dict:
+        """
+        Scans documents in id order and reprocesses stale ones with at most
+        `concurrency` LLM pipelines in flight. With a checkpoint file, the scan
+        resumes after the last fully completed batch; documents finished after
+        that point are skipped anyway because their versions are current.
+        """
+        checkpoint = Path(checkpoint_path) if checkpoint_path else None
+        after_id = ""
+        if checkpoint and checkpoint.exists():
+            after_id = json.loads(checkpoint.read_text()).get("last_id", "")
+            logger.info(f"Resuming reprocessing after document {after_id!r}")
+
+        stats = {"scanned": 0, "stale": 0, "reprocessed": 0, "failed": 0,
+                 "stages": {"classify": 0, "extract": 0, "netsuite": 0}}
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for rows in self.sql.iter_processing_state(after_id=after_id, batch_size=batch_size):
+                stats["scanned"] += len(rows)
+                stale = [
+                    row for row in rows
+                    if changed_stages(row.processing_versions, self.llm.stage_versions(row.bill_type))
+                ]
+                if limit is not None:
+                    stale = stale[:max(limit - stats["stale"], 0)]
+                stats["stale"] += len(stale)
+
+                if not dry_run:
+                    futures = {executor.submit(self.reprocess_document, row): row for row in stale}
+                    for future, row in futures.items():
+                        try:
+                            for stage in future.result():
+                                stats["stages"][stage] += 1
+                            stats["reprocessed"] += 1
+                        except Exception:
+                            stats["failed"] += 1
+                            logger.exception(f"Reprocessing failed for {row.document_id}")
+
+                    if checkpoint:
+                        checkpoint.write_text(json.dumps({"last_id": rows[-1].document_id}))
+
+                if limit is not None and stats["stale"] >= limit:
+                    break
+            else:
+                # Full pass completed: the next run starts from the beginning
+                if checkpoint and not dry_run:
+                    checkpoint.unlink(missing_ok=True)
+
+        return stats
+
+    def stamp_unversioned(self, batch_size: int = 500) -> int:
+        """
+        Marks documents that predate version tracking as current, so they are
+        not all re-run on the first reprocessing pass.
+        """
+        stamped = 0
+        for rows in self.sql.iter_processing_state(batch_size=batch_size):
+            by_type: dict[str, list[str]] = {}
+            for row in rows:
+                if row.processing_versions is None:
+                    by_type.setdefault(row.bill_type, []).append(row.document_id)
+            for bill_type, document_ids in by_type.items():
+                self.sql.set_processing_versions(document_ids, self.llm.stage_versions(bill_type))
+                stamped += len(document_ids)
+        return stamped
+
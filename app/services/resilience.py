@@ -0,0 +1,120 @@
+import random
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a stage runs out of its time budget across retries."""
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_timeout` seconds. Then a single trial call is let
+    through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.rejections = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Raises CircuitOpenError if the call must not be attempted."""
+        with self._lock:
+            if self._state == self.OPEN:
+                elapsed = time.monotonic() - self._opened_at
+                if elapsed < self.reset_timeout:
+                    self.rejections += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self.rejections += 1
+                    raise CircuitOpenError(self.name, 1.0)
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def snapshot(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "rejections": self.rejections,
+            }
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies with percentile lookup."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2**attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
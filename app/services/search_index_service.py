@@ -0,0 +1,201 @@
+import itertools
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+\*?", re.UNICODE)
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turns free user input into a safe FTS5 MATCH expression: every word is
+    quoted (so operators/punctuation cannot cause syntax errors) and all words
+    must match. A trailing `*` keeps prefix matching, e.g. `inv*`.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(query):
+        if token.endswith("*"):
+            terms.append(f'"{token[:-1]}"*')
+        else:
+            terms.append(f'"{token}"')
+    return " ".join(terms)
+
+
+def _create_tables(conn: sqlite3.Connection, suffix: str = ""):
+    """
+    ocr_docs{suffix} maps each document id to an integer rowid, which is
+    also the rowid of its row in ocr_fts{suffix}, so replacing a document
+    is a rowid lookup instead of a scan of the FTS table.
+    """
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS ocr_docs{suffix} ("
+        "rowid INTEGER PRIMARY KEY, document_id TEXT NOT NULL UNIQUE, "
+        "indexed_at REAL NOT NULL DEFAULT 0)"
+    )
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS ocr_fts{suffix} USING fts5("
+        "body, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+def _index(conn: sqlite3.Connection, document_id: str, text: str, suffix: str = ""):
+    now = time.time()
+    row = conn.execute(f"SELECT rowid FROM ocr_docs{suffix} WHERE document_id = ?", (document_id,)).fetchone()
+    if row is None:
+        rowid = conn.execute(
+            f"INSERT INTO ocr_docs{suffix} (document_id, indexed_at) VALUES (?, ?)", (document_id, now)
+        ).lastrowid
+    else:
+        rowid = row[0]
+        conn.execute(f"UPDATE ocr_docs{suffix} SET indexed_at = ? WHERE rowid = ?", (now, rowid))
+        conn.execute(f"DELETE FROM ocr_fts{suffix} WHERE rowid = ?", (rowid,))
+    conn.execute(f"INSERT INTO ocr_fts{suffix} (rowid, body) VALUES (?, ?)", (rowid, text))
+
+
+class SearchIndexService:
+    """
+    Local inverted index over OCR text backed by SQLite FTS5.
+    Documents are added incrementally at ingest; ranking uses bm25().
+    """
+
+    REBUILD_SUFFIX = "_rebuild"
+
+    def __init__(self, path: str | None = None):
+        self.path = path or settings.SEARCH_INDEX_PATH
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            self._connect()
+
+    def ping(self):
+        """Queries the index (used by readiness checks)."""
+        with self._lock:
+            self._connect().execute("SELECT 1 FROM ocr_docs LIMIT 1").fetchall()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            _create_tables(conn)
+            conn.commit()
+            self._conn = conn
+            logger.info(f"Opened OCR search index at {self.path}")
+        return self._conn
+
+    def _swap(self, conn: sqlite3.Connection):
+        """Replaces the live tables with the rebuild tables (inside the caller's transaction)."""
+        suffix = self.REBUILD_SUFFIX
+        conn.execute("DROP TABLE IF EXISTS ocr_fts")
+        conn.execute("DROP TABLE IF EXISTS ocr_docs")
+        conn.execute(f"ALTER TABLE ocr_fts{suffix} RENAME TO ocr_fts")
+        conn.execute(f"ALTER TABLE ocr_docs{suffix} RENAME TO ocr_docs")
+
+    def index_document(self, document_id: str, text: str):
+        """Adds or replaces the OCR text of one document."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                _index(conn, document_id, text)
+
+    def index_many(self, items):
+        """Bulk-loads (document_id, text) pairs in a single transaction."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for document_id, text in items:
+                    _index(conn, document_id, text)
+
+    def rebuild(self, items, batch_size: int = 500) -> int:
+        """
+        Builds a fresh index from (document_id, text) pairs in side tables and
+        swaps it in atomically, so searches keep using the old index until the
+        new one is complete. Documents (re)indexed in the live index after the
+        rebuild started, by this or another process, are carried over.
+        Returns the number of documents indexed from `items`.
+        """
+        suffix = self.REBUILD_SUFFIX
+        started = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(f"DROP TABLE IF EXISTS ocr_fts{suffix}")
+                conn.execute(f"DROP TABLE IF EXISTS ocr_docs{suffix}")
+                _create_tables(conn, suffix)
+
+        indexed = 0
+        items = iter(items)
+        while batch := list(itertools.islice(items, batch_size)):
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    for document_id, text in batch:
+                        _index(conn, document_id, text, suffix)
+            indexed += len(batch)
+            logger.info(f"Indexed {indexed} documents")
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"INSERT INTO ocr_fts{suffix} (ocr_fts{suffix}) VALUES ('optimize')")
+            conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                recent = conn.execute(
+                    "SELECT d.document_id, f.body FROM ocr_docs d JOIN ocr_fts f ON f.rowid = d.rowid "
+                    "WHERE d.indexed_at >= ?",
+                    (started,),
+                ).fetchall()
+                for document_id, text in recent:
+                    _index(conn, document_id, text, suffix)
+                self._swap(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return indexed
+
+    def optimize(self):
+        """Merges index segments; worth running after large backfills."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT INTO ocr_fts (ocr_fts) VALUES ('optimize')")
+
+    def search(self, query: str, limit: int = 20) -> list[dict]:
+        """
+        Returns ranked hits as {document_id, score, snippet}; higher score is better.
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT d.document_id, "
+                "snippet(ocr_fts, 0, '[', ']', '...', 12), "
+                "bm25(ocr_fts) AS rank "
+                "FROM ocr_fts JOIN ocr_docs d ON d.rowid = ocr_fts.rowid "
+                "WHERE ocr_fts MATCH ? "
+                "ORDER BY rank LIMIT ?",
+                (match, limit),
+            ).fetchall()
+
+        return [
+            {"document_id": document_id, "score": -rank, "snippet": snippet}
+            for document_id, snippet, rank in rows
+        ]
@@ -1,11 +1,103 @@
+import datetime
 import logging
-from app.db.database import SessionLocal
+import zlib
+from decimal import Decimal
+from sqlalchemy import func, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from app.db.database import SessionLocal, Base, get_engine
 from app.db.models.document import Document
+from app.db.models.document_summary import DocumentSummary
+from app.db.models.document_text import DocumentText
+from app.db.models.outbox_message import OutboxMessage
+from app.services.extracted_fields import get_vendor_name, get_total_amount, get_currency, get_search_fields
 # If your model name is different in your project, ensure 'Document' matches your SQLAlchemy class name
 
 logger = logging.getLogger(__name__)
 
+UNKNOWN = "Unknown"
+
+# Dimensions accepted by /analytics, mapped to summary table expressions
+SUMMARY_GROUP_COLUMNS = {
+    "bill_type": DocumentSummary.bill_type,
+    "bill_subtype": DocumentSummary.bill_subtype,
+    "vendor": DocumentSummary.vendor_name,
+    "currency": DocumentSummary.currency,
+    "day": DocumentSummary.day,
+    "month": func.date_format(DocumentSummary.day, "%Y-%m"),
+}
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _compressed_text(document_id: str, ocr_text: str, located_fields: dict | None = None) -> DocumentText:
+    return DocumentText(
+        document_id=document_id,
+        compression="zlib",
+        ocr_text=zlib.compress(ocr_text.encode("utf-8")),
+        located_fields=located_fields,
+    )
+
+
+def _decompress_text(row: DocumentText) -> str:
+    if row.compression == "zlib":
+        return zlib.decompress(row.ocr_text).decode("utf-8")
+    return row.ocr_text.decode("utf-8")
+
+
+def document_payload(doc: Document) -> dict:
+    """The JSON body pushed to the dashboard and /forward targets for a document."""
+    return {
+        "document_id": doc.document_id,
+        "created_at": doc.created_at.isoformat() if doc.created_at else None,
+        "filename": doc.filename,
+        "object_key": doc.object_key,
+        "bill_type": doc.bill_type,
+        "bill_subtype": doc.bill_subtype,
+        "extracted_data": doc.extracted_data,
+        "netsuite_data": doc.netsuite_data,
+    }
+
+
+def _summary_key(bill_type, bill_subtype, extracted_data, created_at) -> tuple:
+    return (
+        (bill_type or UNKNOWN)[:50],
+        (bill_subtype or UNKNOWN)[:50],
+        get_vendor_name(extracted_data) or UNKNOWN,
+        get_currency(extracted_data) or UNKNOWN,
+        created_at.date(),
+    )
+
+
+def merge_summary_changes(scanned: dict, at_snapshot: dict, current: dict) -> dict[tuple, list]:
+    """
+    Scanned totals plus the summary changes committed after the scan's
+    snapshot (current minus snapshot), as {key: [count, amount]}. Keys
+    whose count drops to zero are left out.
+    """
+    merged = {key: list(entry) for key, entry in scanned.items()}
+    for key in current.keys() | at_snapshot.keys():
+        count, amount = current.get(key, (0, Decimal(0)))
+        count_before, amount_before = at_snapshot.get(key, (0, Decimal(0)))
+        if count == count_before and amount == amount_before:
+            continue
+        entry = merged.setdefault(key, [0, Decimal(0)])
+        entry[0] += count - count_before
+        entry[1] += amount - amount_before
+    return {key: entry for key, entry in merged.items() if entry[0] != 0}
+
+
 class SQLService:
+    def ping(self):
+        """Checks that MySQL is reachable."""
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    def create_tables(self):
+        """Creates any missing tables for the registered models."""
+        Base.metadata.create_all(bind=get_engine())
+
     def insert_document(
         self,
         document_id: str,
@@ -17,9 +109,17 @@ class SQLService:
         extracted_data: dict,
         netsuite_data: dict,
         created_at,
+        ocr_text: str | None = None,
+        processing_versions: dict | None = None,
+        outbox_urls: list[str] | None = None,
+        located_fields: dict | None = None,
     ):
         """
         Inserts a new document record into the MySQL database.
+        The OCR text, when given, is stored zlib-compressed in document_texts
+        together with the located fields.
+        One outbox message per URL in `outbox_urls` is written in the same
+        transaction, so a committed document is never left undelivered.
         """
         db = SessionLocal()
         try:
@@ -33,9 +133,20 @@ class SQLService:
                 extracted_data=extracted_data,
                 netsuite_data=netsuite_data,
                 created_at=created_at,
+                processing_versions=processing_versions,
+                **get_search_fields(extracted_data, netsuite_data),
             )
 
             db.add(doc)
+            if ocr_text is not None:
+                db.add(_compressed_text(document_id, ocr_text, located_fields))
+            for url in outbox_urls or []:
+                db.add(OutboxMessage(document_id=document_id, target_url=url, payload=document_payload(doc)))
+            self._increment_summary(
+                db,
+                key=_summary_key(bill_type, bill_subtype, extracted_data, created_at),
+                amount=get_total_amount(extracted_data) or Decimal(0),
+            )
             db.commit()
             logger.info(f"Successfully inserted document {document_id} into MySQL")
             return doc
@@ -62,5 +173,511 @@ class SQLService:
         finally:
             db.close()
 
-# Instantiate the service so it can be imported elsewhere
-sql_service = SQLService()
\ No newline at end of file
+    def update_document_processing(
+        self,
+        document_id: str,
+        bill_type: str,
+        bill_subtype: str,
+        extracted_data: dict,
+        netsuite_data: dict,
+        processing_versions: dict,
+        outbox_urls: list[str] | None = None,
+    ):
+        """
+        Replaces the LLM outputs of an existing document after re-processing,
+        keeping the promoted search columns and analytics summaries in sync.
+        Like insert_document, queues the updated payload for every URL in
+        `outbox_urls` in the same transaction.
+        """
+        db = SessionLocal()
+        try:
+            doc = db.query(Document).filter(Document.document_id == document_id).with_for_update().one()
+
+            self._increment_summary(
+                db,
+                key=_summary_key(doc.bill_type, doc.bill_subtype, doc.extracted_data, doc.created_at),
+                amount=-(get_total_amount(doc.extracted_data) or Decimal(0)),
+                count=-1,
+            )
+
+            doc.bill_type = bill_type
+            doc.bill_subtype = bill_subtype
+            doc.extracted_data = extracted_data
+            doc.netsuite_data = netsuite_data
+            doc.processing_versions = processing_versions
+            for column, value in get_search_fields(extracted_data, netsuite_data).items():
+                setattr(doc, column, value)
+            for url in outbox_urls or []:
+                db.add(OutboxMessage(document_id=document_id, target_url=url, payload=document_payload(doc)))
+
+            self._increment_summary(
+                db,
+                key=_summary_key(bill_type, bill_subtype, extracted_data, doc.created_at),
+                amount=get_total_amount(extracted_data) or Decimal(0),
+            )
+            db.commit()
+            logger.info(f"Updated processing results for document {document_id}")
+        except Exception:
+            db.rollback()
+            logger.exception(f"Failed to update document {document_id} in MySQL")
+            raise
+        finally:
+            db.close()
+
+    def set_processing_versions(self, document_ids: list[str], processing_versions: dict):
+        """
+        Stamps documents with the given versions without re-running anything.
+        """
+        db = SessionLocal()
+        try:
+            db.query(Document).filter(Document.document_id.in_(document_ids)).update(
+                {Document.processing_versions: processing_versions},
+                synchronize_session=False,
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to stamp processing versions")
+            raise
+        finally:
+            db.close()
+
+    def iter_processing_state(self, after_id: str = "", batch_size: int = 500):
+        """
+        Yields lists of rows (document_id, object_key, bill_type, bill_subtype,
+        extracted_data, netsuite_data, processing_versions) in document_id order.
+        """
+        last_id = after_id
+        while True:
+            db = SessionLocal()
+            try:
+                rows = (
+                    db.query(
+                        Document.document_id,
+                        Document.object_key,
+                        Document.bill_type,
+                        Document.bill_subtype,
+                        Document.extracted_data,
+                        Document.netsuite_data,
+                        Document.processing_versions,
+                    )
+                    .filter(Document.document_id > last_id)
+                    .order_by(Document.document_id)
+                    .limit(batch_size)
+                    .all()
+                )
+            finally:
+                db.close()
+
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].document_id
+
+    def save_ocr_text(self, document_id: str, ocr_text: str, located_fields: dict | None = None):
+        """
+        Stores (or replaces) the compressed OCR text and located fields for a document.
+        """
+        db = SessionLocal()
+        try:
+            db.merge(_compressed_text(document_id, ocr_text, located_fields))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception(f"Failed to store OCR text for {document_id}")
+            raise
+        finally:
+            db.close()
+
+    def get_ocr_text(self, document_id: str) -> str | None:
+        """
+        Returns the decompressed OCR text stored for a document, if any.
+        """
+        db = SessionLocal()
+        try:
+            row = db.get(DocumentText, document_id)
+            return _decompress_text(row) if row else None
+        finally:
+            db.close()
+
+    def get_located_fields(self, document_id: str) -> dict | None:
+        """
+        Returns the located fields stored with the OCR text, if any.
+        """
+        db = SessionLocal()
+        try:
+            row = db.query(DocumentText.located_fields).filter(DocumentText.document_id == document_id).first()
+            return row.located_fields if row else None
+        finally:
+            db.close()
+
+    def iter_ocr_texts(self, batch_size: int = 500):
+        """
+        Yields (document_id, ocr_text) for every stored text, in keyset-paginated batches.
+        """
+        last_id = ""
+        while True:
+            db = SessionLocal()
+            try:
+                rows = (
+                    db.query(DocumentText)
+                    .filter(DocumentText.document_id > last_id)
+                    .order_by(DocumentText.document_id)
+                    .limit(batch_size)
+                    .all()
+                )
+                batch = [(row.document_id, _decompress_text(row)) for row in rows]
+            finally:
+                db.close()
+
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1][0]
+
+    def search_documents(
+        self,
+        vendor: str | None = None,
+        invoice_number: str | None = None,
+        currency: str | None = None,
+        date_from=None,
+        date_to=None,
+        min_total=None,
+        max_total=None,
+        prefix: bool = False,
+        limit: int = 50,
+    ):
+        """
+        Searches documents through the promoted, indexed columns.
+        With prefix=True, vendor and invoice_number match as `LIKE 'value%'`,
+        which MySQL still resolves through the B-tree index.
+        """
+        db = SessionLocal()
+        try:
+            query = db.query(Document)
+            for column, value in (
+                (Document.vendor_name, vendor),
+                (Document.invoice_number, invoice_number),
+            ):
+                if not value:
+                    continue
+                if prefix:
+                    query = query.filter(column.like(f"{_escape_like(value)}%", escape="\\"))
+                else:
+                    query = query.filter(column == value)
+            if currency:
+                query = query.filter(Document.currency == currency.upper())
+            if date_from:
+                query = query.filter(Document.transaction_date >= date_from)
+            if date_to:
+                query = query.filter(Document.transaction_date <= date_to)
+            if min_total is not None:
+                query = query.filter(Document.total_amount >= min_total)
+            if max_total is not None:
+                query = query.filter(Document.total_amount <= max_total)
+
+            documents = query.order_by(Document.created_at.desc()).limit(limit).all()
+            logger.info(f"Search matched {len(documents)} documents")
+            return documents
+        except Exception:
+            logger.exception("Failed to search documents in MySQL")
+            raise
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # Outbox (outbound deliveries)
+    # ------------------------------------------------------------------
+    def enqueue_document(self, document_id: str, target_url: str) -> int | None:
+        """
+        Queues a stored document for delivery to `target_url`.
+        Returns the outbox message id, or None if the document does not exist.
+        """
+        db = SessionLocal()
+        try:
+            doc = db.get(Document, document_id)
+            if doc is None:
+                return None
+            message = OutboxMessage(document_id=document_id, target_url=target_url, payload=document_payload(doc))
+            db.add(message)
+            db.commit()
+            logger.info(f"Queued document {document_id} for delivery to {target_url}")
+            return message.id
+        except Exception:
+            db.rollback()
+            logger.exception(f"Failed to queue document {document_id} for delivery")
+            raise
+        finally:
+            db.close()
+
+    def claim_outbox_batch(self, limit: int, lease_seconds: float) -> list[dict]:
+        """
+        Claims up to `limit` due messages for sending. Claimed rows are pushed
+        `lease_seconds` into the future, so a sender that dies mid-flight only
+        delays them; SKIP LOCKED lets several API workers share the outbox.
+        """
+        now = datetime.datetime.utcnow()
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(OutboxMessage)
+                .filter(OutboxMessage.status == "pending", OutboxMessage.next_attempt_at <= now)
+                .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            lease_until = now + datetime.timedelta(seconds=lease_seconds)
+            claimed = []
+            for row in rows:
+                row.attempts += 1
+                row.next_attempt_at = lease_until
+                claimed.append({
+                    "id": row.id,
+                    "document_id": row.document_id,
+                    "target_url": row.target_url,
+                    "payload": row.payload,
+                    "attempts": row.attempts,
+                })
+            db.commit()
+            return claimed
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to claim outbox messages")
+            raise
+        finally:
+            db.close()
+
+    def mark_outbox_delivered(self, ids: list[int]):
+        self._update_outbox(ids, {
+            OutboxMessage.status: "delivered",
+            OutboxMessage.delivered_at: datetime.datetime.utcnow(),
+            OutboxMessage.last_error: None,
+        })
+
+    def mark_outbox_retry(self, ids: list[int], error: str, retry_at: datetime.datetime):
+        self._update_outbox(ids, {
+            OutboxMessage.next_attempt_at: retry_at,
+            OutboxMessage.last_error: error[:2000],
+        })
+
+    def mark_outbox_dead(self, ids: list[int], error: str):
+        self._update_outbox(ids, {
+            OutboxMessage.status: "dead",
+            OutboxMessage.last_error: error[:2000],
+        })
+
+    def _update_outbox(self, ids: list[int], values: dict):
+        if not ids:
+            return
+        db = SessionLocal()
+        try:
+            db.query(OutboxMessage).filter(OutboxMessage.id.in_(ids)).update(values, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to update outbox messages")
+            raise
+        finally:
+            db.close()
+
+    def requeue_dead_letters(self, target_url: str | None = None) -> int:
+        """
+        Moves dead messages (optionally only those for one target) back to
+        pending with a fresh attempt budget. Returns the number requeued.
+        """
+        db = SessionLocal()
+        try:
+            query = db.query(OutboxMessage).filter(OutboxMessage.status == "dead")
+            if target_url:
+                query = query.filter(OutboxMessage.target_url == target_url)
+            count = query.update(
+                {
+                    OutboxMessage.status: "pending",
+                    OutboxMessage.attempts: 0,
+                    OutboxMessage.next_attempt_at: datetime.datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+            logger.info(f"Requeued {count} dead outbox messages")
+            return count
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to requeue dead outbox messages")
+            raise
+        finally:
+            db.close()
+
+    def outbox_counts(self) -> dict[str, int]:
+        """Number of outbox messages per status."""
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(OutboxMessage.status, func.count(OutboxMessage.id))
+                .group_by(OutboxMessage.status)
+                .all()
+            )
+            return {status: count for status, count in rows}
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # Analytics summaries
+    # ------------------------------------------------------------------
+    def _increment_summary(self, db, key: tuple, amount: Decimal, count: int = 1):
+        """
+        Upserts one summary row inside the caller's transaction, so the
+        aggregate is committed atomically with the document itself.
+        """
+        bill_type, bill_subtype, vendor_name, currency, day = key
+        stmt = mysql_insert(DocumentSummary).values(
+            bill_type=bill_type,
+            bill_subtype=bill_subtype,
+            vendor_name=vendor_name,
+            currency=currency,
+            day=day,
+            document_count=count,
+            total_amount=amount,
+        )
+        stmt = stmt.on_duplicate_key_update(
+            document_count=DocumentSummary.document_count + stmt.inserted.document_count,
+            total_amount=DocumentSummary.total_amount + stmt.inserted.total_amount,
+        )
+        db.execute(stmt)
+
+    def get_summary(
+        self,
+        group_by: list[str],
+        bill_type: str | None = None,
+        bill_subtype: str | None = None,
+        vendor: str | None = None,
+        currency: str | None = None,
+        start_date=None,
+        end_date=None,
+    ) -> list[dict]:
+        """
+        Aggregates the summary table along the requested dimensions.
+        Cost depends on the number of distinct summary keys, not on the
+        number of stored documents.
+        """
+        columns = [SUMMARY_GROUP_COLUMNS[name].label(name) for name in group_by]
+
+        db = SessionLocal()
+        try:
+            query = db.query(
+                *columns,
+                func.sum(DocumentSummary.document_count).label("document_count"),
+                func.sum(DocumentSummary.total_amount).label("total_amount"),
+            )
+            if bill_type:
+                query = query.filter(DocumentSummary.bill_type == bill_type)
+            if bill_subtype:
+                query = query.filter(DocumentSummary.bill_subtype == bill_subtype)
+            if vendor:
+                query = query.filter(DocumentSummary.vendor_name == vendor)
+            if currency:
+                query = query.filter(DocumentSummary.currency == currency.upper())
+            if start_date:
+                query = query.filter(DocumentSummary.day >= start_date)
+            if end_date:
+                query = query.filter(DocumentSummary.day <= end_date)
+            if columns:
+                query = (
+                    query.group_by(*columns)
+                    .having(func.sum(DocumentSummary.document_count) > 0)
+                    .order_by(*columns)
+                )
+
+            return [dict(row._mapping) for row in query.all()]
+        except Exception:
+            logger.exception("Failed to fetch analytics summary from MySQL")
+            raise
+        finally:
+            db.close()
+
+    def rebuild_summaries(self, batch_size: int = 1000) -> int:
+        """
+        Recomputes the summary table from scratch by streaming `documents`.
+        Used to backfill rows ingested before summaries existed.
+
+        The scan takes no locks: it reads `documents` and the summary table
+        from one REPEATABLE READ snapshot. Ingests and reprocessing keep
+        updating the summaries meanwhile, always in the same transaction as
+        their document, so whatever changed in the summary table since the
+        snapshot is exactly what the scan missed. The swap then locks the
+        summary table only to add those changes to the scanned totals and
+        replace its contents.
+        """
+        totals: dict[tuple, list] = {}
+        scanned = 0
+
+        db = SessionLocal()
+        try:
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            # The first read fixes the snapshot; both reads below share it
+            at_snapshot = self._summary_rows(db.query(DocumentSummary))
+
+            rows = (
+                db.query(
+                    Document.bill_type,
+                    Document.bill_subtype,
+                    Document.extracted_data,
+                    Document.created_at,
+                )
+                .yield_per(batch_size)
+            )
+            for row in rows:
+                key = _summary_key(row.bill_type, row.bill_subtype, row.extracted_data, row.created_at)
+                entry = totals.setdefault(key, [0, Decimal(0)])
+                entry[0] += 1
+                entry[1] += get_total_amount(row.extracted_data) or Decimal(0)
+                scanned += 1
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to scan documents for the summary rebuild")
+            raise
+        finally:
+            db.close()
+
+        db = SessionLocal()
+        try:
+            current = self._summary_rows(db.query(DocumentSummary).with_for_update())
+            merged = merge_summary_changes(totals, at_snapshot, current)
+
+            db.query(DocumentSummary).delete(synchronize_session=False)
+            db.bulk_insert_mappings(
+                DocumentSummary,
+                [
+                    {
+                        "bill_type": key[0],
+                        "bill_subtype": key[1],
+                        "vendor_name": key[2],
+                        "currency": key[3],
+                        "day": key[4],
+                        "document_count": count,
+                        "total_amount": amount,
+                    }
+                    for key, (count, amount) in merged.items()
+                ],
+            )
+            db.commit()
+            logger.info(f"Rebuilt {len(merged)} summary rows from {scanned} documents")
+            return scanned
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to rebuild analytics summaries")
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _summary_rows(query) -> dict[tuple, list]:
+        return {
+            (row.bill_type, row.bill_subtype, row.vendor_name, row.currency, row.day): [
+                row.document_count,
+                row.total_amount,
+            ]
+            for row in query
+        }
@@ -1,13 +1,100 @@
+"""
+Local stand-in for the dashboard / external receivers.
+
+Accepts single payloads and batches ({"items": [...]}) as sent by the outbox
+sender, de-duplicates on document_id and can inject failures to exercise
+retries and dead-lettering.
+
+    uvicorn dashboard.dashboard_mock:app --port 9000
+    DASHBOARD_API_URL=http://localhost:9000/api/ingest DELIVERY_ENABLED=true \
+        DELIVERY_BATCH_SIZES='{"http://localhost:9000/api/ingest": 20}' uvicorn app.main:app
+
+uvicorn only speaks HTTP/1.1; serve with `hypercorn dashboard.dashboard_mock:app`
+(with TLS) to see the sender negotiate HTTP/2.
+
+Failure injection (env vars, or POST /control at runtime):
+    MOCK_FAIL_RATE    fraction of requests answered with MOCK_FAIL_STATUS (default 0)
+    MOCK_FAIL_STATUS  status code for injected failures (default 503)
+    MOCK_LATENCY      seconds to wait before answering (default 0)
+    reject_ids        (POST /control only) document_ids answered with 422, along
+                      with the rest of their batch
+"""
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import asyncio
 import logging
+import os
+import random
 
 logging.basicConfig(level=logging.INFO)
 
 app = FastAPI()
 
+control = {
+    "fail_rate": float(os.getenv("MOCK_FAIL_RATE", "0")),
+    "fail_status": int(os.getenv("MOCK_FAIL_STATUS", "503")),
+    "latency": float(os.getenv("MOCK_LATENCY", "0")),
+    "reject_ids": [],
+}
+received: dict[str, dict] = {}
+stats = {"requests": 0, "items": 0, "duplicates": 0, "failed": 0, "batch_sizes": {}}
+
+
+async def _receive(request: Request):
+    stats["requests"] += 1
+    if control["latency"]:
+        await asyncio.sleep(control["latency"])
+    if random.random() < control["fail_rate"]:
+        stats["failed"] += 1
+        return JSONResponse(status_code=control["fail_status"], content={"status": "injected failure"})
+
+    payload = await request.json()
+    items = payload["items"] if isinstance(payload, dict) and "items" in payload else [payload]
+    if any(isinstance(item, dict) and item.get("document_id") in control["reject_ids"] for item in items):
+        stats["failed"] += 1
+        return JSONResponse(status_code=422, content={"status": "rejected payload"})
+    stats["batch_sizes"][len(items)] = stats["batch_sizes"].get(len(items), 0) + 1
+
+    duplicates = 0
+    for item in items:
+        document_id = item.get("document_id") if isinstance(item, dict) else None
+        if document_id in received:
+            duplicates += 1
+        received[document_id or f"anonymous-{len(received)}"] = item
+    stats["items"] += len(items)
+    stats["duplicates"] += duplicates
+
+    logging.info(
+        f"📥 Dashboard received {len(items)} payload(s) over {request.scope.get('http_version')} "
+        f"({duplicates} duplicate)"
+    )
+    return {"status": "received", "count": len(items), "duplicates": duplicates}
+
+
 @app.post("/dashboard")
 async def receive_dashboard_data(request: Request):
-    payload = await request.json()
-    logging.info("📥 Dashboard received payload:")
-    logging.info(payload)
-    return {"status": "received"}
+    return await _receive(request)
+
+
+@app.post("/api/ingest")
+async def ingest(request: Request):
+    return await _receive(request)
+
+
+@app.get("/received")
+async def list_received():
+    return {"stats": stats, "documents": list(received.values())}
+
+
+@app.delete("/received")
+async def reset_received():
+    received.clear()
+    stats.update({"requests": 0, "items": 0, "duplicates": 0, "failed": 0, "batch_sizes": {}})
+    return {"status": "reset"}
+
+
+@app.post("/control")
+async def update_control(request: Request):
+    """e.g. {"fail_rate": 0.5, "fail_status": 503, "latency": 0.2, "reject_ids": ["..."]}"""
+    control.update(await request.json())
+    return control
@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.config import settings
+from app.middleware import AdmissionMiddleware
+from app.routes.document_routes import run_in_background_pool
+from app.services import admission as admission_module
+from app.services.admission import AdmissionController, AdmissionRejected, TokenBucket
+from app.services.container import ServiceContainer, services
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission_module.time, "monotonic", clock)
+    return clock
+
+
+# ----------------------------------------------------------------------
+# Token bucket and controller
+# ----------------------------------------------------------------------
+def test_token_bucket_allows_a_burst_then_refills(clock):
+    bucket = TokenBucket(rate=0.5, burst=2)
+
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    assert bucket.take() == pytest.approx(2.0)
+
+    clock.now += 1
+    assert bucket.take() == pytest.approx(1.0)
+    clock.now += 1
+    assert bucket.take() == 0
+
+    clock.now += 60
+    assert bucket.take() == 0
+    assert bucket.tokens == pytest.approx(1)  # capped at the burst
+
+
+@pytest.fixture
+def controller(monkeypatch, clock):
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 60.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BURST", 2)
+    monkeypatch.setattr(settings, "MAX_IN_FLIGHT_UPLOADS", 1)
+    monkeypatch.setattr(settings, "MAX_BACKGROUND_QUEUE", 1)
+    return AdmissionController()
+
+
+def test_rate_limit_is_per_client(controller):
+    for _ in range(2):
+        controller.admit("a")
+        controller.finished(in_background=False)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.admit("a")
+    assert (excinfo.value.status_code, excinfo.value.retry_after) == (429, 1)
+
+    controller.admit("b")
+    assert controller.rejections == {"rate_limited": 1}
+
+
+def test_capacity_rejections_do_not_spend_rate_tokens(controller):
+    controller.admit("a")
+    for _ in range(5):
+        with pytest.raises(AdmissionRejected) as excinfo:
+            controller.admit("b")
+        assert excinfo.value.status_code == 503
+
+    controller.finished(in_background=False)
+    controller.admit("b")
+    controller.finished(in_background=False)
+    controller.admit("b")  # the 503s left both of b's tokens
+    assert controller.rejections == {"no_slot": 5}
+
+
+def test_full_background_queue_rejects_until_work_finishes(controller):
+    controller.admit("a")
+    controller.response_started(0.2)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.admit("b")
+    assert excinfo.value.detail == "Processing queue is full"
+    assert excinfo.value.retry_after == settings.ADMISSION_RETRY_AFTER
+
+    controller.finished(in_background=True, elapsed=3.2)
+    controller.admit("b")
+    assert controller.snapshot()["background_p50_seconds"] == pytest.approx(3.2)
+
+
+# ----------------------------------------------------------------------
+# Middleware
+# ----------------------------------------------------------------------
+def make_app():
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(AdmissionMiddleware)
+    return app
+
+
+def post(*bodies, headers=None):
+    async def run():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.post("/upload", content=body, headers=headers) for body in bodies]
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def admission(monkeypatch, controller):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 100)
+    monkeypatch.setitem(services._instances, "admission", controller)
+    return controller
+
+
+def test_oversized_upload_is_rejected_before_admission(admission):
+    (response,) = post(b"x" * 101)
+
+    assert response.status_code == 413
+    assert admission.rejections == {"too_large": 1}
+    assert admission.snapshot()["in_flight"] == 0
+
+
+def test_streamed_body_is_counted_without_content_length(admission):
+    async def chunks():
+        for _ in range(3):
+            yield b"x" * 40
+
+    (response,) = post(chunks())
+
+    assert response.status_code == 413
+    assert admission.snapshot()["in_flight"] == 0
+
+
+def test_rate_limited_client_gets_429_with_retry_after(admission):
+    responses = post(b"a", b"b", b"c")
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[2].headers["Retry-After"] == "1"
+    assert responses[0].json() == {"size": 1}
+
+
+def test_saturated_pipeline_gets_503_with_retry_after(admission):
+    admission.in_flight = admission.max_in_flight
+    (response,) = post(b"a")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(settings.ADMISSION_RETRY_AFTER)
+    assert response.json() == {"detail": "Too many documents in progress"}
+
+
+# ----------------------------------------------------------------------
+# Background pool
+# ----------------------------------------------------------------------
+def test_background_pool_bounds_concurrent_work(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_BACKGROUND_WORKERS", 2)
+    container = ServiceContainer()
+    monkeypatch.setattr("app.routes.document_routes.services", container)
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def work(document_id):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    async def run():
+        await asyncio.gather(*(run_in_background_pool(work, document_id=str(i)) for i in range(6)))
+
+    asyncio.run(run())
+    asyncio.run(container.shutdown())
+    assert peak == 2
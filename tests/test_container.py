@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+from app.config import settings
+from app.services.container import ServiceContainer
+
+
+def test_hung_check_does_not_pile_up_threads(monkeypatch):
+    monkeypatch.setattr(settings, "STARTUP_CHECK_TIMEOUT", 0.05)
+    release = threading.Event()
+    calls = []
+
+    def hung():
+        calls.append(threading.current_thread().name)
+        release.wait(5)
+
+    container = ServiceContainer()
+
+    async def probe():
+        return await container._run_check("object_store", hung)
+
+    try:
+        first = asyncio.run(probe())
+        second = asyncio.run(probe())
+    finally:
+        release.set()
+
+    assert first["ready"] is False and "timed out" in first["error"]
+    assert second == {"ready": False, "error": "previous check is still running", "elapsed_ms": second["elapsed_ms"]}
+    assert len(calls) == 1
+    assert calls[0].startswith("health-check")
+    container._check_pool.shutdown(wait=True)
+
+
+def test_check_runs_again_once_the_previous_one_finished():
+    container = ServiceContainer()
+    results = [asyncio.run(container._run_check("ocr", lambda: None)) for _ in range(2)]
+    assert [result["ready"] for result in results] == [True, True]
+    container._check_pool.shutdown(wait=True)
@@ -0,0 +1,212 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.config import settings
+from app.routes import document_routes
+from app.services.container import get_delivery_service, get_sql_service
+from app.services.delivery_service import DeliveryService
+from dashboard import dashboard_mock
+
+URL = "http://dashboard/api/ingest"
+
+
+class FakeOutbox:
+    """In-memory stand-in for the outbox methods of SQLService."""
+
+    def __init__(self, count: int, target_url: str = URL):
+        self.messages = {
+            message_id: {
+                "id": message_id,
+                "document_id": f"doc-{message_id}",
+                "target_url": target_url,
+                "payload": {"document_id": f"doc-{message_id}", "total_amount": 10.0 * message_id},
+                "attempts": 0,
+                "status": "pending",
+                "error": None,
+            }
+            for message_id in range(1, count + 1)
+        }
+
+    def claim_outbox_batch(self, limit: int, lease_seconds: float) -> list[dict]:
+        due = [m for m in self.messages.values() if m["status"] == "pending"][:limit]
+        for message in due:
+            message["attempts"] += 1
+            message["status"] = "claimed"
+        return [dict(message) for message in due]
+
+    def mark_outbox_delivered(self, ids):
+        self._update(ids, status="delivered")
+
+    def mark_outbox_retry(self, ids, error, retry_at):
+        self._update(ids, status="retry", error=error)
+
+    def mark_outbox_dead(self, ids, error):
+        self._update(ids, status="dead", error=error)
+
+    def _update(self, ids, **values):
+        for message_id in ids:
+            self.messages[message_id].update(values)
+
+    def statuses(self) -> dict[str, str]:
+        return {m["document_id"]: m["status"] for m in self.messages.values()}
+
+
+@pytest.fixture(autouse=True)
+def dashboard(monkeypatch):
+    monkeypatch.setitem(dashboard_mock.control, "fail_rate", 0.0)
+    monkeypatch.setitem(dashboard_mock.control, "fail_status", 503)
+    monkeypatch.setitem(dashboard_mock.control, "latency", 0.0)
+    monkeypatch.setitem(dashboard_mock.control, "reject_ids", [])
+    monkeypatch.setattr(settings, "DELIVERY_BATCH_SIZES", {})
+    monkeypatch.setattr(settings, "DELIVERY_MAX_CONCURRENCY", 4)
+    dashboard_mock.received.clear()
+    dashboard_mock.stats.update({"requests": 0, "items": 0, "duplicates": 0, "failed": 0, "batch_sizes": {}})
+    return dashboard_mock
+
+
+def deliver(outbox: FakeOutbox) -> DeliveryService:
+    async def run():
+        delivery = DeliveryService(outbox)
+        delivery.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=dashboard_mock.app))
+        try:
+            while await delivery.deliver_due():
+                pass
+        finally:
+            await delivery.stop()
+        return delivery
+
+    return asyncio.run(run())
+
+
+def test_defaults_send_one_bare_payload_per_request(dashboard):
+    outbox = FakeOutbox(3)
+    delivery = deliver(outbox)
+
+    assert set(outbox.statuses().values()) == {"delivered"}
+    assert dashboard.stats["batch_sizes"] == {1: 3}
+    assert dashboard.received["doc-2"] == outbox.messages[2]["payload"]
+    assert delivery.counters["requests"] == 3
+
+
+def test_batching_targets_always_get_the_envelope(dashboard, monkeypatch):
+    monkeypatch.setattr(settings, "DELIVERY_BATCH_SIZES", {URL: 2})
+    seen = []
+    original = dashboard_mock._receive
+
+    async def spy(request):
+        seen.append(await request.json())
+        return await original(request)
+
+    monkeypatch.setattr(dashboard_mock, "_receive", spy)
+    outbox = FakeOutbox(3)
+    deliver(outbox)
+
+    assert set(outbox.statuses().values()) == {"delivered"}
+    assert sorted(len(body["items"]) for body in seen) == [1, 2]
+
+
+def test_server_errors_are_retried_not_dead_lettered(dashboard):
+    dashboard.control["fail_rate"] = 1.0
+    outbox = FakeOutbox(2)
+    delivery = deliver(outbox)
+
+    assert set(outbox.statuses().values()) == {"retry"}
+    assert outbox.messages[1]["error"].startswith("HTTP 503")
+    assert delivery.counters["retried"] == 2
+
+
+def test_rejected_batch_dead_letters_only_the_bad_payload(dashboard, monkeypatch):
+    monkeypatch.setattr(settings, "DELIVERY_BATCH_SIZES", {URL: 5})
+    dashboard.control["reject_ids"] = ["doc-3"]
+    outbox = FakeOutbox(5)
+    delivery = deliver(outbox)
+
+    assert outbox.statuses() == {
+        "doc-1": "delivered", "doc-2": "delivered", "doc-3": "dead", "doc-4": "delivered", "doc-5": "delivered",
+    }
+    assert outbox.messages[3]["error"].startswith("HTTP 422")
+    assert delivery.counters["split"] == 1
+    assert delivery.counters["dead"] == 1
+
+
+def test_exhausted_attempts_are_dead_lettered(dashboard, monkeypatch):
+    monkeypatch.setattr(settings, "DELIVERY_MAX_ATTEMPTS", 1)
+    dashboard.control["fail_rate"] = 1.0
+    outbox = FakeOutbox(1)
+    deliver(outbox)
+
+    assert outbox.statuses() == {"doc-1": "dead"}
+
+
+def test_unreachable_target_is_retried():
+    outbox = FakeOutbox(1, target_url="http://unreachable/api/ingest")
+
+    async def run():
+        def refuse(request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        delivery = DeliveryService(outbox)
+        delivery.client = httpx.AsyncClient(transport=httpx.MockTransport(refuse))
+        await delivery.deliver_due()
+        await delivery.stop()
+
+    asyncio.run(run())
+    assert outbox.statuses() == {"doc-1": "retry"}
+    assert outbox.messages[1]["error"].startswith("ConnectError")
+
+
+# ----------------------------------------------------------------------
+# /forward
+# ----------------------------------------------------------------------
+class FakeDocuments:
+    def __init__(self):
+        self.queued = []
+
+    def enqueue_document(self, document_id, target_url):
+        self.queued.append((document_id, target_url))
+        return len(self.queued)
+
+
+def forward(body: dict):
+    documents = FakeDocuments()
+    app = FastAPI()
+    app.include_router(document_routes.router)
+    app.dependency_overrides[get_sql_service] = lambda: documents
+    app.dependency_overrides[get_delivery_service] = lambda: DeliveryService(documents)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post("/forward", json=body)
+
+    return asyncio.run(run()), documents.queued
+
+
+@pytest.fixture
+def forwarding(monkeypatch):
+    monkeypatch.setattr(settings, "EXTERNAL_API_URL", "https://erp.example.com/bills")
+    monkeypatch.setattr(settings, "FORWARD_ALLOWED_URLS", ["https://archive.example.com/ingest"])
+
+
+def test_forward_defaults_to_the_external_api(forwarding):
+    response, queued = forward({"document_id": "doc-1"})
+
+    assert response.status_code == 202
+    assert queued == [("doc-1", "https://erp.example.com/bills")]
+
+
+def test_forward_accepts_allowlisted_targets(forwarding):
+    response, queued = forward({"document_id": "doc-1", "target_url": "https://archive.example.com/ingest"})
+
+    assert response.status_code == 202
+    assert queued == [("doc-1", "https://archive.example.com/ingest")]
+
+
+@pytest.mark.parametrize("target_url", ["http://169.254.169.254/latest/meta-data", "http://localhost:3306/"])
+def test_forward_rejects_other_targets(forwarding, target_url):
+    response, queued = forward({"document_id": "doc-1", "target_url": target_url})
+
+    assert response.status_code == 400
+    assert queued == []
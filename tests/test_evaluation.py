@@ -0,0 +1,71 @@
+import csv
+
+import pytest
+
+from app.config import settings
+from app.services.evaluation import EvalConfig, EvaluationRunner, override_settings, write_reports
+
+
+def completed(name: str, correct: bool) -> dict:
+    return {
+        "document": name,
+        "error": None,
+        "latency": {"ocr": 1.0, "classify": 2.0, "extract": 3.0},
+        "fields_labeled": 1,
+        "classification": {"bill_type": {"correct": True}},
+        "fields": {"total_amount": {"correct": correct}},
+    }
+
+
+def failed(name: str, error: str) -> dict:
+    return {"document": name, "error": error, "latency": {"ocr": 1.0}, "fields_labeled": 1}
+
+
+@pytest.fixture
+def summary():
+    results = [
+        completed("a", True),
+        completed("b", False),
+        failed("c", "DeadlineExceededError: LLM stage 'extract' exceeded its time budget"),
+        failed("d", "DeadlineExceededError: LLM stage 'classify' exceeded its time budget"),
+    ]
+    counters = {"classify.tokens.prompt": 300, "extract.tokens.prompt": 500, "extract.tokens.completion": 200}
+    return EvaluationRunner._summarize(EvalConfig("baseline"), results, wall=4.0, counters=counters)
+
+
+def test_throughput_and_token_cost_share_the_completed_denominator(summary):
+    assert summary["completed"] == 2
+    assert summary["tokens_per_document"] == 500.0
+    assert summary["docs_per_second"] == 0.5
+
+
+def test_failures_are_reported_separately(summary):
+    assert summary["errors"] == 2
+    assert summary["error_rate"] == 0.5
+    assert summary["errors_by_type"] == {"DeadlineExceededError": 2}
+    assert summary["field_accuracy"] == 0.25  # failed documents score zero on their labeled fields
+    assert summary["latency_seconds"]["ocr"]["p50"] == 1.0
+
+
+def test_summary_csv_has_the_completed_count(summary, tmp_path):
+    write_reports(tmp_path, [{"config": {"name": "baseline"}, "summary": summary, "documents": []}], metadata={})
+
+    with (tmp_path / "summary.csv").open() as f:
+        (row,) = csv.DictReader(f)
+    assert (row["documents"], row["completed"], row["errors"]) == ("4", "2", "2")
+
+
+def test_override_settings_restores_on_error():
+    before = settings.FIELD_LOCATOR_ENABLED
+
+    with pytest.raises(RuntimeError):
+        with override_settings({"FIELD_LOCATOR_ENABLED": not before}):
+            assert settings.FIELD_LOCATOR_ENABLED is not before
+            raise RuntimeError("config failed")
+    assert settings.FIELD_LOCATOR_ENABLED is before
+
+
+def test_override_settings_rejects_unknown_keys():
+    with pytest.raises(ValueError):
+        with override_settings({"NOT_A_SETTING": 1}):
+            pass
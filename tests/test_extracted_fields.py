@@ -0,0 +1,133 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models.document import Document
+from app.services import sql_service
+from app.services.extracted_fields import get_invoice_number, get_search_fields, get_transaction_date
+from app.services.sql_service import SQLService, _escape_like
+
+
+# ----------------------------------------------------------------------
+# Promoted columns
+# ----------------------------------------------------------------------
+@pytest.mark.parametrize("extracted, netsuite, expected", [
+    ({"invoice_number": " INV-0042 "}, {"tranId": "NS-1"}, "INV-0042"),
+    ({"invoice_number": ""}, {"tranId": "NS-1"}, "NS-1"),
+    ({}, {"tranId": 1042}, "1042"),
+    ({"invoice_number": {"value": "INV-1"}}, None, None),
+    ({"invoice_number": "   "}, None, None),
+    ({"invoice_number": "X" * 150}, None, "X" * 100),
+    (None, None, None),
+    ("not a dict", ["nor", "this"], None),
+])
+def test_get_invoice_number(extracted, netsuite, expected):
+    assert get_invoice_number(extracted, netsuite) == expected
+
+
+@pytest.mark.parametrize("extracted, netsuite, expected", [
+    ({"invoice_date": "2024-05-01"}, None, datetime.date(2024, 5, 1)),
+    ({"invoice_date": "2024-05-01T10:30:00Z"}, None, datetime.date(2024, 5, 1)),
+    ({"transaction_date": " 2024-03-05 "}, None, datetime.date(2024, 3, 5)),
+    ({"invoice_date": "05/01/2024", "transaction_date": "2024-05-02"}, None, datetime.date(2024, 5, 2)),
+    ({"invoice_date": "garbage"}, {"tranDate": "2024-06-30"}, datetime.date(2024, 6, 30)),
+    ({"invoice_date": 20240501}, None, None),
+    ({}, {"tranDate": "30/06/2024"}, None),
+])
+def test_get_transaction_date(extracted, netsuite, expected):
+    assert get_transaction_date(extracted, netsuite) == expected
+
+
+def test_search_fields_for_an_invoice():
+    fields = get_search_fields(
+        {
+            "vendor": {"name": " ACME Corp "},
+            "invoice_number": "INV-0042",
+            "invoice_date": "2024-05-01",
+            "total_amount": "1,234.50",
+            "currency": "usd",
+        },
+        {"tranId": "NS-1", "tranDate": "2024-06-01"},
+    )
+    assert fields == {
+        "vendor_name": "ACME Corp",
+        "invoice_number": "INV-0042",
+        "transaction_date": datetime.date(2024, 5, 1),
+        "total_amount": Decimal("1234.50"),
+        "currency": "USD",
+    }
+
+
+def test_search_fields_for_an_expense_fall_back_to_merchant_and_netsuite():
+    fields = get_search_fields(
+        {"vendor": {"name": ""}, "merchant": {"name": "Cafe Nero"}, "transaction_date": "2024-05-03"},
+        {"tranId": "EXP-7"},
+    )
+    assert fields["vendor_name"] == "Cafe Nero"
+    assert fields["invoice_number"] == "EXP-7"
+    assert fields["transaction_date"] == datetime.date(2024, 5, 3)
+    assert fields["total_amount"] is None
+    assert fields["currency"] is None
+
+
+def test_search_fields_tolerate_missing_data():
+    assert get_search_fields(None, None) == dict.fromkeys(
+        ("vendor_name", "invoice_number", "transaction_date", "total_amount", "currency")
+    )
+
+
+# ----------------------------------------------------------------------
+# Prefix search
+# ----------------------------------------------------------------------
+def test_escape_like():
+    assert _escape_like(r"50%_off\sale") == r"50\%\_off\\sale"
+
+
+@pytest.fixture
+def documents(monkeypatch):
+    engine = create_engine("sqlite://")
+    Document.__table__.create(engine)
+    monkeypatch.setattr(sql_service, "SessionLocal", sessionmaker(bind=engine))
+
+    session = sql_service.SessionLocal()
+    created = datetime.datetime(2024, 5, 1)
+    for i, (vendor, invoice) in enumerate([
+        ("ACME Corp", "INV-100"),
+        ("ACME_Labs", "INV-1000"),
+        ("ACMEX", "INV%200"),
+        ("Globex", "100"),
+    ]):
+        session.add(Document(
+            document_id=f"doc-{i}",
+            filename="bill.png",
+            object_key=f"doc-{i}/bill.png",
+            vendor_name=vendor,
+            invoice_number=invoice,
+            created_at=created + datetime.timedelta(minutes=i),
+        ))
+    session.commit()
+    session.close()
+    yield SQLService()
+    engine.dispose()
+
+
+def vendors(docs):
+    return sorted(doc.vendor_name for doc in docs)
+
+
+def test_prefix_search(documents):
+    assert vendors(documents.search_documents(vendor="ACME", prefix=True)) == ["ACME Corp", "ACMEX", "ACME_Labs"]
+    assert vendors(documents.search_documents(invoice_number="INV-100", prefix=True)) == ["ACME Corp", "ACME_Labs"]
+
+
+def test_prefix_search_treats_wildcards_literally(documents):
+    assert vendors(documents.search_documents(vendor="ACME_", prefix=True)) == ["ACME_Labs"]
+    assert vendors(documents.search_documents(invoice_number="INV%", prefix=True)) == ["ACMEX"]
+
+
+def test_exact_search_needs_the_whole_value(documents):
+    assert documents.search_documents(vendor="ACME", prefix=False) == []
+    assert vendors(documents.search_documents(invoice_number="100")) == ["Globex"]
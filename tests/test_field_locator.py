@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services.field_locator import FieldLocator, parse_amount, parse_date, parse_invoice_number
+from app.services.ocr_result import OCRResult
+
+LINE_HEIGHT = 20
+CHAR_WIDTH = 12
+
+
+def page(*lines, conf: float = 96.0) -> OCRResult:
+    """
+    OCRResult from (top, [(left, word), ...]) lines; word widths follow
+    their length and every word gets the same OCR confidence.
+    """
+    words, boxes, line_ids = [], [], []
+    for line_no, (top, placed) in enumerate(lines):
+        for left, word in placed:
+            words.append(word)
+            boxes.append((left, top, CHAR_WIDTH * len(word), LINE_HEIGHT))
+            line_ids.append(line_no)
+    return OCRResult(
+        words,
+        np.array(boxes, dtype=np.int32),
+        np.full(len(words), conf, dtype=np.float32),
+        np.array(line_ids, dtype=np.int32),
+        np.zeros(len(words), dtype=np.int32),
+    )
+
+
+def row(top: int, text: str, left: int = 50):
+    placed = []
+    for word in text.split():
+        placed.append((left, word))
+        left += CHAR_WIDTH * (len(word) + 1)
+    return top, placed
+
+
+# ----------------------------------------------------------------------
+# Parsers
+# ----------------------------------------------------------------------
+@pytest.mark.parametrize("words, expected", [
+    (["268.44"], (268.44, 1, 1.0)),
+    (["1,234.50"], (1234.5, 1, 1.0)),
+    (["1.234,50"], (1234.5, 1, 1.0)),
+    (["$", "18.00"], (18.0, 2, 1.0)),
+    (["EUR", "18,00"], (18.0, 2, 1.0)),
+    (["(42.10)"], (-42.1, 1, 1.0)),
+    (["2"], (2.0, 1, 0.8)),
+    (["abc"], None),
+    ([], None),
+])
+def test_parse_amount(words, expected):
+    assert parse_amount(words) == expected
+
+
+@pytest.mark.parametrize("words, expected", [
+    (["2024-05-01"], ("2024-05-01", 1, 1.0)),
+    (["01/05/2024"], ("2024-05-01", 1, 0.6)),  # could be January 5th
+    (["25/05/2024"], ("2024-05-25", 1, 1.0)),
+    (["05/25/2024"], ("2024-05-25", 1, 1.0)),
+    (["05/05/2024"], ("2024-05-05", 1, 1.0)),
+    (["5", "Mar", "2024"], ("2024-03-05", 3, 1.0)),
+    (["March", "5,", "2024"], ("2024-03-05", 3, 1.0)),
+    (["1850-01-01"], None),
+    (["INV-001"], None),
+])
+def test_parse_date(words, expected):
+    assert parse_date(words) == expected
+
+
+@pytest.mark.parametrize("words, expected", [
+    (["INV-0042"], ("INV-0042", 1, 1.0)),
+    (["#12345"], ("12345", 1, 1.0)),
+    (["ACME"], None),
+    (["2024-05-01"], None),
+])
+def test_parse_invoice_number(words, expected):
+    assert parse_invoice_number(words) == expected
+
+
+# ----------------------------------------------------------------------
+# Labels, context and thresholds
+# ----------------------------------------------------------------------
+def locate(*lines, conf: float = 96.0):
+    return FieldLocator().locate(page(*lines, conf=conf))
+
+
+def test_specific_labels_clear_the_override_threshold():
+    found = locate(
+        row(40, "Invoice Number: INV-0042"),
+        row(70, "Invoice Date: 2024-05-01"),
+        row(400, "Grand Total: $ 268.44"),
+    )
+    assert found["invoice_number"].value == "INV-0042"
+    assert found["date"].value == "2024-05-01"
+    assert found["total_amount"].value == 268.44
+    assert all(field.confidence >= settings.FIELD_LOCATOR_MIN_CONFIDENCE for field in found.values())
+
+
+def test_generic_labels_stay_below_the_override_threshold():
+    found = locate(row(70, "Date: 2024-05-01"), row(400, "Total: 268.44"), conf=100.0)
+    assert found["date"].value == "2024-05-01"
+    assert found["total_amount"].value == 268.44
+    assert all(field.confidence < settings.FIELD_LOCATOR_MIN_CONFIDENCE for field in found.values())
+
+
+def test_due_date_and_tax_total_are_not_taken_for_the_invoice_date_and_total():
+    found = locate(
+        row(70, "Date: 2024-05-01"),
+        row(100, "Due Date: 2024-05-31"),
+        row(380, "Total Tax: 12.00"),
+        row(400, "Sub Total 256.44"),
+    )
+    assert found["date"].value == "2024-05-01"
+    assert "total_amount" not in found
+
+
+def test_first_date_and_last_total_win_ties():
+    found = locate(
+        row(70, "Date: 2024-05-01"),
+        row(100, "Date: 2024-06-01"),
+        row(380, "Total: 100.00"),
+        row(400, "Total: 268.44"),
+    )
+    assert found["date"].value == "2024-05-01"
+    assert found["total_amount"].value == 268.44
+
+
+def test_ambiguous_numeric_date_is_only_a_hint():
+    found = locate(row(70, "Invoice Date: 03/04/2024"))
+    assert found["date"].value == "2024-04-03"
+    assert found["date"].confidence < settings.FIELD_LOCATOR_MIN_CONFIDENCE
+
+
+def test_value_below_label():
+    found = locate(row(400, "Amount Due"), row(424, "268.44"))
+    assert found["total_amount"].value == 268.44
+    assert found["total_amount"].box == (50, 424, 50 + CHAR_WIDTH * 6, 444)
+
+
+def test_value_far_below_label_is_ignored():
+    found = locate(row(400, "Amount Due"), row(600, "268.44"))
+    assert "total_amount" not in found
+
+
+def test_value_below_must_overlap_the_label():
+    found = locate(row(400, "Amount Due"), row(424, "268.44", left=600))
+    assert "total_amount" not in found
@@ -0,0 +1,115 @@
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import llm_service
+from app.services.llm_service import LLMService
+from app.services.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceededError
+
+OK = {"response": "{}", "prompt_eval_count": 10, "eval_count": 4}
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY", 0.002)
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", False)
+
+
+def make_llm(*outcomes, failure_threshold: int = 5):
+    """
+    LLMService whose Ollama answers with `outcomes` in turn: an int is a
+    bare status code, a dict a 200 JSON body, an exception class is raised.
+    """
+    calls = []
+
+    def handler(request):
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(request)
+        if isinstance(outcome, type) and issubclass(outcome, Exception):
+            raise outcome("simulated", request=request)
+        if isinstance(outcome, int):
+            return httpx.Response(outcome)
+        return httpx.Response(200, json=outcome)
+
+    llm = LLMService()
+    llm.client.close()
+    llm.client = httpx.Client(transport=httpx.MockTransport(handler), base_url="http://ollama")
+    llm.breaker = CircuitBreaker("ollama", failure_threshold=failure_threshold, reset_timeout=60)
+    return llm, calls
+
+
+def test_retries_transient_errors_then_succeeds():
+    llm, calls = make_llm(503, httpx.ConnectError, OK)
+
+    assert llm._generate("prompt", stage="classify") == "{}"
+    assert len(calls) == 3
+    assert llm.counters["classify.retries"] == 2
+    assert llm.counters["classify.success"] == 1
+    assert llm.counters["tokens.prompt"] == 10
+    assert llm.breaker.snapshot()["consecutive_failures"] == 0
+
+
+def test_bad_request_is_not_retried_and_keeps_the_breaker_closed():
+    llm, calls = make_llm(400)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        llm._generate("prompt", stage="extract")
+    assert len(calls) == 1
+    assert llm.counters["extract.failure"] == 1
+    assert llm.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_exhausted_retries_reraise_and_count_one_breaker_failure():
+    llm, calls = make_llm(503)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        llm._generate("prompt", stage="extract")
+    assert len(calls) == settings.LLM_MAX_RETRIES + 1
+    assert llm.counters["extract.failure"] == 1
+    assert llm.breaker.snapshot()["consecutive_failures"] == 1
+
+
+def test_timeout_on_the_last_attempt_is_a_deadline_error():
+    llm, calls = make_llm(httpx.ReadTimeout)
+
+    with pytest.raises(DeadlineExceededError) as excinfo:
+        llm._generate("prompt", stage="netsuite")
+    assert isinstance(excinfo.value.__cause__, httpx.ReadTimeout)
+    assert len(calls) == settings.LLM_MAX_RETRIES + 1
+    assert llm.counters["netsuite.deadline_exceeded"] == 1
+    assert llm.counters["netsuite.failure"] == 0
+
+
+def test_running_out_of_budget_stops_retrying(monkeypatch):
+    monkeypatch.setattr(llm_service, "backoff_delay", lambda attempt, base, cap: 5.0)
+    llm, calls = make_llm(503)
+    llm.stage_timeouts["classify"] = 0.5
+
+    with pytest.raises(DeadlineExceededError) as excinfo:
+        llm._generate("prompt", stage="classify")
+    assert isinstance(excinfo.value.__cause__, httpx.HTTPStatusError)
+    assert len(calls) == 1
+    assert llm.counters["classify.deadline_exceeded"] == 1
+
+
+def test_breaker_opens_after_failed_calls_and_recovers_through_half_open():
+    llm, calls = make_llm(503, failure_threshold=2)
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            llm._generate("prompt", stage="classify")
+    assert llm.breaker.state == CircuitBreaker.OPEN
+    attempts = len(calls)
+
+    with pytest.raises(CircuitOpenError):
+        llm._generate("prompt", stage="classify")
+    assert len(calls) == attempts
+
+    llm.breaker.reset_timeout = 0
+    assert llm.breaker.state == CircuitBreaker.HALF_OPEN
+    llm.client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=OK)),
+                              base_url="http://ollama")
+    assert llm._generate("prompt", stage="classify") == "{}"
+    assert llm.breaker.state == CircuitBreaker.CLOSED
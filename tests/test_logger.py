@@ -0,0 +1,121 @@
+import asyncio
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.config import settings
+from app.logger import REDACTED, bind_correlation_id, correlation_id, log_payload, redact
+from app.middleware import CorrelationIdMiddleware
+
+
+# ----------------------------------------------------------------------
+# redact
+# ----------------------------------------------------------------------
+def test_redact_masks_sensitive_keys_at_any_depth():
+    value = {"vendor": "ACME", "Password": "hunter2", "bank": {"iban": "DE89 3704", "name": "Bank"}}
+
+    assert redact(value) == {"vendor": "ACME", "Password": REDACTED, "bank": {"iban": REDACTED, "name": "Bank"}}
+
+
+def test_redact_truncates_long_strings_and_collections():
+    assert redact("x" * 12, max_chars=5) == "xxxxx… (+7 chars)"
+    assert redact(list(range(5)), max_items=3) == [0, 1, 2, "… +2 items"]
+    assert redact({f"k{i}": i for i in range(4)}, max_items=2) == {"k0": 0, "k1": 1, "…": "+2 keys"}
+
+
+def test_redact_cuts_deep_nesting_and_stringifies_other_types():
+    nested = current = {}
+    for _ in range(10):
+        current["next"] = current = {}
+
+    depth = 0
+    out = redact(nested)
+    while isinstance(out, dict):
+        out, depth = out["next"], depth + 1
+    assert out == "…"
+    assert depth == 7
+    assert redact({"amount": 1.5, "ok": True, "none": None, "day": object}) == {
+        "amount": 1.5, "ok": True, "none": None, "day": "<class 'object'>",
+    }
+
+
+# ----------------------------------------------------------------------
+# log_payload
+# ----------------------------------------------------------------------
+@pytest.fixture
+def captured(caplog):
+    caplog.set_level(logging.DEBUG, logger="test.payload")
+    return caplog
+
+
+def test_log_payload_is_lazy_and_redacted(captured, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    log_payload(logging.getLogger("test.payload"), "structured data", lambda: {"vendor": "ACME", "token": "t0k"})
+
+    (record,) = captured.records
+    assert record.levelno == logging.DEBUG
+    assert record.payload == "structured data"
+    assert record.getMessage() == 'structured data: {"vendor": "ACME", "token": "[REDACTED]"}'
+
+
+def test_log_payload_honours_the_sample_rate(captured, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+    log_payload(logging.getLogger("test.payload"), "skipped", {"vendor": "ACME"})
+
+    assert captured.records == []
+
+
+def test_log_payload_builds_nothing_above_debug(caplog, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    caplog.set_level(logging.INFO, logger="test.payload")
+
+    def payload():
+        raise AssertionError("payload built although DEBUG is off")
+
+    log_payload(logging.getLogger("test.payload"), "skipped", payload)
+    assert caplog.records == []
+
+
+# ----------------------------------------------------------------------
+# Correlation ids
+# ----------------------------------------------------------------------
+def request(headers=None, rebind: str | None = None):
+    app = FastAPI()
+
+    @app.get("/")
+    def root():
+        if rebind:
+            correlation_id.set(rebind)
+        return {"correlation_id": correlation_id.get()}
+
+    app.add_middleware(CorrelationIdMiddleware)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get("/", headers=headers)
+
+    return asyncio.run(run())
+
+
+def test_incoming_request_id_is_echoed():
+    response = request(headers={"X-Request-ID": "req-42"})
+
+    assert response.headers["X-Correlation-ID"] == "req-42"
+    assert response.json() == {"correlation_id": "req-42"}
+
+
+def test_missing_request_id_gets_a_fresh_one():
+    first, second = request(), request()
+
+    assert len(first.headers["X-Correlation-ID"]) == 32
+    assert first.headers["X-Correlation-ID"] != second.headers["X-Correlation-ID"]
+
+
+def test_bind_correlation_id_restores_the_previous_value():
+    with bind_correlation_id("outer"):
+        with bind_correlation_id("inner"):
+            assert correlation_id.get() == "inner"
+        assert correlation_id.get() == "outer"
+    assert correlation_id.get() is None
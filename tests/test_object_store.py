@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.routes import object_routes
+from app.routes.object_routes import parse_range
+from app.services.container import get_object_store
+from app.services.object_store import (
+    GridFSObjectStore,
+    LocalObjectStore,
+    MinioObjectStore,
+    ObjectNotFoundError,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalObjectStore(str(tmp_path / "objects"))
+    store.ping()
+    return store
+
+
+def test_put_get_and_range_reads(store):
+    assert store.put("doc-1/bill.png", b"0123456789", "image/png") == "doc-1/bill.png"
+
+    assert store.get("doc-1/bill.png") == b"0123456789"
+    assert store.get("doc-1/bill.png", offset=2, length=3) == b"234"
+    assert store.get("doc-1/bill.png", offset=8) == b"89"
+    assert store.size("doc-1/bill.png") == 10
+    assert not list(store.root.rglob(".*.tmp"))
+
+
+def test_put_replaces_an_existing_object(store):
+    store.put("doc-1/bill.png", b"old contents")
+    store.put("doc-1/bill.png", b"new")
+    assert store.get("doc-1/bill.png") == b"new"
+
+
+def test_missing_objects_raise_not_found(store):
+    with pytest.raises(ObjectNotFoundError):
+        store.get("nope.png")
+    with pytest.raises(ObjectNotFoundError):
+        store.size("nope.png")
+
+
+@pytest.mark.parametrize("key", ["../outside.png", "doc-1/../../outside.png", "/etc/passwd"])
+def test_keys_cannot_escape_the_root(store, key):
+    with pytest.raises(ValueError):
+        store.put(key, b"x")
+    assert not (store.root.parent / "outside.png").exists()
+
+
+def test_only_minio_serves_presigned_urls(store):
+    assert MinioObjectStore.serves_presigned_urls
+    assert not GridFSObjectStore.serves_presigned_urls
+    assert store.get_presigned_url("doc 1/bill.png") == "/objects/doc%201/bill.png"
+
+
+@pytest.mark.parametrize("header, size, expected", [
+    ("bytes=0-3", 10, (0, 3)),
+    ("bytes=5-", 10, (5, 9)),
+    ("bytes=5-100", 10, (5, 9)),
+    ("bytes=-4", 10, (6, 9)),
+    ("bytes=-40", 10, (0, 9)),
+    ("bytes=-0", 10, None),
+    ("bytes=10-", 10, None),
+    ("bytes=6-3", 10, None),
+    ("bytes=-", 10, None),
+    ("bytes=0-1,4-5", 10, None),
+    ("items=0-3", 10, None),
+    ("bytes=-5", 0, None),
+    ("bytes=0-", 0, None),
+])
+def test_parse_range(header, size, expected):
+    assert parse_range(header, size) == expected
+
+
+def get(store, path, headers=None):
+    app = FastAPI()
+    app.include_router(object_routes.router)
+    app.dependency_overrides[get_object_store] = lambda: store
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(run())
+
+
+def test_route_serves_whole_objects_and_ranges(store):
+    store.put("doc-1/bill.png", b"0123456789")
+
+    whole = get(store, "/objects/doc-1/bill.png")
+    assert (whole.status_code, whole.content, whole.headers["content-type"]) == (200, b"0123456789", "image/png")
+
+    partial = get(store, "/objects/doc-1/bill.png", headers={"Range": "bytes=-4"})
+    assert (partial.status_code, partial.content) == (206, b"6789")
+    assert partial.headers["Content-Range"] == "bytes 6-9/10"
+
+
+def test_route_rejects_unsatisfiable_ranges_and_missing_objects(store):
+    store.put("empty.png", b"")
+
+    empty = get(store, "/objects/empty.png", headers={"Range": "bytes=-5"})
+    assert empty.status_code == 416
+    assert empty.headers["Content-Range"] == "bytes */0"
+    assert get(store, "/objects/nope.png").status_code == 404
@@ -0,0 +1,60 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.services.ocr_service import find_text_regions, flatten_alpha, otsu_threshold
+
+PAGE = (1200, 900)
+
+
+def ink_mask(image: Image.Image) -> np.ndarray:
+    pixels = np.asarray(flatten_alpha(image).convert("L"))
+    return pixels <= otsu_threshold(pixels)
+
+
+def bar(draw, x, y, width, height=14):
+    """A solid block standing in for a line of text."""
+    draw.rectangle((x, y, x + width, y + height), fill=0)
+
+
+def test_table_rows_are_not_split_at_the_amount_column():
+    image = Image.new("L", PAGE, 255)
+    draw = ImageDraw.Draw(image)
+    for row in range(12):
+        y = 100 + row * 40
+        bar(draw, 100, y, 300)   # description
+        bar(draw, 900, y, 120)   # amount
+    assert len(find_text_regions(ink_mask(image))) == 1
+
+
+def test_independent_columns_are_split():
+    image = Image.new("L", PAGE, 255)
+    draw = ImageDraw.Draw(image)
+    for row in range(14):
+        bar(draw, 100, 100 + row * 40, 380)
+    for row in range(9):
+        bar(draw, 700, 125 + row * 63, 380)
+
+    regions = find_text_regions(ink_mask(image))
+
+    assert len(regions) == 2
+    assert regions[0][2] < 700 <= regions[1][0]
+
+
+def test_narrow_gaps_are_not_gutters():
+    image = Image.new("L", PAGE, 255)
+    draw = ImageDraw.Draw(image)
+    for row in range(14):
+        bar(draw, 100, 100 + row * 40, 380)
+    for row in range(9):
+        bar(draw, 510, 125 + row * 63, 380)  # 30 px gap, below 4% of the page width
+    assert len(find_text_regions(ink_mask(image))) == 1
+
+
+def test_transparent_pixels_are_background():
+    image = Image.new("RGBA", PAGE, (0, 0, 0, 0))
+    ImageDraw.Draw(image).rectangle((100, 100, 400, 114), fill=(0, 0, 0, 255))
+
+    ink = ink_mask(image)
+
+    assert ink[107, 200] and not ink[500, 600]
+    assert find_text_regions(ink) == [(90, 90, 411, 125)]
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services import llm_service
+from app.services.llm_service import LLMService
+from app.services.reprocess_service import ReprocessService, changed_stages
+
+LOCATED = {"total_amount": {"value": 268.44, "confidence": 0.97, "label": "grand total", "box": [0, 0, 1, 1]}}
+
+
+@pytest.fixture
+def llm():
+    service = LLMService()
+    yield service
+    service.close()
+
+
+def test_stage_versions_cover_the_prompt_template(llm, monkeypatch):
+    before = llm.stage_versions("Invoice Bill")
+
+    monkeypatch.setattr(llm_service, "EXTRACT_TEMPLATE", llm_service.EXTRACT_TEMPLATE + "\nANSWER IN JSON\n")
+    after = llm.stage_versions("Invoice Bill")
+
+    assert changed_stages(before, after) == {"extract"}
+
+
+def test_stage_versions_cover_the_located_field_block(llm, monkeypatch):
+    before = llm.stage_versions("Expense Bill")
+    monkeypatch.setitem(llm_service.LOCATED_FIELD_KEYS, "expense", {"total_amount": "total_amount"})
+    assert changed_stages(before, llm.stage_versions("Expense Bill")) == {"extract"}
+
+
+class FakeSQL:
+    def __init__(self, text, located_fields):
+        self.text = text
+        self.located_fields = located_fields
+        self.updated = None
+
+    def get_ocr_text(self, document_id):
+        return self.text
+
+    def get_located_fields(self, document_id):
+        return self.located_fields
+
+    def update_document_processing(self, **kwargs):
+        self.updated = kwargs
+
+
+def test_reextraction_reuses_stored_located_fields(llm, monkeypatch):
+    prompts = []
+
+    def generate(prompt, json_mode=False, stage="generate"):
+        prompts.append((stage, prompt))
+        return '{"total_amount": 999.0}' if stage == "extract" else "{}"
+
+    monkeypatch.setattr(llm, "_generate", generate)
+    monkeypatch.setattr(settings, "DASHBOARD_API_URL", "http://dashboard/api/ingest")
+    sql = FakeSQL("GRAND TOTAL 268.44", LOCATED)
+    service = ReprocessService(llm=llm, sql=sql, ocr=None, field_locator=None, object_store=None, search_index=None)
+
+    current = llm.stage_versions("Invoice Bill")
+    row = SimpleNamespace(
+        document_id="doc-1",
+        object_key="documents/doc-1/bill.png",
+        bill_type="Invoice Bill",
+        bill_subtype="Utilities",
+        extracted_data={},
+        netsuite_data={},
+        processing_versions={**current, "extract": {"model": llm.model, "prompt": "outdated"}},
+    )
+
+    assert service.reprocess_document(row) == ["extract", "netsuite"]
+    extract_prompt = next(prompt for stage, prompt in prompts if stage == "extract")
+    assert "OCR FORM KEY-VALUE PAIRS" in extract_prompt
+    # The locator value still overrides the model's answer
+    assert sql.updated["extracted_data"]["total_amount"] == 268.44
+    assert sql.updated["processing_versions"] == current
+    # The new results are queued for the dashboard with the update
+    assert sql.updated["outbox_urls"] == ["http://dashboard/api/ingest"]
@@ -0,0 +1,46 @@
+from app.services.search_index_service import SearchIndexService, build_match_query
+
+
+def ids(hits):
+    return [hit["document_id"] for hit in hits]
+
+
+def test_build_match_query_quotes_terms():
+    assert build_match_query('acme "inv* OR') == '"acme" "inv"* "OR"'
+    assert build_match_query("  ") == ""
+
+
+def test_index_replace_and_search(tmp_path):
+    index = SearchIndexService(str(tmp_path / "index.db"))
+    index.index_document("doc-1", "ACME Utilities invoice total 268.44")
+    index.index_many([("doc-2", "Globex receipt coffee"), ("doc-3", "ACME receipt")])
+
+    assert sorted(ids(index.search("acme"))) == ["doc-1", "doc-3"]
+    assert ids(index.search("glob*")) == ["doc-2"]
+
+    index.index_document("doc-1", "Initech invoice")
+    assert ids(index.search("acme")) == ["doc-3"]
+    assert ids(index.search("initech")) == ["doc-1"]
+    hit = index.search("initech")[0]
+    assert "[Initech]" in hit["snippet"]
+    index.close()
+
+
+def test_rebuild_swaps_in_new_index_and_keeps_concurrent_documents(tmp_path):
+    index = SearchIndexService(str(tmp_path / "index.db"))
+    index.index_document("stale", "obsolete text")
+
+    def texts():
+        yield "doc-1", "ACME invoice"
+        # Searches still answer from the live index while the rebuild runs,
+        # and a document ingested meanwhile survives the swap
+        assert ids(index.search("obsolete")) == ["stale"]
+        index.index_document("late", "late arrival")
+        yield "doc-2", "ACME receipt"
+
+    assert index.rebuild(texts(), batch_size=1) == 2
+
+    assert sorted(ids(index.search("acme"))) == ["doc-1", "doc-2"]
+    assert ids(index.search("late")) == ["late"]
+    assert index.search("obsolete") == []
+    index.close()
@@ -0,0 +1,54 @@
+import datetime
+from decimal import Decimal
+
+from app.services.extracted_fields import MAX_AMOUNT, get_total_amount
+from app.services.sql_service import UNKNOWN, _summary_key, merge_summary_changes
+
+CREATED_AT = datetime.datetime(2024, 5, 1, 12, 30)
+
+
+def test_summary_key_separates_currencies():
+    usd = _summary_key("Invoice Bill", "Utilities", {"vendor": {"name": "ACME"}, "currency": "usd"}, CREATED_AT)
+    eur = _summary_key("Invoice Bill", "Utilities", {"vendor": {"name": "ACME"}, "currency": "EUR"}, CREATED_AT)
+
+    assert usd == ("Invoice Bill", "Utilities", "ACME", "USD", datetime.date(2024, 5, 1))
+    assert eur[3] == "EUR"
+    assert usd != eur
+
+
+def test_summary_key_defaults_missing_values():
+    assert _summary_key(None, None, None, CREATED_AT) == (UNKNOWN, UNKNOWN, UNKNOWN, UNKNOWN, datetime.date(2024, 5, 1))
+
+
+def test_total_amount_parses_formatted_strings():
+    assert get_total_amount({"total_amount": "1,234.505"}) == Decimal("1234.50")
+    assert get_total_amount({"total_amount": 268.44}) == Decimal("268.44")
+
+
+def test_total_amount_rejects_values_that_would_fail_the_insert():
+    for value in ("NaN", "Infinity", "-inf", str(MAX_AMOUNT), "1e20", "abc", True, None):
+        assert get_total_amount({"total_amount": value}) is None
+
+
+def test_rebuild_keeps_changes_committed_during_the_scan():
+    day = datetime.date(2024, 5, 1)
+    acme, globex, initech = (("Invoice Bill", "Utilities", vendor, "USD", day) for vendor in ("ACME", "Globex", "Initech"))
+    scanned = {acme: [3, Decimal("30")], globex: [1, Decimal("5")]}
+    at_snapshot = {acme: [2, Decimal("20")], globex: [1, Decimal("5")]}
+    current = {
+        acme: [3, Decimal("35")],        # one ingest of 15 during the scan
+        globex: [0, Decimal("0")],       # reprocessed into another vendor
+        initech: [1, Decimal("7")],      # new key created during the scan
+    }
+
+    assert merge_summary_changes(scanned, at_snapshot, current) == {
+        acme: [4, Decimal("45")],
+        initech: [1, Decimal("7")],
+    }
+
+
+def test_rebuild_without_concurrent_changes_is_the_scan():
+    key = ("Invoice Bill", "Utilities", "ACME", "USD", datetime.date(2024, 5, 1))
+    stale = {key: [9, Decimal("90")]}
+
+    assert merge_summary_changes({key: [3, Decimal("30")]}, stale, stale) == {key: [3, Decimal("30")]}